@@ -1,17 +1,36 @@
+import time
+imports_started = time.perf_counter()
 import streamlit as st
-from src.config import PAGE_CONFIG, CUSTOM_CSS, DEFAULT_LAT, DEFAULT_LON
+from src.config import PAGE_CONFIG, CUSTOM_CSS, DEFAULT_LAT, DEFAULT_LON, LIVE_VIEW_INTERVAL_S, ROUTE_MAX_STOPS, FIRE_PROJECTION_MIN, WORKER_ADDRESS, METRICS_PORT, REPLAY_STEP_S
 from src.speech import text_to_speech
-from src.data import DataManager
-from src.logic import apply_ranking_logic
-from src.ui import render_sidebar, render_header, render_map, render_citizen_list
-from src.ai import AIAssistant
+from src.ui import render_sidebar, render_header, render_map, render_citizen_list, render_citizen_filters, render_dispatch_panel, render_degraded_banner, lod_view_change, render_snapshot_caption, render_ops_panel, render_rank_alerts, render_replay_controls, render_replay_view
+from src.ai import AIAssistant, prewarm_openai_client
+from src.shards import bbox_from_map_bounds
+from src.data_plane import LocalDataPlane
+from src.worker import RemoteDataPlane, parse_address
+from src.dispatch import DispatchPlanner, default_teams
+from src.resilience import health_report
+from src.metrics import metrics, span, timed, start_metrics_server
+from src.lazy import prewarm
 import pandas as pd
+import uuid
+
+# Module import cost of this run (the cold start in the first run of a process)
+imports_s = time.perf_counter() - imports_started
 
 # -----------------------------------------------------------------------------
 # 1. CONFIGURATION & PAGE SETUP
 # -----------------------------------------------------------------------------
 st.set_page_config(**PAGE_CONFIG)
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+rerun_started = time.perf_counter()
+
+@st.cache_resource
+def get_metrics_server():
+    # Prometheus text endpoint, one per server process (only when METRICS_PORT is set)
+    return start_metrics_server(METRICS_PORT) if METRICS_PORT else None
+
+get_metrics_server()
 
 # -----------------------------------------------------------------------------
 # 2. STATE MANAGEMENT
@@ -38,22 +57,51 @@ if 'list_widget_key' not in st.session_state:
 if "dataframe_key" not in st.session_state:
     st.session_state.dataframe_key = 0
 
+if "viewer_id" not in st.session_state:
+    st.session_state.viewer_id = uuid.uuid4().hex
+
 # -----------------------------------------------------------------------------
 # 3. DATA LOADING & PROCESSING
 # -----------------------------------------------------------------------------
-@st.cache_data
-def get_citizen_data():
-    # return DataManager.load_data_from_local_json('dummy_data/dataset_250_final.json')
-    return DataManager.load_citizen_data_from_blob()
-
-@st.cache_data
-def get_fire_data():
-    return DataManager.load_fire_data_from_blob()
-
-raw_data = get_citizen_data()
-fire_data = get_fire_data()
-# Pass None for fire sim coords as they are disabled
-processed_data = apply_ranking_logic(raw_data)
+@st.cache_resource
+def get_data_plane():
+    # Owner of the live data and the heavy computation: the local worker service when
+    # WORKER_ADDRESS is set, otherwise one in-process data plane per server process
+    # (the first snapshot is loaded synchronously so the first render has data).
+    if WORKER_ADDRESS:
+        return RemoteDataPlane(parse_address(WORKER_ADDRESS))
+    return LocalDataPlane.create()
+
+def get_dispatch(n_teams, version, data):
+    """Per-session dispatch planner, updated incrementally once per snapshot version."""
+    planner = st.session_state.get("dispatch_planner")
+    if planner is None or len(planner.teams) != n_teams:
+        planner = DispatchPlanner(default_teams(n_teams))
+        st.session_state.dispatch_planner = planner
+        st.session_state.dispatch_version = None
+
+    if st.session_state.dispatch_version != version:
+        st.session_state.dispatch_assigned = planner.update(data)
+        st.session_state.dispatch_version = version
+    return planner, st.session_state.dispatch_assigned
+
+def load_snapshot():
+    """Shared view of the latest published snapshot, and its ranked citizens (references, not copies)."""
+    with span("app.load_snapshot"):
+        snapshot = get_data_plane().current()
+    return snapshot, snapshot.ranked
+
+def select_snapshot_recipients(snapshot):
+    # Broadcast selection runs in the data plane, on the version this page shows
+    return lambda data, fire_df, radius_m, categories: get_data_plane().broadcast_recipients(
+        snapshot.version, radius_m=radius_m, categories=categories
+    )
+
+snapshot, processed_data = load_snapshot()
+# Version on screen; the live status timer reruns the page when a newer one is published
+st.session_state.page_version = snapshot.version
+raw_data = snapshot.citizens
+fire_data = snapshot.fires
 # Sorting is already handled in apply_ranking_logic
 
 # -----------------------------------------------------------------------------
@@ -64,6 +112,7 @@ processed_data = apply_ranking_logic(raw_data)
 # render_sidebar now handles chat rendering and input
 
 # --- Helper Function for AI Processing ---
+@timed("app.process_message")
 def process_message(user_text):
     """
     Handles the logic for User Input -> Context Retrieval -> AI Response
@@ -81,16 +130,10 @@ def process_message(user_text):
         if not sel_row.empty:
             selected_citizen = sel_row.iloc[0].to_dict()
 
-    
-    #from processed_data remove urgency_score
-    processed_data_sanitized = processed_data.drop(columns=['urgency_score'], errors='ignore')
 
-    context_data = {
-        # "high_risk_count": len(processed_data[processed_data['urgency_score'] > 70]),
-        "selected_citizen": selected_citizen,
-        "raw_citizen_data": raw_data.to_dict(orient='records'),
-        "processed_data": processed_data_sanitized.to_dict(orient='records')
-    }
+    # Without urgency_score, notes as compact features
+    with span("app.ai_context"):
+        context_data = AIAssistant.build_context(selected_citizen, raw_data, processed_data)
 
     # 3. Get AI Response
     response_text = AIAssistant.get_response(user_text, context_data, st.session_state.messages)
@@ -122,83 +165,193 @@ if sidebar_prompt:
     st.rerun()
     
 # --- Main Area ---
-render_header()
-
-# Create layout: Map (Left/Large) | List (Right/Small)
-col_map, col_list = st.columns([7, 3])
-
-with col_map:
-    # Render Map and capture click events
-    map_data = render_map(
-        processed_data,
-        fire_df=fire_data,
-        center_coords=st.session_state.map_center,
-        zoom=st.session_state.zoom,
-        selected_id=st.session_state.selected_citizen_id
-    )
+render_header(processed_data, fire_df=fire_data, select_recipients=select_snapshot_recipients(snapshot))
 
-    # 1. Check if map_data exists AND if a specific object (marker) was clicked.
-    # If the user clicks "the void", 'last_object_clicked' is usually None.
-    if map_data and map_data.get('last_object_clicked'):
-        
-        # Extract coordinates from the OBJECT clicked, not the general map click
-        click_lat = map_data['last_object_clicked']['lat']
-        click_lon = map_data['last_object_clicked']['lng']
-
-        # Find closest citizen/object to clicked lat/lon
-        match = processed_data[
-            (processed_data['lat'] == click_lat) &
-            (processed_data['lon'] == click_lon)
-        ]
-        
-        if not match.empty:
-            clicked_id = match.iloc[0]['id']
-        
-        # CRITICAL STEP: Update the Session State
-        if st.session_state.selected_citizen_id != clicked_id:
-            st.session_state.selected_citizen_id = clicked_id
-            st.rerun()  # <--- Triggers the app to reload with the new ID
-
-        if not match.empty:
-            clicked_id = match.iloc[0]['id']
-            
-            # 2. State Guard: Only rerun if the selection effectively CHANGES
-            # This prevents reruns if the user clicks the same marker twice.
+@st.fragment(run_every=LIVE_VIEW_INTERVAL_S)
+@timed("app.live_status")
+def render_live_status():
+    """
+    Caption, degraded-mode banner and rank-change alerts, refreshed on a timer. The map
+    and list are only rebuilt when a new snapshot version is published: the page is
+    then rerun once, so a timer tick with nothing new never re-renders the map.
+    """
+    snapshot = get_data_plane().current()
+    if snapshot.version != st.session_state.page_version:
+        st.rerun()
+    render_snapshot_caption(snapshot, get_data_plane().rankings_fetched_at())
+    # Upstreams of the data plane (worker or in-process) and of this front-end (AI, speech, SMS)
+    health = {item['dependency']: item for item in get_data_plane().health() + health_report()}
+    render_degraded_banner(list(health.values()))
+    # Rank-change alerts: toasts for those raised since this session's last run (none on first load)
+    alerts = get_data_plane().alerts()
+    seen_version = st.session_state.setdefault("alerts_seen_version", snapshot.version)
+    render_rank_alerts(alerts, [alert for alert in alerts if alert['version'] > seen_version])
+    st.session_state.alerts_seen_version = max(seen_version, snapshot.version)
+
+@st.fragment
+@timed("app.live_view")
+def render_live_view():
+    """
+    Map and list of the latest snapshot. Map and list interactions rerun only this
+    fragment; selection changes still trigger a full rerun (the chat context uses them).
+    """
+    snapshot, processed_data = load_snapshot()
+    fire_data = snapshot.fires
+    st.session_state.page_version = snapshot.version
+
+    # Create layout: Map (Left/Large) | List (Right/Small)
+    col_map, col_list = st.columns([7, 3])
+
+    with col_map:
+        # Optional rescue route over the top-ranked present citizens
+        c1, c2, c3 = st.columns([1, 2, 1])
+        show_route = c1.toggle("Show rescue route", key="show_route")
+        route_stops = c2.slider("Route stops", 5, 200, ROUTE_MAX_STOPS, step=5, key="route_stops", disabled=not show_route)
+        route = get_data_plane().route(snapshot.version, max_stops=route_stops) if show_route else None
+
+        # Optional fire perimeter projected FIRE_PROJECTION_MIN minutes ahead
+        show_projection = c3.toggle(f"Fire in {FIRE_PROJECTION_MIN:.0f} min", key="show_fire_projection")
+        projected_fires = get_data_plane().project_fires(snapshot.version, minutes=FIRE_PROJECTION_MIN) \
+            if show_projection else None
+
+        # The fire level of detail follows the zoom the user is looking at: once a new view
+        # from the map is on another LOD level, the map is rebuilt at that zoom and center
+        # (a view already seen is skipped, so it never undoes a zoom set by a list selection)
+        view = st.session_state.get("live_map")
+        if view != st.session_state.get("live_map_seen"):
+            st.session_state.live_map_seen = view
+            view_change = lod_view_change(view, st.session_state.zoom)
+            if view_change is not None:
+                st.session_state.zoom = view_change[0]
+                if view_change[1] is not None:
+                    st.session_state.map_center = view_change[1]
+
+        # Render Map and capture click events
+        map_data = render_map(
+            processed_data,
+            fire_df=fire_data,
+            center_coords=st.session_state.map_center,
+            zoom=st.session_state.zoom,
+            selected_id=st.session_state.selected_citizen_id,
+            route=route,
+            projected_fire_df=projected_fires,
+            key="live_map"
+        )
+
+        # With a sharded dataset, the regions in view are loaded on the next refresh
+        if map_data:
+            get_data_plane().set_viewport(st.session_state.viewer_id, bbox_from_map_bounds(map_data.get('bounds')))
+
+        # 1. Check if map_data exists AND if a specific object (marker) was clicked.
+        # If the user clicks "the void", 'last_object_clicked' is usually None.
+        if map_data and map_data.get('last_object_clicked'):
+
+            # Extract coordinates from the OBJECT clicked, not the general map click
+            click_lat = map_data['last_object_clicked']['lat']
+            click_lon = map_data['last_object_clicked']['lng']
+
+            # Find closest citizen/object to clicked lat/lon
+            match = processed_data[
+                (processed_data['lat'] == click_lat) &
+                (processed_data['lon'] == click_lon)
+            ]
+
+            if not match.empty:
+                clicked_id = match.iloc[0]['id']
+
+            # CRITICAL STEP: Update the Session State
             if st.session_state.selected_citizen_id != clicked_id:
                 st.session_state.selected_citizen_id = clicked_id
-                
-                st.session_state.list_widget_key += 1
-                st.rerun()
+                st.rerun()  # <--- Triggers the app to reload with the new ID
 
+            if not match.empty:
+                clicked_id = match.iloc[0]['id']
 
+                # 2. State Guard: Only rerun if the selection effectively CHANGES
+                # This prevents reruns if the user clicks the same marker twice.
+                if st.session_state.selected_citizen_id != clicked_id:
+                    st.session_state.selected_citizen_id = clicked_id
 
-with col_list:
-    # Generate a unique key string based on the counter
-    # Example: "citizen_list_0", "citizen_list_1", etc.
-    dynamic_key = f"citizen_list_{st.session_state.list_widget_key}"
+                    st.session_state.list_widget_key += 1
+                    st.rerun()
 
-    # Render List using the dynamic key
-    selection = render_citizen_list(
-        processed_data, 
-        st.session_state.selected_citizen_id,
-        widget_key=dynamic_key
-    )
 
-    # Handle List Selection (List -> Map)
-    if selection and selection["selection"]["rows"]:
-        selected_index = selection["selection"]["rows"][0]
-        selected_row = processed_data.iloc[selected_index]
-
-        # Update map center and selected ID
-        new_center = [selected_row['lat'], selected_row['lon']]
-        new_id = selected_row['id']
-
-        if (st.session_state.map_center != new_center) or (st.session_state.selected_citizen_id != new_id):
-            st.session_state.map_center = new_center
-            st.session_state.selected_citizen_id = new_id
-            st.session_state.zoom = 18 
-            
-            # NOTE: We do NOT increment list_widget_key here. 
-            # If we did, the box the user just clicked would instantly uncheck.
-            
-            st.rerun()
\ No newline at end of file
+
+    with col_list:
+        # Generate a unique key string based on the counter
+        # Example: "citizen_list_0", "citizen_list_1", etc.
+        dynamic_key = f"citizen_list_{st.session_state.list_widget_key}"
+
+        # Server-side filtering: resolved on precomputed bitmaps / text indexes
+        list_filters = render_citizen_filters()
+        list_positions = get_data_plane().query(snapshot.version, **list_filters)
+
+        # Render List using the dynamic key
+        selected_row = render_citizen_list(
+            processed_data, 
+            st.session_state.selected_citizen_id,
+            widget_key=dynamic_key,
+            positions=list_positions
+        )
+
+        # Handle List Selection (List -> Map)
+        if selected_row is not None:
+            # Update map center and selected ID
+            new_center = [selected_row['lat'], selected_row['lon']]
+            new_id = selected_row['id']
+
+            if (st.session_state.map_center != new_center) or (st.session_state.selected_citizen_id != new_id):
+                st.session_state.map_center = new_center
+                st.session_state.selected_citizen_id = new_id
+                st.session_state.zoom = 18 
+
+                # NOTE: We do NOT increment list_widget_key here. 
+                # If we did, the box the user just clicked would instantly uncheck.
+
+                st.rerun()
+
+    # Team dispatch: incremental reassignment whenever a new snapshot arrives
+    with st.expander("🚒 Team dispatch"):
+        n_teams = st.number_input("Rescue teams", min_value=1, max_value=50, value=3, key="dispatch_teams")
+        planner, assigned = get_dispatch(int(n_teams), snapshot.version, processed_data)
+        render_dispatch_panel(planner, assigned)
+
+
+render_live_status()
+render_live_view()
+
+@st.fragment
+@timed("app.replay_view")
+def render_replay():
+    """
+    Incident replay: the map and list as they were at any recorded version, rebuilt
+    from the local history (no cloud storage download). Playing advances one version per step.
+    """
+    moments = get_data_plane().replay_moments()
+    if not moments:
+        st.info("No history recorded yet.")
+        return
+    position, playing = render_replay_controls(moments)
+    render_replay_view(get_data_plane().replay(moments[position][1]), center_coords=st.session_state.map_center)
+    if playing and position < len(moments) - 1:
+        time.sleep(REPLAY_STEP_S)
+        st.session_state.replay_next = position + 1
+        st.rerun(scope="fragment")
+
+if st.toggle("⏪ Incident replay", key="replay_mode"):
+    render_replay()
+
+@st.cache_resource
+def start_prewarm():
+    # After first paint: the SDKs behind chat, voice and blob refresh load in the background
+    return prewarm(hooks=(prewarm_openai_client,))
+
+start_prewarm()
+
+# Hidden ops panel (instrumentation), opened with ?ops=1
+if st.query_params.get("ops") == "1":
+    render_ops_panel(metrics)
+
+if metrics.enabled:
+    metrics.record("app.imports", imports_s)
+    metrics.record("app.rerun", time.perf_counter() - rerun_started)
@@ -0,0 +1,207 @@
+"""
+Benchmarks of the hot paths of the dashboard, over synthetic datasets (src.synthetic).
+
+Each benchmark is a setup(size) -> state function plus a timed run(state). run() may
+return a number of bytes (e.g. the size of a serialized payload), which is tracked
+like a timing. External services (blob storage, ranking API, Streamlit frontend) are
+mocked, so only local work is measured.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from src.ai import AIAssistant
+from src.data import DataManager
+from src.config import RANKING_MODEL_PATH
+from src.logic import apply_ranking_logic, rank_order
+from src.ranking_model import load_ranking_model
+from src.replay import SnapshotHistory
+from src.synthetic import generate_dataset, citizens_to_json, fires_to_json
+from src.ui import render_citizen_list, render_map
+
+
+class Benchmark:
+    def __init__(self, name, setup, run, max_size=None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        # Larger datasets are skipped (per-row work that would take minutes)
+        self.max_size = max_size
+
+
+@lru_cache(maxsize=1)
+def dataset(size):
+    """
+    (citizens, fires, raw citizen JSON, raw fire JSON) of a seeded synthetic dataset.
+    Fire perimeters get more vertices with the size, up to 50k per fire.
+    """
+    citizens, fires = generate_dataset(size, seed=0, fire_vertices=min(max(200, size // 20), 50_000))
+    with tempfile.TemporaryDirectory(prefix="aigis-bench-") as directory:
+        citizens_path = os.path.join(directory, "citizens.json")
+        fires_path = os.path.join(directory, "fires.json")
+        citizens_to_json(citizens, citizens_path)
+        fires_to_json(fires, fires_path)
+        with open(citizens_path, encoding='utf-8') as f:
+            raw_citizens = json.load(f)
+        with open(fires_path, encoding='utf-8') as f:
+            raw_fires = json.load(f)
+    return citizens, fires, raw_citizens, raw_fires
+
+
+def ranked(size):
+    citizens, fires, _, _ = dataset(size)
+    with patch('src.logic.fetch_rankings_from_api', return_value=None):
+        return apply_ranking_logic(citizens.copy()), fires
+
+
+def api_rankings(citizens):
+    """Ranking API response for every citizen (same shape as the Azure Function's)."""
+    score = (citizens['danger_level'] * 0.6 + citizens['vulnerability_score'] * 4).round(1)
+    category = pd.cut(score, [-1, 50, 75, 1000], labels=['Low', 'High', 'CRITICAL']).astype(str)
+    return pd.DataFrame({'id': citizens['id'], 'risk_category': category, 'ai_score': score}).to_dict('records')
+
+
+# --- Loaders -----------------------------------------------------------------
+
+def setup_citizen_loader(size):
+    return dataset(size)[2]
+
+
+def run_citizen_loader(raw):
+    with patch('src.data.fetch_json_from_blob', return_value=raw):
+        DataManager.load_citizen_data_from_blob()
+
+
+def setup_fire_loader(size):
+    return dataset(size)[3]
+
+
+def run_fire_loader(raw):
+    with patch('src.data.fetch_json_from_blob', return_value=raw):
+        DataManager.load_fire_data_from_blob()
+
+
+# --- Ranking -----------------------------------------------------------------
+
+def setup_ranking_api(size):
+    citizens = dataset(size)[0]
+    return citizens, api_rankings(citizens)
+
+
+def run_ranking_api(state):
+    citizens, rankings = state
+    with patch('src.logic.fetch_rankings_from_api', return_value=rankings):
+        apply_ranking_logic(citizens.copy(), mode='api')
+
+
+def setup_ranking_fallback(size):
+    return dataset(size)[0]
+
+
+def run_ranking_fallback(citizens):
+    with patch('src.logic.fetch_rankings_from_api', return_value=None):
+        apply_ranking_logic(citizens.copy(), mode='api')
+
+
+def run_ranking_model(citizens):
+    apply_ranking_logic(citizens.copy(), mode='model')
+
+
+def setup_model_score(size):
+    # The synthetic citizens carry the note features, as a refreshed snapshot does
+    return load_ranking_model(RANKING_MODEL_PATH), dataset(size)[0]
+
+
+def run_model_score(state):
+    # Batch scoring throughput of the bundled model (target: 1M rows/s)
+    model, citizens = state
+    model.score(citizens)
+
+
+# --- UI ------------------------------------------------------------------------
+
+def run_render_map(state):
+    processed, fires = state
+    html = {}
+    # st_folium is replaced by the HTML serialization it would send to the browser
+    with patch('src.ui.st_folium', lambda m, **kwargs: html.setdefault('size', len(m.get_root().render()))):
+        render_map(processed, fires, zoom=12)
+    return html['size']
+
+
+def run_citizen_list(state):
+    processed, _ = state
+    render_citizen_list(processed, selected_id=int(processed['id'].iloc[0]))
+
+
+# --- AI context ----------------------------------------------------------------
+
+def setup_ai_context(size):
+    citizens = dataset(size)[0]
+    return citizens, ranked(size)[0]
+
+
+def run_ai_context(state):
+    """Context serialization of app.process_message; returns the system prompt context size in bytes."""
+    raw_data, processed_data = state
+    context_data = AIAssistant.build_context(processed_data.iloc[0].to_dict(), raw_data, processed_data)
+    return len(f"{AIAssistant._format_context(context_data)}".encode('utf-8'))
+
+
+# --- Incident replay -------------------------------------------------------------
+
+def setup_replay(size):
+    """In-memory history of one keyframe and 19 deltas, each rescoring 1% of the citizens."""
+    processed, fires = ranked(size)
+    rng = np.random.default_rng(0)
+    history = SnapshotHistory(None, keyframe_interval=20)
+    score = processed.columns.get_loc('urgency_score')
+    for version in range(1, 21):
+        history.record(SimpleNamespace(version=version, ranked=processed, fires=fires), recorded_at=float(version))
+        processed = processed.copy()
+        changed = rng.choice(len(processed), max(1, len(processed) // 100), replace=False)
+        processed.iloc[changed, score] = rng.random(len(changed)) * 100
+        processed = rank_order(processed)
+    return history
+
+
+def run_replay(history):
+    """Random access to the last version of the group (keyframe + 19 deltas), uncached."""
+    history._rebuilt.clear()
+    history.at(20.0)
+
+
+# --- Cold start ----------------------------------------------------------------
+
+# Modules app.py imports before the first paint (and the worker process before serving)
+STARTUP_MODULES = ("src.ui", "src.ai", "src.data_plane", "src.worker", "src.dispatch")
+
+
+def setup_cold_import(size):
+    return [sys.executable, "-c", f"import {', '.join(STARTUP_MODULES)}"]
+
+
+def run_cold_import(command):
+    """Fresh interpreter importing the startup modules (interpreter start included)."""
+    subprocess.run(command, check=True, capture_output=True, cwd=os.path.dirname(os.path.dirname(__file__)) or ".")
+
+
+BENCHMARKS = [
+    Benchmark("cold_import", setup_cold_import, run_cold_import, max_size=250),
+    Benchmark("load_citizens", setup_citizen_loader, run_citizen_loader),
+    Benchmark("load_fires", setup_fire_loader, run_fire_loader),
+    Benchmark("ranking_api", setup_ranking_api, run_ranking_api),
+    Benchmark("ranking_fallback", setup_ranking_fallback, run_ranking_fallback),
+    Benchmark("ranking_model", setup_ranking_fallback, run_ranking_model),
+    Benchmark("model_score", setup_model_score, run_model_score),
+    Benchmark("render_map", ranked, run_render_map, max_size=10_000),
+    Benchmark("citizen_list", ranked, run_citizen_list),
+    Benchmark("ai_context", setup_ai_context, run_ai_context, max_size=100_000),
+    Benchmark("replay_at", setup_replay, run_replay),
+]
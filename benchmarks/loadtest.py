@@ -0,0 +1,310 @@
+"""
+Headless load test: N concurrent operator sessions driving app.py through Streamlit's AppTest.
+
+    python -m benchmarks.loadtest --sessions 1,4,8 --actions 30
+    python -m benchmarks.loadtest --sessions 4 --trace my_trace.json --json report.json
+
+Every session replays an interaction trace (page open, map clicks, list selections,
+list filters, route toggles, chat messages, timer refreshes) against stand-ins for
+blob storage, the ranking API, Azure OpenAI, Azure Speech and Infobip with
+configurable latencies. All sessions share one process, like the sessions of one
+Streamlit server, so process-wide caches (data plane, snapshot store) are shared too.
+
+Reported per concurrency level: throughput (actions/s), latency percentiles per
+action, and resident memory added per session, with the highest level whose p95
+stays within --slo-ms as the suggested capacity.
+
+A trace file is a JSON list of actions, e.g.
+    [{"action": "open"}, {"action": "map_click"}, {"action": "chat", "text": "Ποιος κινδυνεύει;"}]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+import numpy as np
+
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Default mix of interactions (action -> weight) after the initial page open
+ACTION_WEIGHTS = {
+    "map_click": 0.30,
+    "list_select": 0.25,
+    "filter": 0.15,
+    "refresh": 0.15,
+    "route": 0.05,
+    "chat": 0.10,
+}
+CHAT_MESSAGES = ["Ποιος έχει τον μεγαλύτερο κίνδυνο;", "Τι πρέπει να κάνω για τον επιλεγμένο πολίτη;",
+                 "Σύνοψη της κατάστασης", "Who needs life support near the fire?"]
+FILTER_TEXTS = ["", "Μαρ", "σοβαρ", "κατάκοιτ", "Γιώργος", ""]
+
+
+def configure_stand_ins(tmp_dir):
+    """Environment of the stand-in services; must run before src.config is imported."""
+    os.environ.update({
+        "AZURE_OPENAI_API_KEY": "loadtest", "AZURE_OPENAI_ENDPOINT": "https://openai.invalid",
+        "RANKING_API_URL": "https://ranking.invalid", "STORAGE_CONN_STRING": "loadtest",
+        "INFOBIP_API_KEY": "loadtest", "INFOBIP_BASE_URL": "infobip.invalid",
+        "SMS_QUEUE_DB": os.path.join(tmp_dir, "sms_queue.db"), "REPLICA_DIR": os.path.join(tmp_dir, "replica"),
+        "EVENT_LOG_DIR": os.path.join(tmp_dir, "event_log"),
+        "HISTORY_DIR": os.path.join(tmp_dir, "history"),
+    })
+    os.environ.pop("WORKER_ADDRESS", None)
+    os.environ.setdefault("DEFAULT_LAT", "38.04")
+    os.environ.setdefault("DEFAULT_LON", "23.99")
+
+
+def make_trace(n_actions, seed=0):
+    """Random interaction trace: an 'open' followed by n_actions weighted actions."""
+    rng = np.random.default_rng(seed)
+    names = list(ACTION_WEIGHTS)
+    weights = np.array(list(ACTION_WEIGHTS.values()))
+    picks = rng.choice(len(names), n_actions, p=weights / weights.sum())
+    trace = [{"action": "open"}]
+    for i in picks:
+        step = {"action": names[i]}
+        if names[i] == "chat":
+            step["text"] = CHAT_MESSAGES[rng.integers(len(CHAT_MESSAGES))]
+        elif names[i] == "filter":
+            step["text"] = FILTER_TEXTS[rng.integers(len(FILTER_TEXTS))]
+        trace.append(step)
+    return trace
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux /proc; 0 where unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+# --- Stand-ins for the external services ------------------------------------
+
+class FakeCompletions:
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+
+    def create(self, model, messages, **kwargs):
+        time.sleep(self.latency_s)
+        content = f"Δράση: επισκεφθείτε πρώτα τους CRITICAL πολίτες ({len(messages[0]['content'])} chars of context)."
+        message = type("Message", (), {"content": content})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})]})
+
+
+class FakeAzureOpenAI:
+    latency_s = 1.0
+
+    def __init__(self, **kwargs):
+        self.chat = type("Chat", (), {"completions": FakeCompletions(self.latency_s)})
+
+
+def mocked_services(citizens_json, fires_json, rankings, args):
+    """Patches of every external service, as an ExitStack to enter."""
+    def download(blob_name, container_name="configdata"):
+        time.sleep(args.blob_ms / 1000)
+        return fires_json if "fire" in blob_name else citizens_json
+
+    def fetch_rankings(self):
+        time.sleep(args.ranking_ms / 1000)
+        return rankings
+
+    def text_to_speech(text):
+        time.sleep(args.tts_ms / 1000)
+        # ~4 s of 16 kHz 16-bit mono audio, kept in the session like a real answer
+        return b"\0" * 128_000
+
+    def infobip_post(*a, **kw):
+        time.sleep(0.05)
+        return type("Response", (), {"status_code": 200, "text": "{}", "json": lambda self: {}})()
+
+    FakeAzureOpenAI.latency_s = args.llm_ms / 1000
+    stack = ExitStack()
+    stack.enter_context(patch("src.blod_util.download_json_from_blob", download))
+    stack.enter_context(patch("src.refresh.download_json_from_blob", download))
+    stack.enter_context(patch("src.rankings.RankingCache._fetch_from_api", fetch_rankings))
+    stack.enter_context(patch("src.ai.AzureOpenAI", FakeAzureOpenAI))
+    stack.enter_context(patch("src.speech.text_to_speech", text_to_speech))
+    stack.enter_context(patch("src.sms.requests.post", infobip_post))
+    return stack
+
+
+# --- Sessions ------------------------------------------------------------------
+
+class Session:
+    """One simulated operator: an AppTest instance replaying a trace."""
+
+    def __init__(self, trace, seed, timeout_s):
+        self.trace = trace
+        self.rng = np.random.default_rng(seed)
+        self.timeout_s = timeout_s
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout_s)
+        self.latencies = []  # (action, seconds)
+        self.errors = []
+
+    def _run(self, action, step):
+        at = self.at
+        state = at.session_state
+        if action == "open":
+            return at.run()
+        if action in ("map_click", "list_select"):
+            # st_folium clicks and dataframe selections end in these session-state updates
+            citizen_id = int(self.rng.integers(1, self.n_citizens + 1))
+            state["selected_citizen_id"] = citizen_id
+            if action == "map_click":
+                state["list_widget_key"] = state["list_widget_key"] + 1
+            else:
+                state["zoom"] = 18
+            return at.run()
+        if action == "filter":
+            return at.text_input(key="citizen_filter_text").set_value(step.get("text", "")).run()
+        if action == "route":
+            toggle = at.toggle(key="show_route")
+            return toggle.set_value(not toggle.value).run()
+        if action == "chat":
+            return at.chat_input[0].set_value(step.get("text", CHAT_MESSAGES[0])).run()
+        # "refresh": the live view timer rerunning the page
+        return at.run()
+
+    def replay(self, n_citizens, think_s=0.0):
+        self.n_citizens = n_citizens
+        for step in self.trace:
+            action = step["action"]
+            start = time.perf_counter()
+            try:
+                self._run(action, step)
+                if self.at.exception:
+                    self.errors.append(f"{action}: {self.at.exception[0].value}")
+            except Exception as e:
+                self.errors.append(f"{action}: {type(e).__name__}: {e}")
+            self.latencies.append((action, time.perf_counter() - start))
+            if think_s:
+                time.sleep(think_s)
+
+
+def summarize(latencies, wall_s):
+    """Throughput and per-action latency percentiles (ms) of (action, seconds) samples."""
+    by_action = {}
+    for action, seconds in latencies:
+        by_action.setdefault(action, []).append(seconds)
+    by_action["all"] = [seconds for _, seconds in latencies]
+    stats = {}
+    for action, values in by_action.items():
+        values = np.array(values) * 1000
+        stats[action] = {
+            "count": len(values),
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "p99_ms": float(np.percentile(values, 99)),
+            "max_ms": float(values.max()),
+        }
+    return {"throughput_per_s": len(latencies) / wall_s if wall_s else 0.0, "latency": stats}
+
+
+def run_level(n_sessions, args, traces):
+    gc.collect()
+    rss_before = rss_bytes()
+    sessions = [Session(traces[i % len(traces)], seed=args.seed + i, timeout_s=args.timeout_s)
+                for i in range(n_sessions)]
+    threads = [threading.Thread(target=s.replay, args=(args.citizens, args.think_ms / 1000)) for s in sessions]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_s = time.perf_counter() - start
+
+    gc.collect()
+    # Sessions are still referenced here, so their state counts in the RSS
+    rss_after = rss_bytes()
+    report = summarize([sample for s in sessions for sample in s.latencies], wall_s)
+    report.update({
+        "sessions": n_sessions,
+        "wall_s": wall_s,
+        "rss_mb": rss_after / 1e6,
+        "memory_per_session_mb": max(rss_after - rss_before, 0) / 1e6 / n_sessions,
+        "errors": [e for s in sessions for e in s.errors][:20],
+    })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the dashboard")
+    parser.add_argument("--sessions", default="1,2,4", help="Comma-separated concurrency levels")
+    parser.add_argument("--actions", type=int, default=20, help="Actions per session (generated traces)")
+    parser.add_argument("--trace", help="JSON trace file replayed by every session instead of generated traces")
+    parser.add_argument("--citizens", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a session's actions")
+    parser.add_argument("--llm-ms", type=float, default=1500.0)
+    parser.add_argument("--tts-ms", type=float, default=800.0)
+    parser.add_argument("--ranking-ms", type=float, default=300.0)
+    parser.add_argument("--blob-ms", type=float, default=200.0)
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 latency target for the capacity hint")
+    parser.add_argument("--timeout-s", type=float, default=120.0, help="AppTest timeout per action")
+    parser.add_argument("--json", help="Write the full report to this file")
+    args = parser.parse_args(argv)
+
+    set_log_level("error")
+    # Removed on exit, with the queue, replicas and history the stand-ins wrote there
+    with tempfile.TemporaryDirectory(prefix="aigis-loadtest-", ignore_cleanup_errors=True) as tmp_dir:
+        configure_stand_ins(tmp_dir)
+        from benchmarks.bench_core import api_rankings
+        from src.synthetic import generate_dataset, citizens_to_json, fires_to_json
+
+        citizens, fires = generate_dataset(args.citizens, seed=args.seed)
+        citizens_to_json(citizens, os.path.join(tmp_dir, "citizens.json"))
+        fires_to_json(fires, os.path.join(tmp_dir, "fires.json"))
+        with open(os.path.join(tmp_dir, "citizens.json"), encoding='utf-8') as f:
+            citizens_json = json.load(f)
+        with open(os.path.join(tmp_dir, "fires.json"), encoding='utf-8') as f:
+            fires_json = json.load(f)
+
+        if args.trace:
+            with open(args.trace, encoding='utf-8') as f:
+                traces = [json.load(f)]
+        else:
+            traces = [make_trace(args.actions, seed=args.seed + i) for i in range(64)]
+
+        levels = [int(n) for n in args.sessions.split(",") if n]
+        reports = []
+        with mocked_services(citizens_json, fires_json, api_rankings(citizens), args):
+            # Warm-up: the first session pays the data plane start and the first ranking
+            Session([{"action": "open"}], seed=args.seed, timeout_s=args.timeout_s).replay(args.citizens)
+            for n in levels:
+                report = run_level(n, args, traces)
+                reports.append(report)
+                overall = report["latency"]["all"]
+                print(f"{n:>3} sessions: {report['throughput_per_s']:6.2f} actions/s  "
+                      f"p50 {overall['p50_ms']:7.0f} ms  p95 {overall['p95_ms']:7.0f} ms  "
+                      f"p99 {overall['p99_ms']:7.0f} ms  "
+                      f"+{report['memory_per_session_mb']:.1f} MB/session  errors {len(report['errors'])}", flush=True)
+                for action, stats in sorted(report["latency"].items()):
+                    if action != "all":
+                        print(f"      {action:<12} n={stats['count']:<4} p50 {stats['p50_ms']:7.0f} ms  "
+                              f"p95 {stats['p95_ms']:7.0f} ms")
+                for error in report["errors"][:3]:
+                    print(f"      error: {error}")
+
+    within_slo = [r["sessions"] for r in reports if r["latency"]["all"]["p95_ms"] <= args.slo_ms]
+    capacity = max(within_slo) if within_slo else 0
+    print(f"Capacity hint: {capacity} concurrent sessions with p95 <= {args.slo_ms:.0f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "levels": reports, "capacity_sessions": capacity}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Benchmark runner with a stored baseline.
+
+    python -m benchmarks.run                         # compare with benchmarks/baseline.json
+    python -m benchmarks.run --sizes 250,10000       # subset of the dataset sizes
+    python -m benchmarks.run --only ranking          # benchmarks whose name contains 'ranking'
+    python -m benchmarks.run --save-baseline         # store the results as the new baseline
+
+A result regresses when its median time exceeds the baseline by more than
+--time-tolerance (default 50%, to absorb machine noise), or when a tracked payload
+size grows by more than --bytes-tolerance (default 10%). Regressions exit with status 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from streamlit.logger import set_log_level
+from benchmarks.bench_core import BENCHMARKS
+
+SIZES = [250, 10_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def time_benchmark(benchmark, state, min_repeats=3, max_repeats=10, budget_s=2.0):
+    """Runs a benchmark until min_repeats and budget_s are both reached (at most max_repeats)."""
+    timings = []
+    size_bytes = None
+    started = time.perf_counter()
+    while len(timings) < max_repeats:
+        # Progress prints of the code under test ("Using local fallback logic.") are dropped
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            result = benchmark.run(state)
+            timings.append(time.perf_counter() - t0)
+        if isinstance(result, int):
+            size_bytes = result
+        if len(timings) >= min_repeats and time.perf_counter() - started >= budget_s:
+            break
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "repeats": len(timings),
+        "bytes": size_bytes,
+    }
+
+
+def compare(key, result, baseline, time_tolerance, bytes_tolerance):
+    """Returns (status, note): 'ok', 'new' or 'REGRESSION'."""
+    base = baseline.get(key)
+    if base is None:
+        return "new", ""
+    notes = []
+    ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+    status = "ok"
+    if ratio > 1.0 + time_tolerance:
+        status = "REGRESSION"
+    notes.append(f"x{ratio:.2f} time")
+    if result["bytes"] is not None and base.get("bytes"):
+        bytes_ratio = result["bytes"] / base["bytes"]
+        if bytes_ratio > 1.0 + bytes_tolerance:
+            status = "REGRESSION"
+        notes.append(f"x{bytes_ratio:.2f} bytes")
+    return status, ", ".join(notes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AIgis benchmark suite")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in SIZES), help="Comma-separated citizen counts")
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument("--bytes-tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    # Streamlit warns about the missing script context on every call in bare mode
+    set_log_level("error")
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    benchmarks = [b for b in BENCHMARKS if not args.only or args.only in b.name]
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get("results", {})
+
+    results = {}
+    regressions = []
+    for size in sizes:
+        for benchmark in benchmarks:
+            if benchmark.max_size is not None and size > benchmark.max_size:
+                continue
+            key = f"{benchmark.name}[{size}]"
+            with contextlib.redirect_stdout(io.StringIO()):
+                state = benchmark.setup(size)
+            result = time_benchmark(benchmark, state)
+            results[key] = result
+            status, note = compare(key, result, baseline, args.time_tolerance, args.bytes_tolerance)
+            if status == "REGRESSION":
+                regressions.append(key)
+            size_note = f"  {result['bytes'] / 1e6:.1f} MB" if result["bytes"] is not None else ""
+            print(f"{key:<32} {result['median_s'] * 1000:>10.1f} ms{size_note:<12}  {status} {note}", flush=True)
+
+    if args.save_baseline:
+        # Keep the entries of benchmarks / sizes that were not run this time
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "results": dict(sorted(merged.items()))}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
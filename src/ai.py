@@ -1,13 +1,85 @@
 import os
-from openai import AzureOpenAI
+import threading
 from src.config import (
     AZURE_OPENAI_API_KEY,
     AZURE_OPENAI_ENDPOINT,
     AZURE_OPENAI_API_VERSION,
-    AZURE_OPENAI_DEPLOYMENT_NAME
+    AZURE_OPENAI_DEPLOYMENT_NAME,
+    AI_TIMEOUT_S
 )
+from src.metrics import count, metrics, observe, span
+from src.resilience import get_breaker
+from src.lazy import lazy_attribute
+from src.notes import NOTE_FEATURE_COLUMNS, with_note_summary
+
+# openai takes ~0.5 s to import: deferred to the first question (or the background prewarm)
+AzureOpenAI = lazy_attribute("openai", "AzureOpenAI")
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    Process-wide AzureOpenAI client, so questions reuse its warm HTTPS connection pool.
+    Rebuilt when the configuration (or a patched AzureOpenAI in tests) changes.
+    """
+    global _client, _client_key
+    key = (AzureOpenAI, AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION)
+    with _client_lock:
+        if _client is None or _client_key != key:
+            _client = AzureOpenAI(
+                api_key=AZURE_OPENAI_API_KEY,
+                api_version=AZURE_OPENAI_API_VERSION,
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                timeout=AI_TIMEOUT_S,
+                max_retries=0
+            )
+            _client_key = key
+        return _client
+
+
+def prewarm_openai_client():
+    """Builds the shared client ahead of the first question (prewarm hook; no-op without config)."""
+    if all([AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT_NAME]):
+        get_openai_client()
 
 class AIAssistant:
+    @staticmethod
+    def offline_response(context_data: dict, reason: str, top_n: int = 3) -> str:
+        """
+        Canned answer used while the AI service is unreachable: the top present
+        CRITICAL/HIGH citizens from the local ranking, so the rescuer still gets next steps.
+        """
+        citizens = [
+            c for c in (context_data or {}).get('processed_data', [])
+            if c.get('present', 1) and str(c.get('risk_category', '')).upper() in ('CRITICAL', 'HIGH')
+        ]
+        lines = [f"⚠️ System Alert: AI module unavailable ({reason}). Offline mode, local ranking:"]
+        for i, citizen in enumerate(citizens[:top_n], 1):
+            lines.append(f"{i}. ID {citizen.get('id')} {citizen.get('fullname', '')} "
+                         f"[{citizen.get('risk_category')}] - {citizen.get('note_summary', citizen.get('notes', ''))}")
+        if not citizens:
+            lines.append("No present CRITICAL/HIGH citizens in the current data.")
+        lines.append("Δράση: Ακολουθήστε τη σειρά προτεραιότητας της λίστας.")
+        return "\n".join(lines)
+
+    @staticmethod
+    def build_context(selected_citizen, raw_data, processed_data) -> dict:
+        """
+        Context of a question: the selected citizen with its free-text note, the raw
+        citizen records without notes, and the ranked citizens, whose notes are replaced
+        by the compact note summary of src.notes. Only the selected note is sent as text.
+        """
+        processed = processed_data.drop(columns=['urgency_score'], errors='ignore')
+        raw = raw_data.drop(columns=['notes', *NOTE_FEATURE_COLUMNS], errors='ignore')
+        return {
+            "selected_citizen": selected_citizen,
+            "raw_citizen_data": raw.to_dict(orient='records'),
+            "processed_data": with_note_summary(processed).to_dict(orient='records'),
+        }
+
     @staticmethod
     def _format_context(context_data: dict) -> str:
         """Helper to format the context dictionary into a readable string for the LLM."""
@@ -55,14 +127,15 @@ class AIAssistant:
         if not all([AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT_NAME]):
             return "⚠️ System Alert: Azure OpenAI configuration is missing. Please check your environment variables."
 
-        # 2. Initialize Client
+        # 2. Initialize Client (fast timeout; while the service is down, answer offline at once)
+        breaker = get_breaker("openai")
+        if not breaker.allow():
+            count("ai.offline")
+            return AIAssistant.offline_response(context_data, "circuit open")
         try:
-            client = AzureOpenAI(
-                api_key=AZURE_OPENAI_API_KEY,
-                api_version=AZURE_OPENAI_API_VERSION,
-                azure_endpoint=AZURE_OPENAI_ENDPOINT
-            )
+            client = get_openai_client()
         except Exception as e:
+            breaker.record_failure(e)
             return f"⚠️ System Alert: Failed to initialize AI client. Error: {str(e)}"
 
         # 3. Build System Prompt with Context
@@ -143,6 +216,9 @@ INSTRUCTIONS ON MISSING DATA:
         #     {"role": "user", "content": prompt}
         # ]
         
+        if metrics.enabled:
+            observe("ai.prompt_bytes", len(system_message.encode('utf-8')))
+
         messages = [{"role": "system", "content": system_message},]
         
         if chat_history:
@@ -153,12 +229,16 @@ INSTRUCTIONS ON MISSING DATA:
 
         # 4. Call API
         try:
-            response = client.chat.completions.create(
-                model=AZURE_OPENAI_DEPLOYMENT_NAME,
-                messages=messages,
-                temperature=0.3, # Low temperature for more factual/consistent responses
-                max_tokens=300
-            )
+            with span("ai.llm_call"):
+                response = client.chat.completions.create(
+                    model=AZURE_OPENAI_DEPLOYMENT_NAME,
+                    messages=messages,
+                    temperature=0.3, # Low temperature for more factual/consistent responses
+                    max_tokens=300
+                )
+            breaker.record_success()
             return response.choices[0].message.content
         except Exception as e:
-            return f"⚠️ System Alert: Communication with AI module failed. Error: {str(e)}"
+            breaker.record_failure(e)
+            count("ai.offline")
+            return AIAssistant.offline_response(context_data, f"communication failed: {e}")
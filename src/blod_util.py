@@ -1,10 +1,58 @@
 # utils_azure.py
 import streamlit as st
-from azure.storage.blob import BlobServiceClient
 import json
-from src.config import STORAGE_CONN_STRING
+import functools
+from src.config import STORAGE_CONN_STRING, BLOB_TIMEOUT_S
+from src.metrics import observe, span
+from src.resilience import resilient_call
+from src.lazy import lazy_attribute
 import os
 
+BlobServiceClient = lazy_attribute("azure.storage.blob", "BlobServiceClient")
+
+
+@functools.lru_cache(maxsize=4)
+def get_blob_service_client(conn_str):
+    # Shared per connection string, so refreshes reuse the SDK's connection pool
+    # (fast timeouts, no SDK retries: the circuit breaker decides when to retry)
+    return BlobServiceClient.from_connection_string(
+        conn_str,
+        connection_timeout=BLOB_TIMEOUT_S,
+        read_timeout=BLOB_TIMEOUT_S,
+        retry_total=0
+    )
+
+
+def _download_json(blob_name, container_name):
+    conn_str = STORAGE_CONN_STRING
+
+    if not conn_str:
+        raise RuntimeError("Connection string not found! Check secrets/env variables.")
+
+    blob_service_client = get_blob_service_client(conn_str)
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+
+    # Download and Parse
+    # print(f"DEBUG: Downloading {blob_name}...") # Uncomment for debugging
+    with span("blob.download"):
+        payload = blob_client.download_blob().readall()
+    observe("blob.bytes", len(payload))
+    with span("blob.parse"):
+        return json.loads(payload)
+
+
+def download_json_from_blob(blob_name, container_name="configdata"):
+    """
+    Downloads and parses a JSON blob without any Streamlit caching or UI output.
+    If blob storage is unreachable, the last good copy from the local replica is returned.
+    Raises when there is neither, so background jobs (e.g. the refresh service) can handle errors themselves.
+    """
+    return resilient_call(
+        "blob",
+        lambda: _download_json(blob_name, container_name),
+        replica_key=f"blob-{container_name}-{blob_name}"
+    )
+
 
 @st.cache_data(ttl=600)  # Cache data for 10 minutes (600 seconds)
 def fetch_json_from_blob(blob_name, container_name="configdata"):
@@ -12,23 +60,9 @@ def fetch_json_from_blob(blob_name, container_name="configdata"):
     Standalone function to fetch JSON from Azure.
     Can be called from anywhere in the app.
     """
-    conn_str = STORAGE_CONN_STRING
-    
-    if not conn_str:
-        st.error("⚠️ Connection string not found! Check secrets/env variables.")
-        return None
-
     try:
-        # Create client
-        blob_service_client = BlobServiceClient.from_connection_string(conn_str)
-        blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-
-        # Download and Parse
-        # print(f"DEBUG: Downloading {blob_name}...") # Uncomment for debugging
-        download_stream = blob_client.download_blob()
-        json_data = json.loads(download_stream.readall())
-        return json_data
+        return download_json_from_blob(blob_name, container_name)
 
     except Exception as e:
         st.error(f"Error fetching {blob_name}: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from src.config import BROADCAST_PHONE_COLUMN
+from src.geo import distance_to_fires_m
+
+DEFAULT_BROADCAST_MESSAGE = (
+    "🆘 FIRE ALERT! You are within {radius} m of an active fire perimeter. "
+    "Prepare to evacuate and follow the instructions of the rescue teams."
+)
+
+
+def select_broadcast_recipients(citizens, fire_df, radius_m, categories=None, present_only=True, tolerance_m=5.0):
+    """
+    Selects the citizens within radius_m of any fire polygon (inside a polygon counts as 0 m).
+
+    Args:
+        citizens: Ranked citizen DataFrame (lat, lon, present, risk_category, ...).
+        fire_df: Fire vertices DataFrame from DataManager.load_fire_data_from_blob.
+        radius_m: Search radius around the fire perimeters in metres.
+        categories: Optional iterable of risk categories to keep (e.g. ['CRITICAL', 'HIGH']).
+                    None keeps every category; an empty list selects nobody.
+        present_only: Skip citizens who are not present (present == 0).
+        tolerance_m: Perimeter simplification allowed for the distance query. The radius is
+                     widened by the same amount, so nobody within radius_m is ever missed.
+
+    Returns:
+        DataFrame of recipients with an extra 'fire_distance_m' column, nearest first.
+    """
+    if citizens is None or citizens.empty or fire_df is None or fire_df.empty:
+        return pd.DataFrame(columns=list(getattr(citizens, 'columns', [])) + ['fire_distance_m'])
+
+    # 1. Cheap attribute filters first, as boolean masks (no row copies yet)
+    mask = np.ones(len(citizens), dtype=bool)
+    if present_only and 'present' in citizens.columns:
+        mask &= citizens['present'].to_numpy() != 0
+    if categories is not None and 'risk_category' in citizens.columns:
+        wanted = [str(c).upper() for c in categories]
+        mask &= citizens['risk_category'].isin(wanted).to_numpy()
+
+    # 2. Spatial query on the remaining candidates only
+    candidate_idx = np.flatnonzero(mask)
+    distances = distance_to_fires_m(
+        citizens['lat'].to_numpy(dtype=float)[candidate_idx],
+        citizens['lon'].to_numpy(dtype=float)[candidate_idx],
+        fire_df,
+        max_distance_m=radius_m + (tolerance_m or 0),
+        tolerance_m=tolerance_m
+    )
+    within = np.isfinite(distances)
+
+    recipients = citizens.iloc[candidate_idx[within]].copy()
+    recipients['fire_distance_m'] = distances[within]
+    return recipients.sort_values('fire_distance_m', kind='stable')
+
+
+def build_sms_destinations(recipients, phone_column=BROADCAST_PHONE_COLUMN):
+    """
+    Converts a recipients DataFrame into the Infobip 'destinations' list, from the
+    phone_column of the citizen data (BROADCAST_PHONE_COLUMN).
+    Rows without a phone number are dropped and duplicate numbers are sent only once.
+    """
+    if recipients is None or recipients.empty or phone_column not in recipients.columns:
+        return []
+
+    phones = recipients[phone_column].dropna().astype(str).str.replace(r'\D', '', regex=True)
+    phones = phones[phones != ''].drop_duplicates()
+    return [{'to': phone} for phone in phones]
@@ -17,6 +17,8 @@ DEFAULT_LAT = float(os.getenv("DEFAULT_LAT"))#, 40.6401
 DEFAULT_LON = float(os.getenv("DEFAULT_LON"))#, 22.9444
 RESCUER_LAT = float(os.getenv("RESCUER_LAT", 38.0417850)) 
 RESCUER_LON = float(os.getenv("RESCUER_LON", 23.995306))
+# Default number of top-ranked citizens in a planned rescue route
+ROUTE_MAX_STOPS = int(os.getenv("ROUTE_MAX_STOPS", 25))
 
 # Azure OpenAI Configuration
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
@@ -27,9 +29,64 @@ AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o
 # Ranking API
 RANKING_API_URL = os.getenv("RANKING_API_URL")
 
+# Ranking source: "api" (API, danger_level thresholds without it), "model" (local model only)
+# or "hybrid" (API, local model for citizens the API has not ranked and when it is unavailable)
+RANKING_MODE = os.getenv("RANKING_MODE", "api").lower()
+RANKING_MODEL_PATH = os.getenv("RANKING_MODEL_PATH", "models/ranking_model.json")
+
+# Structured note features (src/notes.py): optional cache file precomputed offline with
+# `python -m src.notes <citizens.json> --cache <file>`; loaded by the shared extractor
+NOTES_CACHE_FILE = os.getenv("NOTES_CACHE_FILE")
+
 # Azure Blob Storage Connection String
 STORAGE_CONN_STRING = os.getenv("STORAGE_CONN_STRING")
 
+# Blob names of the live datasets
+CITIZEN_BLOB_NAME = os.getenv("CITIZEN_BLOB_NAME", "dataset_250_Domatia.json")
+FIRE_BLOB_NAME = os.getenv("FIRE_BLOB_NAME", "fire2.json")
+
+# Region sharding (enabled when a shard manifest blob is configured)
+# Shards within SHARD_AREA_RADIUS_M of the default location are always loaded;
+# loaded shards are evicted least-recently-used beyond SHARD_MEMORY_BUDGET_MB.
+SHARD_MANIFEST_BLOB = os.getenv("SHARD_MANIFEST_BLOB")
+SHARD_AREA_RADIUS_M = float(os.getenv("SHARD_AREA_RADIUS_M", 25000))
+SHARD_MEMORY_BUDGET_MB = float(os.getenv("SHARD_MEMORY_BUDGET_MB", 512))
+
+# Live data refresh
+# Background poll of blob storage, and how often the live status checks for new snapshots
+REFRESH_INTERVAL_S = float(os.getenv("REFRESH_INTERVAL_S", 30))
+LIVE_VIEW_INTERVAL_S = float(os.getenv("LIVE_VIEW_INTERVAL_S", 10))
+
+# Resilience: fast timeouts, circuit breakers and local replicas of upstream data
+# A dependency is skipped for BREAKER_RESET_S after BREAKER_FAILURE_THRESHOLD consecutive failures
+BLOB_TIMEOUT_S = float(os.getenv("BLOB_TIMEOUT_S", 5))
+RANKING_TIMEOUT_S = float(os.getenv("RANKING_TIMEOUT_S", 3))
+# Rankings older than this are revalidated in the background (stale-while-revalidate)
+RANKING_TTL_S = float(os.getenv("RANKING_TTL_S", 60))
+AI_TIMEOUT_S = float(os.getenv("AI_TIMEOUT_S", 20))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 3))
+BREAKER_RESET_S = float(os.getenv("BREAKER_RESET_S", 30))
+REPLICA_DIR = os.getenv("REPLICA_DIR", "replica")
+
+# Data-plane worker service (src/worker.py)
+# When WORKER_ADDRESS ("host:port") is set, the dashboard is a thin client of the worker.
+# Requests are unpickled, so WORKER_AUTHKEY (a shared secret) is required: there is no default.
+WORKER_ADDRESS = os.getenv("WORKER_ADDRESS")
+WORKER_AUTHKEY = os.getenv("WORKER_AUTHKEY", "").encode() or None
+
+# Instrumentation (src/metrics.py): off by default; the ops panel is shown with ?ops=1
+# METRICS_PORT serves a Prometheus text endpoint (/metrics) on localhost
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+METRICS_FILE = os.getenv("METRICS_FILE", "metrics.json")
+METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+
+# Fire spread projection
+# Perimeter snapshots kept for spread estimation, and time-to-impact thresholds (minutes)
+FIRE_HISTORY_LENGTH = int(os.getenv("FIRE_HISTORY_LENGTH", 6))
+TTI_CRITICAL_MIN = float(os.getenv("TTI_CRITICAL_MIN", 30))
+TTI_HIGH_MIN = float(os.getenv("TTI_HIGH_MIN", 90))
+FIRE_PROJECTION_MIN = float(os.getenv("FIRE_PROJECTION_MIN", 60))
+
 # Azure Speech Service Configuration
 SPEECH_KEY = os.getenv("SPEECH_KEY")
 SPEECH_REGION = os.getenv("SPEECH_REGION")
@@ -37,6 +94,39 @@ SPEECH_REGION = os.getenv("SPEECH_REGION")
 # Infobip SMS Configuration
 INFOBIP_API_KEY = os.getenv("INFOBIP_API_KEY")
 INFOBIP_BASE_URL = os.getenv("INFOBIP_BASE_URL")
+# Recipients of the header's SOS button (comma-separated phone numbers with country code);
+# the button stays disabled while none are configured.
+SOS_SMS_RECIPIENTS = [p.strip() for p in os.getenv("SOS_SMS_RECIPIENTS", "").split(",") if p.strip()]
+# Citizen data column with the mobile number (country code included) that targeted broadcasts
+# text. Neither the blob citizen schema nor src.synthetic has one yet: until the citizen data
+# provides it, the broadcast says so and stays disabled.
+BROADCAST_PHONE_COLUMN = os.getenv("BROADCAST_PHONE_COLUMN", "phone")
+
+# Outbound SMS queue (SQLite file shared by all sessions and the background worker)
+SMS_QUEUE_DB = os.getenv("SMS_QUEUE_DB", "sms_queue.db")
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", 5))
+SMS_TIMEOUT_S = float(os.getenv("SMS_TIMEOUT_S", 10))
+# Same message to the same recipients within SMS_DEDUPE_WINDOW_S is sent once; a job being sent
+# is leased to its worker for SMS_LEASE_S (more than a send can take) before another may retry it.
+SMS_DEDUPE_WINDOW_S = float(os.getenv("SMS_DEDUPE_WINDOW_S", 60))
+SMS_LEASE_S = float(os.getenv("SMS_LEASE_S", 120))
+
+# Rank-change event log (src/event_log.py): columnar segments under EVENT_LOG_DIR ("" keeps
+# it in memory). Citizens reaching ALERT_MIN_CATEGORY raise alerts in the dashboard, and an
+# SMS to ALERT_SMS_RECIPIENTS (comma-separated phone numbers) when configured. Segments are
+# merged once there are more than EVENT_LOG_COMPACT_SEGMENTS of them.
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "event_log")
+EVENT_LOG_COMPACT_SEGMENTS = int(os.getenv("EVENT_LOG_COMPACT_SEGMENTS", 64))
+ALERT_MIN_CATEGORY = os.getenv("ALERT_MIN_CATEGORY", "CRITICAL").upper()
+ALERT_SMS_RECIPIENTS = [p.strip() for p in os.getenv("ALERT_SMS_RECIPIENTS", "").split(",") if p.strip()]
+
+# Incident replay (src/replay.py): every published version is recorded under HISTORY_DIR ("" keeps
+# it in memory) as a keyframe every HISTORY_KEYFRAME_INTERVAL versions and deltas in between;
+# the oldest keyframe groups beyond HISTORY_MAX_KEYFRAMES are deleted. Playback advances every REPLAY_STEP_S.
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
+HISTORY_KEYFRAME_INTERVAL = int(os.getenv("HISTORY_KEYFRAME_INTERVAL", 20))
+HISTORY_MAX_KEYFRAMES = int(os.getenv("HISTORY_MAX_KEYFRAMES", 50))
+REPLAY_STEP_S = float(os.getenv("REPLAY_STEP_S", 1.0))
 
 # Custom CSS
 CUSTOM_CSS = """
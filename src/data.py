@@ -1,34 +1,20 @@
 import pandas as pd
-import numpy as np
-from src.blod_util import fetch_json_from_blob
+from src.blod_util import fetch_json_from_blob, download_json_from_blob
+from src.config import CITIZEN_BLOB_NAME, FIRE_BLOB_NAME
+from src.geo import add_fire_lod
+from src.notes import add_note_features
+from src.synthetic import generate_dataset
 import json
 
 class DataManager:
     @staticmethod
-    def load_vulnerable_citizens(n=50, center_lat=40.6401, center_lon=22.9444):
-
-        data = []
-        for i in range(n):
-            # Random location around center
-            lat = center_lat + np.random.normal(0, 0.005)
-            lon = center_lon + np.random.normal(0, 0.005)
-
-            # Random features
-            age = np.random.randint(20, 95)
-            mobility = np.random.randint(1, 11) # 1 = bedridden, 10 = athlete
-            has_disease = np.random.choice([True, False], p=[0.3, 0.7])
-            oxygen_sensor = np.random.randint(90, 100) # Mock health sensor
-
-            data.append({
-                "id": f"P-{100+i}",
-                "lat": lat,
-                "lon": lon,
-                "age": age,
-                "mobility": mobility,
-                "has_disease": has_disease,
-                "oxygen_level": oxygen_sensor
-            })
-        return pd.DataFrame(data)
+    def load_vulnerable_citizens(n=50, center_lat=40.6401, center_lon=22.9444, seed=None):
+        """
+        Synthetic citizens with the live dataset schema (see src.synthetic.generate_dataset).
+        Fully vectorized and reproducible for a given seed.
+        """
+        citizens, _ = generate_dataset(n, seed=seed, center_lat=center_lat, center_lon=center_lon)
+        return citizens
 
     @staticmethod
     def load_data_from_local_json(filepath):
@@ -50,17 +36,17 @@ class DataManager:
                 entry['lon'] = coords.get('lon')
                 processed_data.append(entry)
 
-            return pd.DataFrame(processed_data)
+            return add_note_features(pd.DataFrame(processed_data))
         except Exception as e:
             print(f"Error loading JSON data: {e}")
             return pd.DataFrame()
         
     @staticmethod
-    def load_citizen_data_from_blob():
+    def citizens_from_json(json_data):
         """
-        Loads citizen data JSON from Azure Blob Storage.
+        Converts the raw citizen JSON list into a DataFrame (flattens coordinates to lat/lon)
+        and adds the structured note features of src.notes (only new notes are extracted).
         """
-        json_data = fetch_json_from_blob("dataset_250_Domatia.json")
         if not json_data:
             return pd.DataFrame()
 
@@ -74,15 +60,15 @@ class DataManager:
             entry['lon'] = coords.get('lon')
             processed_data.append(entry)
 
-        return pd.DataFrame(processed_data)
-    
+        return add_note_features(pd.DataFrame(processed_data))
+
     @staticmethod
-    def load_fire_data_from_blob():
+    def fires_from_json(json_data):
         """
-        Loads fire polygon data JSON from Azure Blob Storage.
-        Each entry in the JSON represents a distinct fire polygon consisting of coordinate points.
+        Converts the raw fire JSON (list of polygons, each a list of lat/lon points)
+        into one row per vertex with its fire_id, plus the level-of-detail columns
+        ('dp_error_m', 'min_zoom') and cached bounding boxes from add_fire_lod.
         """
-        json_data = fetch_json_from_blob("fire2.json")
         if not json_data:
             return pd.DataFrame()
 
@@ -98,4 +84,30 @@ class DataManager:
                 }
                 processed_data.append(entry)
 
-        return pd.DataFrame(processed_data)
+        # Simplification is computed once per download, not on every map render
+        return add_fire_lod(pd.DataFrame(processed_data))
+
+    @staticmethod
+    def load_citizen_data_from_blob():
+        """
+        Loads citizen data JSON from Azure Blob Storage.
+        """
+        return DataManager.citizens_from_json(fetch_json_from_blob(CITIZEN_BLOB_NAME))
+    
+    @staticmethod
+    def load_fire_data_from_blob():
+        """
+        Loads fire polygon data JSON from Azure Blob Storage.
+        Each entry in the JSON represents a distinct fire polygon consisting of coordinate points.
+        """
+        return DataManager.fires_from_json(fetch_json_from_blob(FIRE_BLOB_NAME))
+
+    @staticmethod
+    def load_shard(citizens_blob, fires_blob=None):
+        """
+        Downloads one region shard (citizen blob and optional fire blob).
+        Raises on failure, like download_json_from_blob.
+        """
+        citizens = DataManager.citizens_from_json(download_json_from_blob(citizens_blob))
+        fires = DataManager.fires_from_json(download_json_from_blob(fires_blob)) if fires_blob else pd.DataFrame()
+        return citizens, fires
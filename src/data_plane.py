@@ -0,0 +1,195 @@
+import threading
+from collections import OrderedDict
+from queue import Queue
+from src.broadcast import select_broadcast_recipients
+from src.config import ALERT_SMS_RECIPIENTS, EVENT_LOG_DIR, HISTORY_DIR, SHARD_MANIFEST_BLOB
+from src.event_log import EventLog, RankChangeTracker, describe_events, sms_alert_notifier
+from src.fire_projection import FireSpreadModel, add_time_to_impact
+from src.logic import apply_ranking_logic
+from src.rankings import get_ranking_cache
+from src.refresh import RefreshService
+from src.replay import SnapshotHistory
+from src.resilience import health_report
+from src.routing import plan_route
+from src.search import CitizenIndex
+from src.shards import ShardedDataSource
+from src.sms_queue import get_sms_queue
+from src.snapshot_store import SnapshotStore
+
+
+def rank_snapshot(snapshot):
+    """Ranks one DataSnapshot; the projected fire arrival time feeds the ranking as 'time_to_impact_min'."""
+    return apply_ranking_logic(add_time_to_impact(snapshot.citizens, snapshot.fire_history))
+
+
+def create_refresh_service(load_citizens=None, load_fires=None):
+    """
+    RefreshService over the configured source: explicit loaders if given, the
+    region-sharded dataset when a manifest is configured, the single blobs otherwise.
+    Returns (service, sharded_source or None).
+    """
+    if load_citizens is not None and load_fires is not None:
+        return RefreshService(load_citizens, load_fires), None
+    if SHARD_MANIFEST_BLOB:
+        source = ShardedDataSource()
+        return RefreshService(source.load_citizens, source.load_fires), source
+    return RefreshService(), None
+
+
+class LocalDataPlane:
+    """
+    Owner of the live dataset and everything computed from it: refresh, ranking,
+    citizen index, routes, fire projection and broadcast selection.
+
+    Runs inside the Streamlit process by default, or inside the worker service
+    (src.worker), where RemoteDataPlane exposes the same methods to the dashboards.
+    Calls that depend on the data take the snapshot version the caller is showing,
+    so answers stay consistent with its frame while a refresh is published.
+    """
+
+    # Methods callable over RPC
+    RPC_METHODS = ('snapshot', 'query', 'route', 'project_fires', 'broadcast_recipients', 'set_viewport', 'health',
+                   'rankings_fetched_at', 'alerts', 'timeline', 'replay_moments', 'replay')
+
+    def __init__(self, service, store=None, sharded_source=None, keep_versions=3, tracker=None, history=None):
+        self.service = service
+        self.store = store or SnapshotStore(rank_snapshot, rankings=get_ranking_cache())
+        self.sharded_source = sharded_source
+        self.keep_versions = keep_versions
+        # RankChangeTracker logging every published version (none: no event log / alerts)
+        self.tracker = tracker
+        # SnapshotHistory recording every published version for replay (none: no replay)
+        self.history = history
+        self._recent = OrderedDict()  # version -> SharedSnapshot
+        self._lock = threading.Lock()
+        # Published versions waiting for the event log / history, recorded off the request path
+        self._published = Queue()
+        self._recorder = None
+
+    @classmethod
+    def create(cls, load_citizens=None, load_fires=None, start=True):
+        """Data plane with its refresh service; the first snapshot is loaded synchronously."""
+        service, source = create_refresh_service(load_citizens, load_fires)
+        service.refresh_once()
+        if start:
+            service.start()
+        notify = None
+        if ALERT_SMS_RECIPIENTS:
+            # Alerts are sent from this process, dashboards attached or not (worker mode)
+            notify = sms_alert_notifier(ALERT_SMS_RECIPIENTS, queue=get_sms_queue())
+        tracker = RankChangeTracker(EventLog(EVENT_LOG_DIR), notify=notify)
+        return cls(service, sharded_source=source, tracker=tracker, history=SnapshotHistory(HISTORY_DIR))
+
+    def current(self):
+        """
+        SharedSnapshot of the latest published data. New versions are handed to a
+        background recorder for the event log and the replay history, so the caller
+        never waits for either.
+        """
+        snapshot = self.service.latest()
+        shared = self.store.current(snapshot)
+        with self._lock:
+            published = shared.version not in self._recent
+            if published:
+                self._recent[shared.version] = shared
+                while len(self._recent) > self.keep_versions:
+                    self._recent.popitem(last=False)
+                if self.tracker is not None or self.history is not None:
+                    # The refresh diff only describes this version if it was built from that snapshot
+                    self._published.put((shared, snapshot.diff if shared.data_version == snapshot.version else None))
+                    if self._recorder is None:
+                        self._recorder = threading.Thread(target=self._record_published, name="history-recorder",
+                                                          daemon=True)
+                        self._recorder.start()
+        return shared
+
+    def _record_published(self):
+        # One thread, so versions are logged and recorded in publication order
+        while True:
+            shared, diff = self._published.get()
+            if self.tracker is not None:
+                try:
+                    self.tracker.observe(shared, diff)
+                except Exception as e:
+                    print(f"Event log update failed: {e}")
+            if self.history is not None:
+                try:
+                    self.history.record(shared)
+                except Exception as e:
+                    print(f"Snapshot history update failed: {e}")
+            self._published.task_done()
+
+    def wait_recorded(self):
+        """Blocks until every version published so far is in the event log and the history."""
+        self._published.join()
+
+    def _at(self, version):
+        # The requested version while it is still kept, otherwise the latest one
+        current = self.current()
+        return self._recent.get(version, current) if version is not None else current
+
+    # --- Data-plane API (same signatures in RemoteDataPlane) ----------------
+
+    def snapshot(self, known_version=None):
+        """Latest SharedSnapshot, or None if the caller already holds known_version."""
+        shared = self.current()
+        return None if shared.version == known_version else shared
+
+    def query(self, version=None, **filters):
+        """Row positions of CitizenIndex.query(**filters) on the given version."""
+        shared = self._at(version)
+        index = self.store.derived(shared, 'citizen_index', lambda: CitizenIndex(shared.ranked))
+        return index.query(**filters)
+
+    def route(self, version=None, max_stops=25):
+        shared = self._at(version)
+        return self.store.derived(shared, ('route', max_stops), lambda: plan_route(shared.ranked, max_stops=max_stops))
+
+    def project_fires(self, version=None, minutes=60):
+        shared = self._at(version)
+        return self.store.derived(
+            shared, ('fire_projection', minutes),
+            lambda: FireSpreadModel.fit(shared.fire_history).project(minutes * 60)
+        )
+
+    def broadcast_recipients(self, version=None, radius_m=1000, categories=None):
+        shared = self._at(version)
+        return select_broadcast_recipients(shared.ranked, shared.fires, radius_m, categories)
+
+    def set_viewport(self, viewer, bbox):
+        """Reports a session's map viewport (only used with a region-sharded dataset)."""
+        if self.sharded_source is not None:
+            self.sharded_source.set_viewport(viewer, bbox)
+
+    def health(self):
+        """Circuit breaker / replica state of the upstreams this data plane depends on."""
+        report = health_report()
+        if self.service.last_error:
+            # A failed poll keeps the previous snapshot: show that the data is not moving
+            report.append({"dependency": "data refresh", "state": "FAILING", "failures": None,
+                           "last_error": self.service.last_error, "degraded": True, "replica_age_s": None})
+        return report
+
+    def rankings_fetched_at(self):
+        """When the ranking API last answered (None: never, the local ranking model is used)."""
+        rankings = self.store.rankings
+        return rankings.fetched_at if rankings is not None else None
+
+    def alerts(self, since_version=0):
+        """Rank-change alerts raised for versions after since_version, oldest first."""
+        self.current()
+        return self.tracker.since(since_version) if self.tracker is not None else []
+
+    def timeline(self, citizen_id=None, start=None, end=None):
+        """Logged risk / presence changes of one citizen (or all) between two timestamps."""
+        if self.tracker is None:
+            return describe_events(EventLog(None).read())
+        return self.tracker.log.timeline(citizen_id, start, end)
+
+    def replay_moments(self):
+        """(version, recorded_at) of every version recorded for replay, oldest first."""
+        return self.history.moments() if self.history is not None else []
+
+    def replay(self, timestamp=None):
+        """HistoricalSnapshot current at `timestamp` (latest if None), rebuilt from the local history."""
+        return self.history.at(timestamp) if self.history is not None else None
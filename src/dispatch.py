@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+from src.config import RESCUER_LAT, RESCUER_LON
+from src.geo import haversine_m, haversine_matrix
+from src.notes import get_note_extractor
+
+# Categories handled by team dispatch
+DISPATCH_CATEGORIES = ('CRITICAL', 'HIGH')
+
+def required_crew_from_notes(notes):
+    """Rescuers needed per citizen, parsed from the free-text notes (default 1; see src.notes)."""
+    notes = notes if isinstance(notes, pd.Series) else pd.Series(notes, dtype=object)
+    return get_note_extractor().extract(notes)['required_crew'].to_numpy(dtype=int)
+
+
+def default_teams(n_teams, crew=2, lat=RESCUER_LAT, lon=RESCUER_LON):
+    """n_teams teams of `crew` rescuers, all starting at the rescuer base."""
+    return pd.DataFrame({
+        'team_id': [f"T{i + 1}" for i in range(n_teams)],
+        'lat': [lat] * n_teams,
+        'lon': [lon] * n_teams,
+        'crew': [crew] * n_teams,
+    })
+
+
+class DispatchPlanner:
+    """
+    Splits the CRITICAL/HIGH present citizens across rescue teams.
+
+    plan() runs a capacitated assignment (regret-ordered greedy auction over the
+    citizen x team distance matrix) followed by a few centroid refinement rounds, so
+    assignments are balanced and geographically compact. A team is only eligible for
+    a citizen if its crew covers the 'required_crew' parsed from the notes.
+
+    update() is incremental: rescued citizens (present -> 0) are released, new ones
+    are auctioned against the current team centroids, and a full plan() only happens
+    when the gap between the busiest and the idlest team has grown by more than
+    rebalance_threshold x the mean load since the last plan().
+    """
+
+    def __init__(self, teams, categories=DISPATCH_CATEGORIES, balance_slack=1.1,
+                 refine_rounds=3, rebalance_threshold=0.5):
+        self.teams = teams.reset_index(drop=True)
+        self.categories = tuple(c.upper() for c in categories)
+        self.balance_slack = balance_slack
+        self.refine_rounds = refine_rounds
+        self.rebalance_threshold = rebalance_threshold
+        self.assignments = pd.Series(dtype=object, name='team_id')  # citizen id -> team_id
+        self.anchors = self.teams[['lat', 'lon']].to_numpy(dtype=float)
+        self.full_replans = 0
+        self._planned_gap = 0
+
+    # --- Public API ---------------------------------------------------------
+
+    def plan(self, citizens):
+        """Full recompute. Returns the eligible citizens with a 'team_id' column."""
+        work = self._eligible(citizens)
+        self.full_replans += 1
+        if work.empty:
+            self.assignments = pd.Series(dtype=object, name='team_id')
+            return self._result(work)
+
+        lat = work['lat'].to_numpy(dtype=float)
+        lon = work['lon'].to_numpy(dtype=float)
+        crew = work['required_crew'].to_numpy()
+        capacity = self._capacity(len(work))
+
+        anchors = self._initial_anchors(lat, lon)
+        for _ in range(max(1, self.refine_rounds)):
+            team_idx = self._auction(lat, lon, crew, anchors, np.full(len(self.teams), capacity))
+            anchors = self._centroids(lat, lon, team_idx, anchors)
+
+        self.anchors = anchors
+        self.assignments = pd.Series(self.teams['team_id'].to_numpy()[team_idx], index=work['id'].to_numpy(), name='team_id')
+        loads = self._loads()
+        self._planned_gap = loads.max() - loads.min()
+        return self._result(work)
+
+    def update(self, citizens):
+        """Incremental recompute after a data refresh. Returns the same shape as plan()."""
+        if self.assignments.empty:
+            return self.plan(citizens)
+
+        work = self._eligible(citizens)
+        ids = work['id'].to_numpy()
+
+        # 1. Release citizens that were rescued or dropped out of the dispatch categories
+        self.assignments = self.assignments[self.assignments.index.isin(ids)]
+
+        # 2. Auction only the newcomers, against the current centroids and remaining capacity
+        is_new = ~pd.Index(ids).isin(self.assignments.index)
+        if is_new.any():
+            new = work[is_new]
+            capacity = self._capacity(len(work))
+            loads = self._loads()
+            team_idx = self._auction(
+                new['lat'].to_numpy(dtype=float),
+                new['lon'].to_numpy(dtype=float),
+                new['required_crew'].to_numpy(),
+                self.anchors,
+                np.maximum(capacity - loads, 0)
+            )
+            added = pd.Series(self.teams['team_id'].to_numpy()[team_idx], index=new['id'].to_numpy(), name='team_id')
+            self.assignments = pd.concat([self.assignments, added])
+
+        # 3. Replan from scratch only when the loads drifted clearly apart
+        loads = self._loads()
+        drift = (loads.max() - loads.min()) - self._planned_gap
+        if len(work) and drift > self.rebalance_threshold * max(loads.mean(), 1):
+            return self.plan(citizens)
+
+        return self._result(work)
+
+    def summary(self, assigned):
+        """Per-team load, crew need and spread (max distance from the team centroid)."""
+        rows = []
+        for i, team in self.teams.iterrows():
+            members = assigned[assigned['team_id'] == team['team_id']]
+            spread = haversine_m(members['lat'], members['lon'], self.anchors[i, 0], self.anchors[i, 1]).max() \
+                if len(members) else 0.0
+            rows.append({
+                'team_id': team['team_id'],
+                'crew': team['crew'],
+                'citizens': len(members),
+                'critical': int((members['risk_category'] == 'CRITICAL').sum()),
+                'max_required_crew': int(members['required_crew'].max()) if len(members) else 0,
+                'spread_m': round(float(spread)),
+            })
+        return pd.DataFrame(rows)
+
+    # --- Internals ----------------------------------------------------------
+
+    def _eligible(self, citizens):
+        if citizens is None or citizens.empty:
+            return pd.DataFrame(columns=['id', 'lat', 'lon', 'risk_category', 'required_crew'])
+        mask = citizens['risk_category'].astype(str).str.upper().isin(self.categories).to_numpy()
+        if 'present' in citizens.columns:
+            mask = mask & (citizens['present'].to_numpy() != 0)
+        work = citizens[mask]
+        if 'required_crew' in work.columns:
+            return work
+        work = work.copy()
+        work['required_crew'] = required_crew_from_notes(work['notes']) if 'notes' in work.columns else 1
+        return work
+
+    def _capacity(self, n_citizens):
+        return int(np.ceil(n_citizens * self.balance_slack / max(len(self.teams), 1)))
+
+    def _loads(self):
+        counts = self.assignments.value_counts()
+        return counts.reindex(self.teams['team_id'], fill_value=0).to_numpy()
+
+    def _initial_anchors(self, lat, lon):
+        """
+        Team positions, or (when all teams start together) the centroids of k equal-count
+        angular sectors around the incident, which gives a balanced and compact first split.
+        """
+        team_pos = self.teams[['lat', 'lon']].to_numpy(dtype=float)
+        spread = haversine_m(team_pos[:, 0], team_pos[:, 1], team_pos[0, 0], team_pos[0, 1]).max()
+        if spread > 100 or len(self.teams) == 1:
+            return team_pos
+
+        angle = np.arctan2(lat - lat.mean(), (lon - lon.mean()) * np.cos(np.radians(lat.mean())))
+        sectors = np.array_split(np.argsort(angle), len(self.teams))
+        return np.array([
+            [lat[idx].mean(), lon[idx].mean()] if len(idx) else team_pos[i]
+            for i, idx in enumerate(sectors)
+        ])
+
+    def _auction(self, lat, lon, crew, anchors, capacity):
+        """
+        Capacitated greedy assignment. Citizens with the largest regret (gap between
+        their best and second-best eligible team) choose first.
+        Returns the team index per citizen.
+        """
+        dist = haversine_matrix(lat, lon, anchors[:, 0], anchors[:, 1])
+        eligible = self.teams['crew'].to_numpy()[None, :] >= crew[:, None]
+        # A citizen no team can fully cover still goes to the largest crews
+        uncovered = ~eligible.any(axis=1)
+        eligible[uncovered] = self.teams['crew'].to_numpy() == self.teams['crew'].max()
+        dist = np.where(eligible, dist, np.inf)
+
+        if dist.shape[1] > 1:
+            two_best = np.partition(dist, 1, axis=1)[:, :2]
+            regret = np.where(np.isinf(two_best[:, 1]), np.inf, two_best[:, 1] - two_best[:, 0])
+        else:
+            regret = np.zeros(len(lat))
+
+        remaining = np.asarray(capacity, dtype=int).copy()
+        team_idx = np.empty(len(lat), dtype=int)
+        for i in np.argsort(-regret, kind='stable'):
+            row = np.where(remaining > 0, dist[i], np.inf)
+            best = int(np.argmin(row))
+            if np.isinf(row[best]):
+                # Every eligible team is full: overflow to the closest eligible one
+                best = int(np.argmin(dist[i]))
+            team_idx[i] = best
+            remaining[best] -= 1
+        return team_idx
+
+    def _centroids(self, lat, lon, team_idx, previous):
+        counts = np.bincount(team_idx, minlength=len(self.teams))
+        sum_lat = np.bincount(team_idx, weights=lat, minlength=len(self.teams))
+        sum_lon = np.bincount(team_idx, weights=lon, minlength=len(self.teams))
+        centroids = previous.copy()
+        has = counts > 0
+        centroids[has, 0] = sum_lat[has] / counts[has]
+        centroids[has, 1] = sum_lon[has] / counts[has]
+        return centroids
+
+    def _result(self, work):
+        result = work.copy()
+        result['team_id'] = self.assignments.reindex(work['id'].to_numpy()).to_numpy()
+        return result
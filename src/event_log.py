@@ -0,0 +1,438 @@
+"""
+Append-only log of how citizen risk and presence evolve, and the alerts raised from it.
+
+Every published SharedSnapshot is reduced to a RankState (the ID index: ids sorted,
+with category code, presence and urgency score) and diffed against the previous one.
+Only citizens whose category or presence changed (or who appeared / disappeared) are
+logged, one row per citizen and version:
+
+    time, version, id, flags, category, present, score, prev_category, prev_present
+
+The first state of an empty log is written as BASELINE rows. Rows go to columnar .npz
+segments (one per version with changes; compact() merges them, automatically once
+there are more than compact_after). Replaying the rows up to a timestamp gives every
+citizen's state at that moment (state_at); the rows of one citizen are its timeline.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from src.config import EVENT_LOG_DIR, EVENT_LOG_COMPACT_SEGMENTS, ALERT_MIN_CATEGORY, ALERT_SMS_RECIPIENTS
+from src.logic import CATEGORY_RANK, RISK_CATEGORIES, category_rank
+from src.metrics import count, observe, span
+from src.sms_queue import get_sms_queue
+
+# Stored category code: the rank of src.logic minus 1 (LOW 0, HIGH 1, CRITICAL 2)
+CATEGORIES = RISK_CATEGORIES
+CATEGORY_CODES = {name: rank - 1 for name, rank in CATEGORY_RANK.items()}
+
+# Event flags (combined per row)
+ESCALATED = 1
+DEESCALATED = 2
+ARRIVED = 4
+LEFT = 8
+ADDED = 16
+REMOVED = 32
+BASELINE = 64
+FLAG_NAMES = {ESCALATED: 'escalated', DEESCALATED: 'de-escalated', ARRIVED: 'arrived', LEFT: 'left',
+              ADDED: 'added', REMOVED: 'removed', BASELINE: 'baseline'}
+
+# Columns of a segment and their dtypes (-1 marks "none" in the int8 columns)
+EVENT_DTYPES = {
+    'time': np.float64, 'version': np.int64, 'id': np.int64, 'flags': np.int8,
+    'category': np.int8, 'present': np.int8, 'score': np.float32,
+    'prev_category': np.int8, 'prev_present': np.int8,
+}
+
+_SEGMENT_NAME = re.compile(r"events-(\d{8})-(\d{8})\.npz$")
+# Category name of a code + 1 (code -1 -> None)
+_CATEGORY_NAMES = np.array([None, *CATEGORIES], dtype=object)
+
+
+def category_codes(values):
+    """Codes (LOW 0, HIGH 1, CRITICAL 2) of a risk_category column; other values count as LOW."""
+    return np.maximum(category_rank(values) - 1, 0).astype(np.int8)
+
+
+def _numeric(df, column, default, dtype):
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=dtype)
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    return np.nan_to_num(values, nan=default).astype(dtype)
+
+
+def _take(values, positions, found, fill):
+    # values[positions] where found, fill elsewhere (also safe on an empty state)
+    out = np.full(len(positions), fill, dtype=values.dtype)
+    out[found] = values[positions[found]]
+    return out
+
+
+@dataclass(frozen=True)
+class RankState:
+    """Ranking state of one version as arrays sorted by citizen id (the ID index)."""
+    ids: np.ndarray
+    category: np.ndarray
+    present: np.ndarray
+    score: np.ndarray
+
+    @classmethod
+    def from_ranked(cls, ranked):
+        if ranked is None or ranked.empty:
+            return cls(np.empty(0, np.int64), np.empty(0, np.int8), np.empty(0, np.int8), np.empty(0, np.float32))
+        ids = ranked['id'].to_numpy(dtype=np.int64)
+        order = np.argsort(ids, kind='stable')
+        category = category_codes(ranked['risk_category']) if 'risk_category' in ranked.columns \
+            else np.zeros(len(ranked), dtype=np.int8)
+        return cls(ids[order], category[order], _numeric(ranked, 'present', 1, np.int8)[order],
+                   _numeric(ranked, 'urgency_score', np.nan, np.float32)[order])
+
+    def positions(self, ids):
+        """(positions, found mask) of ids, by binary search."""
+        if len(self.ids) == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return positions, self.ids[positions] == ids
+
+
+def diff_rank_states(prev, curr, candidate_ids=None):
+    """
+    Event columns (all but time / version) of the citizens that differ between two states.
+
+    With candidate_ids (the ids a data refresh reported as added, removed or changed,
+    when nothing else the ranking depends on moved) only those are looked up in the
+    ID index: O(changes * log n). Otherwise both states are compared in full, vectorized.
+    prev=None gives BASELINE rows for every citizen of curr.
+    """
+    if prev is None:
+        n = len(curr.ids)
+        return {'id': curr.ids, 'flags': np.full(n, BASELINE, dtype=np.int8), 'category': curr.category,
+                'present': curr.present, 'score': curr.score,
+                'prev_category': np.full(n, -1, dtype=np.int8), 'prev_present': np.full(n, -1, dtype=np.int8)}
+
+    if candidate_ids is None and np.array_equal(prev.ids, curr.ids):
+        # Same citizens (the common case): compare position by position
+        ids = curr.ids
+        prev_pos = curr_pos = np.arange(len(ids))
+        in_prev = in_curr = np.ones(len(ids), dtype=bool)
+    else:
+        ids = np.unique(np.asarray(candidate_ids, dtype=np.int64)) if candidate_ids is not None \
+            else np.union1d(prev.ids, curr.ids)
+        prev_pos, in_prev = prev.positions(ids)
+        curr_pos, in_curr = curr.positions(ids)
+
+    prev_category = _take(prev.category, prev_pos, in_prev, -1)
+    prev_present = _take(prev.present, prev_pos, in_prev, -1)
+    category = _take(curr.category, curr_pos, in_curr, -1)
+    present = _take(curr.present, curr_pos, in_curr, -1)
+    both = in_prev & in_curr
+
+    flags = np.zeros(len(ids), dtype=np.int8)
+    flags |= np.where(both & (category > prev_category), ESCALATED, 0).astype(np.int8)
+    flags |= np.where(both & (category < prev_category), DEESCALATED, 0).astype(np.int8)
+    flags |= np.where(both & (present > prev_present), ARRIVED, 0).astype(np.int8)
+    flags |= np.where(both & (present < prev_present), LEFT, 0).astype(np.int8)
+    flags |= np.where(in_curr & ~in_prev, ADDED, 0).astype(np.int8)
+    flags |= np.where(in_prev & ~in_curr, REMOVED, 0).astype(np.int8)
+
+    changed = flags != 0
+    score = _take(curr.score, curr_pos, in_curr, np.nan)
+    return {'id': ids[changed], 'flags': flags[changed], 'category': category[changed],
+            'present': present[changed], 'score': score[changed],
+            'prev_category': prev_category[changed], 'prev_present': prev_present[changed]}
+
+
+def describe_events(events):
+    """Readable form of event rows (category names, joined flag names)."""
+    if events.empty:
+        return pd.DataFrame(columns=['time', 'version', 'id', 'change', 'prev_category', 'category',
+                                     'prev_present', 'present', 'urgency_score'])
+    flags = events['flags'].to_numpy()
+    change = np.array(["" for _ in range(len(events))], dtype=object)
+    for flag, name in FLAG_NAMES.items():
+        has = (flags & flag) != 0
+        change[has] = [f"{c}, {name}" if c else name for c in change[has]]
+    return pd.DataFrame({
+        'time': pd.to_datetime(events['time'].to_numpy(), unit='s'),
+        'version': events['version'].to_numpy(),
+        'id': events['id'].to_numpy(),
+        'change': change,
+        'prev_category': _CATEGORY_NAMES[events['prev_category'].to_numpy().astype(int) + 1],
+        'category': _CATEGORY_NAMES[events['category'].to_numpy().astype(int) + 1],
+        'prev_present': events['prev_present'].to_numpy(),
+        'present': events['present'].to_numpy(),
+        'urgency_score': events['score'].to_numpy(),
+    })
+
+
+class EventLog:
+    """
+    Append-only store of event rows in columnar .npz segments under `directory`
+    (kept in memory when directory is empty). Segment files are only ever added;
+    compact() merges small ones and removes the parts only after the merge is written;
+    append() runs it once there are more than compact_after segments (0: never).
+    """
+
+    def __init__(self, directory=EVENT_LOG_DIR, compact_after=EVENT_LOG_COMPACT_SEGMENTS):
+        self.directory = directory or None
+        self.compact_after = compact_after
+        self._segments = []  # dicts: first, last (sequence numbers), t_min, t_max, rows, path, columns
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_catalog()
+
+    def _load_catalog(self):
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                found.append((int(match[1]), int(match[2]), os.path.join(self.directory, name)))
+        # A merged segment covers its parts (left behind if compact() was interrupted)
+        found.sort(key=lambda s: (s[0], -s[1]))
+        covered = 0
+        for first, last, path in found:
+            if last <= covered:
+                continue
+            with np.load(path) as data:
+                times = data['time']
+            self._segments.append({'first': first, 'last': last, 'rows': len(times), 'path': path, 'columns': None,
+                                   't_min': float(times.min()), 't_max': float(times.max())})
+            covered = last
+        self._next_seq = covered + 1
+
+    def __len__(self):
+        return sum(segment['rows'] for segment in self._segments)
+
+    @property
+    def segment_count(self):
+        return len(self._segments)
+
+    def append(self, version, timestamp, columns):
+        """Appends one batch of event columns (as from diff_rank_states). Returns the row count."""
+        n = len(columns['id'])
+        if n == 0:
+            return 0
+        data = {'time': np.full(n, timestamp), 'version': np.full(n, version)}
+        data.update(columns)
+        data = {name: np.asarray(data[name], dtype=dtype) for name, dtype in EVENT_DTYPES.items()}
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._segments.append(self._store(seq, seq, data))
+            due = self.compact_after and len(self._segments) > self.compact_after
+        observe("events.rows", n)
+        if due:
+            with span("events.compact"):
+                self.compact()
+        return n
+
+    def _store(self, first, last, data):
+        segment = {'first': first, 'last': last, 'rows': len(data['id']), 'path': None, 'columns': None,
+                   't_min': float(data['time'].min()), 't_max': float(data['time'].max())}
+        if self.directory is None:
+            segment['columns'] = data
+            return segment
+        path = os.path.join(self.directory, f"events-{first:08d}-{last:08d}.npz")
+        # Written under a temporary name and renamed, like the local replicas
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, path)
+        segment['path'] = path
+        return segment
+
+    @staticmethod
+    def _columns(segment):
+        if segment['columns'] is not None:
+            return segment['columns']
+        with np.load(segment['path']) as data:
+            return {name: data[name] for name in EVENT_DTYPES}
+
+    def read(self, start=None, end=None, ids=None):
+        """Event rows with start <= time <= end (of the given citizen ids), in append order."""
+        with self._lock:
+            segments = list(self._segments)
+        parts = []
+        for segment in segments:
+            if (start is not None and segment['t_max'] < start) or (end is not None and segment['t_min'] > end):
+                continue
+            data = self._columns(segment)
+            mask = np.ones(segment['rows'], dtype=bool)
+            if start is not None:
+                mask &= data['time'] >= start
+            if end is not None:
+                mask &= data['time'] <= end
+            if ids is not None:
+                mask &= np.isin(data['id'], np.asarray(ids, dtype=np.int64))
+            if mask.any():
+                parts.append({name: values[mask] for name, values in data.items()})
+        if not parts:
+            return pd.DataFrame({name: np.empty(0, dtype=dtype) for name, dtype in EVENT_DTYPES.items()})
+        return pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in EVENT_DTYPES})
+
+    def state_at(self, timestamp=None):
+        """
+        Replay: every citizen's last logged state at `timestamp` (latest if None), as
+        id, risk_category, present, urgency_score, updated_at (citizens removed by then are left out).
+        """
+        events = self.read(end=timestamp)
+        if events.empty:
+            return pd.DataFrame(columns=['id', 'risk_category', 'present', 'urgency_score', 'updated_at'])
+        ids = events['id'].to_numpy()
+        # Last row per id (first occurrence in the reversed rows), ordered by id
+        _, first_reversed = np.unique(ids[::-1], return_index=True)
+        latest = events.iloc[len(ids) - 1 - first_reversed]
+        latest = latest[(latest['flags'].to_numpy() & REMOVED) == 0]
+        return pd.DataFrame({
+            'id': latest['id'].to_numpy(),
+            'risk_category': _CATEGORY_NAMES[latest['category'].to_numpy().astype(int) + 1],
+            'present': latest['present'].to_numpy(),
+            'urgency_score': latest['score'].to_numpy(),
+            'updated_at': latest['time'].to_numpy(),
+        })
+
+    def latest_state(self):
+        """RankState at the end of the log (None if the log is empty), to resume diffing after a restart."""
+        state = self.state_at()
+        if state.empty:
+            return None
+        return RankState.from_ranked(state)
+
+    def timeline(self, citizen_id=None, start=None, end=None):
+        """Readable changes of one citizen (or all) between two timestamps, oldest first."""
+        ids = None if citizen_id is None else [citizen_id]
+        return describe_events(self.read(start=start, end=end, ids=ids))
+
+    def compact(self, max_rows=1_000_000):
+        """Merges runs of consecutive segments up to max_rows rows. Returns the segment count."""
+        with self._lock:
+            merged = []
+            run = []
+            for segment in self._segments + [None]:
+                if segment is not None and run and sum(s['rows'] for s in run) + segment['rows'] <= max_rows:
+                    run.append(segment)
+                    continue
+                if len(run) > 1:
+                    columns = [self._columns(s) for s in run]
+                    data = {name: np.concatenate([c[name] for c in columns]) for name in EVENT_DTYPES}
+                    merged.append(self._store(run[0]['first'], run[-1]['last'], data))
+                    for part in run:
+                        if part['path']:
+                            os.remove(part['path'])
+                elif run:
+                    merged.append(run[0])
+                run = [segment] if segment is not None else []
+            self._segments = merged
+            return len(merged)
+
+
+class RankChangeTracker:
+    """
+    Diffs each newly published SharedSnapshot against the previous one, appends the
+    changes to an EventLog and keeps the alerts raised for the dashboards.
+
+    An alert is raised when a present citizen reaches min_category (escalation, new
+    citizen) or a citizen at min_category or above becomes present. notify(alerts),
+    e.g. sms_alert_notifier(), is called with each new batch.
+    """
+
+    def __init__(self, log, min_category=ALERT_MIN_CATEGORY, notify=None, max_alerts=500):
+        self.log = log
+        self.min_code = CATEGORY_CODES.get(str(min_category).upper(), CATEGORY_CODES['CRITICAL'])
+        self.notify = notify
+        self.alerts = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+        # (version, data_version, ranking_version) of the last observed SharedSnapshot
+        self._last = None
+        # Resumes from the end of a persisted log, so changes during a restart are still detected
+        self._state = log.latest_state()
+
+    def observe(self, shared, data_diff=None):
+        """
+        Logs the changes of `shared` (ignored unless newer than the last observed version).
+        data_diff is the SnapshotDiff of its data version: when the data moved by exactly
+        that diff and the rankings and fires did not change, only its ids are compared.
+        Returns the new alerts.
+        """
+        with self._lock:
+            if self._last is not None and shared.version <= self._last[0]:
+                return []
+            with span("events.diff"):
+                curr = RankState.from_ranked(shared.ranked)
+                candidates = None
+                if (data_diff is not None and self._last is not None and self._state is not None
+                        and shared.data_version == self._last[1] + 1 and shared.ranking_version == self._last[2]
+                        and not data_diff.fires_changed):
+                    candidates = np.concatenate([
+                        np.asarray(ids, dtype=np.int64)
+                        for ids in (data_diff.added_ids, data_diff.removed_ids, data_diff.changed_ids)
+                    ])
+                events = diff_rank_states(self._state, curr, candidates)
+            now = time.time()
+            self.log.append(shared.version, now, events)
+            new_alerts = self._alerts(shared, now, events)
+            self.alerts.extend(new_alerts)
+            self._state = curr
+            self._last = (shared.version, shared.data_version, shared.ranking_version)
+
+        if new_alerts:
+            count("events.alerts", len(new_alerts))
+            if self.notify is not None:
+                try:
+                    self.notify(new_alerts)
+                except Exception as e:
+                    print(f"Alert notification failed: {e}")
+        return new_alerts
+
+    def _alerts(self, shared, now, events):
+        flags, category, present = events['flags'], events['category'], events['present']
+        reaching = (category >= self.min_code) & (present == 1)
+        raised = reaching & ((flags & (ESCALATED | ARRIVED | ADDED)) != 0)
+        if not raised.any():
+            return []
+        ids = events['id'][raised]
+        names = {}
+        if 'fullname' in shared.ranked.columns:
+            rows = shared.ranked.loc[shared.ranked['id'].isin(ids), ['id', 'fullname']]
+            names = dict(zip(rows['id'].tolist(), rows['fullname'].astype(str).tolist()))
+        alerts = []
+        for citizen_id, flag, prev, new in zip(ids.tolist(), flags[raised].tolist(),
+                                               events['prev_category'][raised].tolist(), category[raised].tolist()):
+            reason = 'escalated' if flag & ESCALATED else ('arrived' if flag & ARRIVED else 'new')
+            alerts.append({
+                'version': shared.version, 'time': now, 'id': citizen_id, 'fullname': names.get(citizen_id, ''),
+                'from': CATEGORIES[prev] if prev >= 0 else None, 'to': CATEGORIES[new], 'reason': reason,
+            })
+        return alerts
+
+    def since(self, version=0):
+        """Alerts raised for versions after `version`, oldest first."""
+        with self._lock:
+            return [alert for alert in self.alerts if alert['version'] > version]
+
+
+def sms_alert_notifier(recipients=ALERT_SMS_RECIPIENTS, queue=None, max_listed=5):
+    """
+    notify callback for RankChangeTracker: one SMS per alert batch through the durable
+    SmsQueue (the process-wide one and its SmsWorker by default; the queue's dedupe
+    window drops repeats).
+    """
+    state = {'queue': queue}
+
+    def notify(alerts):
+        if not recipients:
+            return
+        if state['queue'] is None:
+            state['queue'] = get_sms_queue()
+        listed = ", ".join(f"ID {a['id']} {a['fullname']} -> {a['to']}".replace("  ", " ") for a in alerts[:max_listed])
+        more = f" (+{len(alerts) - max_listed} more)" if len(alerts) > max_listed else ""
+        text = f"🚨 AIGIS: {len(alerts)} citizen(s) at higher risk: {listed}{more}"
+        state['queue'].enqueue([{'to': phone} for phone in recipients], text)
+
+    return notify
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from src.geo import fire_polygons, project_to_metres, distance_to_polygon, EARTH_RADIUS_M
+
+# Angular resolution of the per-fire spread-rate profile
+ANGLE_BINS = 72
+# Vertices per perimeter after arc-length resampling
+RESAMPLE_POINTS = 180
+
+
+def resample_perimeter(x, y, n_points=RESAMPLE_POINTS):
+    """Resamples a closed polygon to n_points vertices evenly spaced along its perimeter."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2:
+        return x, y
+    cx = np.append(x, x[0])
+    cy = np.append(y, y[0])
+    arc = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(cx), np.diff(cy)))])
+    if arc[-1] == 0:
+        return x, y
+    samples = np.linspace(0.0, arc[-1], n_points, endpoint=False)
+    return np.interp(samples, arc, cx), np.interp(samples, arc, cy)
+
+
+def _angle_bin(angle):
+    return ((angle + np.pi) / (2 * np.pi) * ANGLE_BINS).astype(int) % ANGLE_BINS
+
+
+def _fill_periodic(values, known):
+    """Fills unknown bins by periodic linear interpolation between the known ones."""
+    if known.all():
+        return values
+    if not known.any():
+        return np.zeros_like(values)
+    idx = np.flatnonzero(known)
+    return np.interp(np.arange(len(values)), idx, values[idx], period=len(values))
+
+
+class FireSpreadModel:
+    """
+    Per-fire outward spread-rate model estimated from successive perimeter snapshots.
+
+    For every consecutive pair of snapshots, each vertex of the newer (resampled)
+    perimeter gets a spread velocity = its distance outside the older perimeter / dt.
+    Velocities are binned by direction from the fire centroid into an angular
+    profile, and profiles of several pairs are blended with more weight on recent ones.
+    Perimeters are projected by moving every vertex radially at its direction's rate.
+    """
+
+    def __init__(self, fires):
+        # fire_id -> dict(ref=(lat, lon), x, y, centroid=(x, y), rates=np.ndarray[ANGLE_BINS] in m/s)
+        self.fires = fires
+
+    @classmethod
+    def fit(cls, snapshots, recency_decay=0.5):
+        """
+        Args:
+            snapshots: Sequence of (timestamp_s, fire_df) in chronological order.
+            recency_decay: Weight multiplier per step back in time when blending pairs.
+        """
+        snapshots = [(t, df) for t, df in snapshots if df is not None and not df.empty]
+        if not snapshots:
+            return cls({})
+
+        history = [(t, fire_polygons(df)) for t, df in snapshots]
+        fires = {}
+
+        for fire_id, (lat, lon) in history[-1][1].items():
+            ref = (float(lat.mean()), float(lon.mean()))
+            x, y = project_to_metres(lat, lon, *ref)
+            x, y = resample_perimeter(x, y)
+
+            rate_sum = np.zeros(ANGLE_BINS)
+            weight_sum = np.zeros(ANGLE_BINS)
+            weight = 1.0
+            for (t_old, old), (t_new, new) in reversed(list(zip(history[:-1], history[1:]))):
+                dt = t_new - t_old
+                if dt <= 0 or fire_id not in old or fire_id not in new:
+                    weight *= recency_decay
+                    continue
+                ox, oy = project_to_metres(*old[fire_id], *ref)
+                nx, ny = resample_perimeter(*project_to_metres(*new[fire_id], *ref))
+                # Vertices inside the older perimeter get 0: a fire is never assumed to retreat
+                speed = distance_to_polygon(nx, ny, ox, oy) / dt
+                bins = _angle_bin(np.arctan2(ny - ny.mean(), nx - nx.mean()))
+                counts = np.bincount(bins, minlength=ANGLE_BINS)
+                sums = np.bincount(bins, weights=speed, minlength=ANGLE_BINS)
+                seen = counts > 0
+                rate_sum[seen] += weight * sums[seen] / counts[seen]
+                weight_sum[seen] += weight
+                weight *= recency_decay
+
+            known = weight_sum > 0
+            rates = np.zeros(ANGLE_BINS)
+            rates[known] = rate_sum[known] / weight_sum[known]
+            fires[fire_id] = {
+                'ref': ref,
+                'x': x,
+                'y': y,
+                'centroid': (float(x.mean()), float(y.mean())),
+                'rates': _fill_periodic(rates, known),
+            }
+
+        return cls(fires)
+
+    @property
+    def max_rate(self):
+        """Fastest spread rate of any fire in any direction (m/s)."""
+        return max((float(f['rates'].max()) for f in self.fires.values()), default=0.0)
+
+    def _rate_towards(self, fire, x, y):
+        cx, cy = fire['centroid']
+        return fire['rates'][_angle_bin(np.arctan2(y - cy, x - cx))]
+
+    def project(self, seconds):
+        """
+        Projected perimeters `seconds` ahead, as a fire DataFrame (fire_id, lat, lon per vertex)
+        in the same shape as DataManager.load_fire_data_from_blob.
+        """
+        frames = []
+        for fire_id, fire in self.fires.items():
+            cx, cy = fire['centroid']
+            dx, dy = fire['x'] - cx, fire['y'] - cy
+            norm = np.hypot(dx, dy)
+            norm[norm == 0] = 1.0
+            step = self._rate_towards(fire, fire['x'], fire['y']) * seconds
+            px = fire['x'] + dx / norm * step
+            py = fire['y'] + dy / norm * step
+
+            ref_lat, ref_lon = fire['ref']
+            lat = ref_lat + np.degrees(py / EARTH_RADIUS_M)
+            lon = ref_lon + np.degrees(px / (EARTH_RADIUS_M * np.cos(np.radians(ref_lat))))
+            frames.append(pd.DataFrame({'fire_id': fire_id, 'lat': lat, 'lon': lon}))
+        if not frames:
+            return pd.DataFrame(columns=['fire_id', 'lat', 'lon'])
+        return pd.concat(frames, ignore_index=True)
+
+    def time_to_impact(self, lat, lon, horizon_s=6 * 3600):
+        """
+        Estimated seconds until the fire reaches each point (0 inside a perimeter,
+        np.inf if no fire gets there within horizon_s at its current rates).
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        result = np.full(len(lat), np.inf)
+
+        for fire in self.fires.values():
+            x, y = project_to_metres(lat, lon, *fire['ref'])
+            max_distance = float(fire['rates'].max()) * horizon_s
+            # Slab query: only points the fire can reach within the horizon are measured
+            dist = distance_to_polygon(x, y, fire['x'], fire['y'], max_distance=max_distance)
+            reachable = np.flatnonzero(np.isfinite(dist))
+            if len(reachable) == 0:
+                continue
+
+            rate = self._rate_towards(fire, x[reachable], y[reachable])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                eta = np.where(dist[reachable] == 0, 0.0, dist[reachable] / rate)
+            eta[~np.isfinite(eta) | (eta > horizon_s)] = np.inf
+            result[reachable] = np.minimum(result[reachable], eta)
+
+        return result
+
+
+def add_time_to_impact(citizens, fire_history, horizon_s=6 * 3600):
+    """
+    Returns a copy of citizens with a 'time_to_impact_min' column estimated from the
+    fire perimeter history (np.inf where no fire arrives within the horizon).
+    """
+    citizens = citizens.copy()
+    if citizens.empty:
+        return citizens
+    model = FireSpreadModel.fit(fire_history)
+    eta = model.time_to_impact(citizens['lat'].to_numpy(dtype=float), citizens['lon'].to_numpy(dtype=float), horizon_s)
+    citizens['time_to_impact_min'] = eta / 60.0
+    return citizens
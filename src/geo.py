@@ -0,0 +1,343 @@
+import numpy as np
+
+# Mean Earth radius (IUGG) in metres
+EARTH_RADIUS_M = 6371008.8
+
+# Upper bound on the size of the (points x segments) work arrays, so that
+# large candidate sets are processed in chunks instead of one huge allocation.
+_CHUNK_ELEMENTS = 262_144
+
+# Web Mercator ground resolution at zoom 0 on the equator (metres per pixel)
+_METRES_PER_PIXEL_Z0 = 156543.03392
+# Finest map zoom level that gets its own level of detail
+LOD_MAX_ZOOM = 18
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in metres between two sets of points.
+    Accepts scalars or arrays and broadcasts like any NumPy operation.
+    """
+    lat1 = np.radians(lat1)
+    lon1 = np.radians(lon1)
+    lat2 = np.radians(lat2)
+    lon2 = np.radians(lon2)
+
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lat, lon, lat2=None, lon2=None):
+    """
+    Pairwise distance matrix in metres.
+    With a single set of points returns the symmetric (n x n) matrix,
+    otherwise the (n x m) matrix between the two sets.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    if lat2 is None:
+        lat2, lon2 = lat, lon
+    lat2 = np.asarray(lat2, dtype=float)
+    lon2 = np.asarray(lon2, dtype=float)
+    return haversine_m(lat[:, None], lon[:, None], lat2[None, :], lon2[None, :])
+
+
+def project_to_metres(lat, lon, ref_lat, ref_lon):
+    """
+    Local equirectangular projection around (ref_lat, ref_lon).
+    Returns (x, y) in metres. Accurate to well under 1% at incident scale (tens of km),
+    which lets polygon maths run on plain Cartesian arrays.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    x = np.radians(lon - ref_lon) * EARTH_RADIUS_M * np.cos(np.radians(ref_lat))
+    y = np.radians(lat - ref_lat) * EARTH_RADIUS_M
+    return x, y
+
+
+def fire_polygons(fire_df):
+    """
+    Splits the flat fire DataFrame (fire_id, lat, lon per vertex) into
+    {fire_id: (lat_array, lon_array)} without a Python loop over vertices.
+    """
+    if fire_df is None or fire_df.empty:
+        return {}
+
+    fire_ids = fire_df['fire_id'].to_numpy()
+    lats = fire_df['lat'].to_numpy(dtype=float)
+    lons = fire_df['lon'].to_numpy(dtype=float)
+
+    # Stable sort keeps the vertex order of each perimeter intact
+    order = np.argsort(fire_ids, kind='stable')
+    ids_sorted = fire_ids[order]
+    unique_ids, starts = np.unique(ids_sorted, return_index=True)
+    bounds = np.append(starts, len(order))
+
+    polygons = {}
+    for i, fire_id in enumerate(unique_ids):
+        idx = order[bounds[i]:bounds[i + 1]]
+        polygons[fire_id] = (lats[idx], lons[idx])
+    return polygons
+
+
+def fire_bounds(fire_df):
+    """
+    Bounding box per fire as {fire_id: (lat_min, lat_max, lon_min, lon_max)}.
+    Uses the boxes cached in fire_df.attrs['bounds'] by add_fire_lod when present.
+    """
+    if fire_df is None or fire_df.empty:
+        return {}
+    cached = fire_df.attrs.get('bounds')
+    if cached is not None:
+        return cached
+    grouped = fire_df.groupby('fire_id')
+    lat = grouped['lat'].agg(['min', 'max'])
+    lon = grouped['lon'].agg(['min', 'max'])
+    return {
+        fire_id: (float(lat.at[fire_id, 'min']), float(lat.at[fire_id, 'max']),
+                  float(lon.at[fire_id, 'min']), float(lon.at[fire_id, 'max']))
+        for fire_id in lat.index
+    }
+
+
+def perimeter_significance(x, y, min_tolerance=0.0):
+    """
+    Douglas-Peucker significance of every vertex of a closed ring: the largest
+    tolerance at which the vertex survives simplification. Keeping the vertices with
+    significance >= t gives exactly the Douglas-Peucker result for tolerance t, so a
+    single pass serves every level of detail.
+
+    Splits whose deviation is <= min_tolerance are not refined further (their
+    vertices get 0). The three most significant vertices are always kept (np.inf).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    significance = np.zeros(n)
+    if n <= 3:
+        significance[:] = np.inf
+        return significance
+
+    cx = np.append(x, x[0])
+    cy = np.append(y, y[0])
+    far = int(np.argmax(np.hypot(x - x[0], y - y[0])))
+    stack = [(0, far, np.inf), (far, n, np.inf)]
+    while stack:
+        i, j, parent = stack.pop()
+        if j - i < 2:
+            continue
+        ex, ey = cx[j] - cx[i], cy[j] - cy[i]
+        seg_len2 = max(ex * ex + ey * ey, 1e-12)
+        deviation = _segment_distance(cx[i + 1:j], cy[i + 1:j], np.array([cx[i]]), np.array([cy[i]]),
+                                      np.array([ex]), np.array([ey]), seg_len2)
+        k = int(np.argmax(deviation))
+        if deviation[k] <= min_tolerance:
+            continue
+        # A vertex can never be more significant than the split that exposed it
+        value = min(float(deviation[k]), parent)
+        significance[i + 1 + k] = value
+        stack.append((i, i + 1 + k, value))
+        stack.append((i + 1 + k, j, value))
+
+    significance[0] = significance[far] = np.inf
+    significance[np.argsort(-significance, kind='stable')[:3]] = np.inf
+    return significance
+
+
+def metres_per_pixel(zoom, lat):
+    """Web Mercator ground resolution at the given zoom level and latitude."""
+    return _METRES_PER_PIXEL_Z0 * np.cos(np.radians(lat)) / 2.0 ** zoom
+
+
+def add_fire_lod(fire_df, pixel_tolerance=1.0, max_zoom=LOD_MAX_ZOOM):
+    """
+    Level-of-detail preprocessing of the flat fire DataFrame.
+
+    Adds per vertex:
+        'dp_error_m': Douglas-Peucker significance in metres (see perimeter_significance).
+        'min_zoom': Lowest map zoom at which the vertex moves the outline by at least
+                    pixel_tolerance pixels, i.e. where it has to be drawn.
+    and caches the per-fire bounding boxes in fire_df.attrs['bounds'].
+    """
+    if fire_df is None or fire_df.empty:
+        return fire_df
+
+    fire_df = fire_df.copy()
+    significance = np.zeros(len(fire_df))
+    fire_ids = fire_df['fire_id'].to_numpy()
+    for fire_id, (lat, lon) in fire_polygons(fire_df).items():
+        ref_lat = float(lat.mean())
+        x, y = project_to_metres(lat, lon, ref_lat, float(lon.mean()))
+        finest = pixel_tolerance * metres_per_pixel(max_zoom, ref_lat)
+        significance[fire_ids == fire_id] = perimeter_significance(x, y, min_tolerance=finest)
+
+    lat = fire_df['lat'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore'):
+        zoom = np.log2(pixel_tolerance * metres_per_pixel(0, lat) / significance)
+    fire_df['dp_error_m'] = significance
+    fire_df['min_zoom'] = np.clip(np.ceil(zoom), 0, max_zoom).astype(int)
+    fire_df.attrs['bounds'] = fire_bounds(fire_df)
+    return fire_df
+
+
+def fires_for_zoom(fire_df, zoom):
+    """Vertices needed to draw the fire perimeters at a map zoom level (all of them without LOD columns)."""
+    if fire_df is None or fire_df.empty or 'min_zoom' not in fire_df.columns:
+        return fire_df
+    return fire_df[fire_df['min_zoom'].to_numpy() <= int(np.ceil(zoom))]
+
+
+def fires_within_tolerance(fire_df, tolerance_m):
+    """Simplified perimeters that deviate from the originals by at most tolerance_m metres."""
+    if fire_df is None or fire_df.empty or not tolerance_m or 'dp_error_m' not in fire_df.columns:
+        return fire_df
+    return fire_df[fire_df['dp_error_m'].to_numpy() >= tolerance_m]
+
+
+def points_in_polygon(x, y, px, py):
+    """
+    Vectorized even-odd (ray casting) test.
+    x, y: point coordinates; px, py: polygon vertices (same projected plane).
+    Returns a boolean array, True where the point lies inside the polygon.
+
+    Points are sorted by y once, so each edge only touches the contiguous run of
+    points whose horizontal ray it can cross instead of every point.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    inside = np.zeros(len(x), dtype=bool)
+    if len(px) < 3 or len(x) == 0:
+        return inside
+
+    order = np.argsort(y, kind='stable')
+    xs, ys = x[order], y[order]
+    parity = np.zeros(len(x), dtype=bool)
+
+    x0, y0 = np.asarray(px, dtype=float), np.asarray(py, dtype=float)
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    # An edge straddles a ray at height y when min(y0, y1) <= y < max(y0, y1)
+    starts = np.searchsorted(ys, np.minimum(y0, y1), side='left')
+    ends = np.searchsorted(ys, np.maximum(y0, y1), side='left')
+
+    for i in np.flatnonzero(ends > starts):
+        s, e = starts[i], ends[i]
+        x_cross = x0[i] + (ys[s:e] - y0[i]) * (x1[i] - x0[i]) / (y1[i] - y0[i])
+        parity[s:e] ^= xs[s:e] < x_cross
+
+    inside[order] = parity
+    return inside
+
+
+def _segment_distance(x, y, ax, ay, ex, ey, seg_len2):
+    """Distance from points (x, y) to the segments starting at (ax, ay) with direction (ex, ey)."""
+    dx = x[:, None] - ax
+    dy = y[:, None] - ay
+    t = np.clip((dx * ex + dy * ey) / seg_len2, 0.0, 1.0)
+    dx -= t * ex
+    dy -= t * ey
+    return np.sqrt((dx * dx + dy * dy).min(axis=1))
+
+
+def distance_to_polygon(x, y, px, py, max_distance=None):
+    """
+    Distance from each point to the polygon boundary, in the units of the inputs.
+    Points inside the polygon get distance 0.
+
+    If max_distance is given, distances beyond it are reported as np.inf. Points are
+    then sorted by x and each edge is only compared with the slab of points within
+    max_distance of it, which keeps radius queries far below points x edges work.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    dist = np.full(len(x), np.inf)
+    if len(x) == 0 or len(px) == 0:
+        return dist
+
+    inside = points_in_polygon(x, y, px, py)
+    dist[inside] = 0.0
+    outside = np.flatnonzero(~inside)
+    if len(outside) == 0:
+        return dist
+
+    # Segment i goes from vertex i to vertex i+1 (closing back to vertex 0)
+    ax = np.asarray(px, dtype=float)
+    ay = np.asarray(py, dtype=float)
+    ex = np.roll(ax, -1) - ax
+    ey = np.roll(ay, -1) - ay
+    seg_len2 = ex * ex + ey * ey
+    seg_len2 = np.where(seg_len2 > 0, seg_len2, 1.0)
+
+    ox, oy = x[outside], y[outside]
+
+    if max_distance is None:
+        # Exhaustive, chunked to bound the size of the work arrays
+        step = max(1, _CHUNK_ELEMENTS // len(ax))
+        out = np.empty(len(outside))
+        for start in range(0, len(outside), step):
+            sl = slice(start, start + step)
+            out[sl] = _segment_distance(ox[sl], oy[sl], ax, ay, ex, ey, seg_len2)
+        dist[outside] = out
+        return dist
+
+    # Slab query: points sorted by x, each edge scans only its expanded x-range
+    order = np.argsort(ox, kind='stable')
+    xs, ys = ox[order], oy[order]
+    best = np.full(len(outside), np.inf)
+    lo = np.searchsorted(xs, np.minimum(ax, ax + ex) - max_distance, side='left')
+    hi = np.searchsorted(xs, np.maximum(ax, ax + ex) + max_distance, side='right')
+
+    for i in np.flatnonzero(hi > lo):
+        s, e = lo[i], hi[i]
+        d = _segment_distance(xs[s:e], ys[s:e], ax[i:i + 1], ay[i:i + 1],
+                              ex[i:i + 1], ey[i:i + 1], seg_len2[i:i + 1])
+        np.minimum(best[s:e], d, out=best[s:e])
+
+    best[best > max_distance] = np.inf
+    out = np.empty(len(outside))
+    out[order] = best
+    dist[outside] = out
+    return dist
+
+
+def distance_to_fires_m(lat, lon, fire_df, max_distance_m=None, tolerance_m=None):
+    """
+    Distance in metres from each point to the nearest fire perimeter (0 if inside one).
+
+    If max_distance_m is given, points whose distance exceeds it are only guaranteed
+    to be reported as np.inf: a bounding-box prefilter skips the exact per-segment
+    computation for everything that cannot be within range.
+    If tolerance_m is given and fire_df has LOD columns (add_fire_lod), the simplified
+    perimeters are used; distances are then exact to within tolerance_m.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    result = np.full(len(lat), np.inf)
+    bounds = fire_bounds(fire_df)
+
+    for fire_id, (poly_lat, poly_lon) in fire_polygons(fires_within_tolerance(fire_df, tolerance_m)).items():
+        lat_min, lat_max, lon_min, lon_max = bounds[fire_id]
+        ref_lat = float(poly_lat.mean())
+        ref_lon = float(poly_lon.mean())
+
+        # 1. Cheap bounding-box prefilter in degrees (expanded by the search radius)
+        candidates = np.arange(len(lat))
+        if max_distance_m is not None:
+            pad_lat = np.degrees(max_distance_m / EARTH_RADIUS_M)
+            pad_lon = pad_lat / max(np.cos(np.radians(ref_lat)), 1e-6)
+            in_box = ((lat >= lat_min - pad_lat) & (lat <= lat_max + pad_lat)
+                      & (lon >= lon_min - pad_lon) & (lon <= lon_max + pad_lon))
+            candidates = np.flatnonzero(in_box)
+            if len(candidates) == 0:
+                continue
+        px, py = project_to_metres(poly_lat, poly_lon, ref_lat, ref_lon)
+
+        # 2. Exact distance for the remaining candidates
+        x, y = project_to_metres(lat[candidates], lon[candidates], ref_lat, ref_lon)
+        dist = distance_to_polygon(x, y, px, py, max_distance=max_distance_m)
+        result[candidates] = np.minimum(result[candidates], dist)
+
+    if max_distance_m is not None:
+        result[result > max_distance_m] = np.inf
+    return result
+
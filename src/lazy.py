@@ -0,0 +1,108 @@
+"""
+Deferred imports of the heavy SDKs (folium, openai, Azure Storage / Speech, pydub).
+
+    folium = lazy_module("folium")                        # imported on first folium.Map(...)
+    AzureOpenAI = lazy_attribute("openai", "AzureOpenAI")  # imported on first call
+
+The proxies stay plain module attributes, so tests can still patch e.g.
+src.ai.AzureOpenAI. Each first import is timed as the 'import.<module>' span.
+prewarm() imports modules from a daemon thread, so they are usually loaded by
+the time a user first needs them.
+"""
+import importlib
+import sys
+import threading
+from src.metrics import span
+
+
+def import_module(name):
+    """
+    importlib.import_module, timed on first import. Thread-safe: while another thread
+    (e.g. prewarm) is still importing the module, importlib waits for it to finish.
+    """
+    if name in sys.modules:
+        return importlib.import_module(name)
+    with span(f"import.{name}"):
+        return importlib.import_module(name)
+
+
+class LazyModule:
+    """Module proxy: the module is imported on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+class LazyAttribute:
+    """Proxy of a class or function of a module: imported on first call or attribute access."""
+
+    def __init__(self, module_name, attr):
+        self._module_name = module_name
+        self._attr = attr
+        self._target = None
+
+    def load(self):
+        if self._target is None:
+            self._target = getattr(import_module(self._module_name), self._attr)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<lazy {self._module_name}.{self._attr}>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def lazy_attribute(module_name, attr):
+    return LazyAttribute(module_name, attr)
+
+
+# SDKs only needed after a user action (chat, voice, blob refresh), in prewarm order
+PREWARM_MODULES = (
+    "openai",
+    "azure.storage.blob",
+    "azure.cognitiveservices.speech",
+    "pydub",
+)
+
+
+def prewarm(modules=PREWARM_MODULES, hooks=()):
+    """
+    Imports modules (then runs hooks, e.g. client constructors) in a daemon thread.
+    Failures are only logged: the first real use imports again and reports the error.
+    """
+    def run():
+        for name in modules:
+            try:
+                import_module(name)
+            except Exception as e:
+                print(f"Prewarm of '{name}' failed: {e}")
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Prewarm hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -1,33 +1,60 @@
-import streamlit as st
 import numpy as np
-import requests
 import pandas as pd
-from src.config import RANKING_API_URL
+from src.config import RANKING_MODE, TTI_CRITICAL_MIN, TTI_HIGH_MIN
+from src.metrics import count, span, timed
+from src.ranking_model import get_ranking_model
+from src.rankings import get_ranking_cache
+
+# Risk categories, lowest first. Their rank orders the list (MEDIUM from the API counts as
+# LOW, anything else ranks below LOW); the event log and replay use the same ordering.
+RISK_CATEGORIES = ('LOW', 'HIGH', 'CRITICAL')
+CATEGORY_RANK = {**{name: rank for rank, name in enumerate(RISK_CATEGORIES, start=1)}, 'MEDIUM': 1}
+
+
+def category_rank(values):
+    """Rank of each risk_category value (CRITICAL 3, HIGH 2, LOW/MEDIUM 1, other or missing 0), as int8."""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    # One lookup per distinct value; code -1 (missing) maps to the trailing 0
+    table = np.array([CATEGORY_RANK.get(str(u).upper(), 0) for u in uniques] + [0], dtype=np.int8)
+    return table[codes]
+
+
+def rank_order(df):
+    """
+    df in ranking order: category, then urgency score, both descending. The sort is
+    stable, so ties keep their input order and a re-sort never reshuffles them.
+    """
+    if df.empty or 'risk_category' not in df.columns or 'urgency_score' not in df.columns:
+        return df
+    order = np.lexsort((-df['urgency_score'].to_numpy(dtype=float), -category_rank(df['risk_category'])))
+    return df.iloc[order]
+
 
-@st.cache_data
 def fetch_rankings_from_api():
     """
-    Fetches ranking data from the external Azure Function API.
-    Returns a list of dicts or None if failed.
+    Latest rankings of the external Azure Function API, without waiting for it:
+    the last good response is served and refreshed in the background (stale-while-revalidate).
+    Returns a list of dicts or None if no rankings were fetched yet.
     """
-    try:
-        response = requests.get(RANKING_API_URL, timeout=10)
-        response.raise_for_status()
-        print("Successfully fetched rankings from API.")
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching rankings: {e}")
-        return None
-
-def apply_ranking_logic(df):
+    return get_ranking_cache().get()
+
+@timed("ranking.apply")
+def apply_ranking_logic(df, mode=None):
     """
     Applies ranking logic:
-    1. Tries to fetch from API.
+    1. Tries to fetch from API (unless mode is "model").
     2. If successful, merges API data (risk_category, ai_score).
-    3. If failed, falls back to local 'danger_level' and derives category.
+       In "hybrid" mode citizens missing from the API are scored by the local model.
+    3. If failed, falls back to the local ranking model ("model"/"hybrid" mode)
+       or to local 'danger_level' and derives category. Sharded citizens are only
+       merged with API rows that carry their 'shard_id'; otherwise the model ranks them.
     4. Returns sorted DataFrame.
+
+    mode defaults to RANKING_MODE ("api", "model" or "hybrid").
     """
-    api_data = fetch_rankings_from_api()
+    mode = mode or RANKING_MODE
+    api_data = fetch_rankings_from_api() if mode != 'model' else None
+    model = get_ranking_model() if mode in ('model', 'hybrid') else None
     
     # Initialize columns
     df['risk_category'] = 'Low'
@@ -37,35 +64,55 @@ def apply_ranking_logic(df):
         # --- API SUCCESS PATH ---
         # Convert API list to DataFrame for easier merging
         ranking_df = pd.DataFrame(api_data)
-        
+
+        # Region shards namespace 'id': the API knows citizens by their municipal 'source_id',
+        # which repeats across shards, so an API row only matches together with its 'shard_id'
+        sharded = 'source_id' in df.columns
+        key = 'source_id' if sharded else 'id'
+        keys = ['shard_id', key] if sharded else [key]
+
+        if sharded and 'shard_id' not in ranking_df.columns:
+            print("API rankings carry no 'shard_id' for the sharded citizens. Falling back to the local model.")
+            api_data = None # Trigger fallback
+            model = model or get_ranking_model()
         # Ensure we have 'id' for merging
-        if 'id' in ranking_df.columns:
+        elif 'id' in ranking_df.columns:
             # FORCE INTEGER IDs for merging
             # Coerce errors='coerce' turns non-ints into NaN, then we fill with 0 and cast to int
             # This handles cases where ID might be "P-101" (test data) vs 101 (real data)
-            
+            ranking_df = ranking_df.rename(columns={'id': key})
+
             # 1. Clean Local DF 'id'
             # Remove non-digit characters if it's a string, or just cast if simple
             # Simple approach: try pd.to_numeric first
-            df['id'] = pd.to_numeric(df['id'], errors='coerce').fillna(0).astype(int)
+            df[key] = pd.to_numeric(df[key], errors='coerce').fillna(0).astype(int)
             
             # 2. Clean API DF 'id'
-            ranking_df['id'] = pd.to_numeric(ranking_df['id'], errors='coerce').fillna(0).astype(int)
+            ranking_df[key] = pd.to_numeric(ranking_df[key], errors='coerce').fillna(0).astype(int)
 
             # Merge logic
             # We left join to keep all citizens even if API misses some (though it shouldn't)
             # Suffixes: _local (original), _api (new)
-            merged = df.merge(ranking_df, on='id', how='left', suffixes=('', '_api'))
+            with span("ranking.api_merge"):
+                merged = df.merge(ranking_df, on=keys, how='left', suffixes=('', '_api'))
             
             # Update risk_category and urgency_score from API columns
             # API returns 'risk_category' (e.g. "CRITICAL", "Low") and 'ai_score'
             
             # Fill NaNs for rows not in API (fallback to safe defaults)
+            unranked = merged['ai_score'].isna().to_numpy()
             merged['risk_category'] = merged['risk_category_api'].fillna('Low')
             merged['urgency_score'] = merged['ai_score'].fillna(0.0)
             
             # Normalize risk category (Uppercase)
             merged['risk_category'] = merged['risk_category'].astype(str).str.upper()
+
+            # Hybrid: the local model ranks the citizens the API has not seen (yet)
+            if model is not None and unranked.any():
+                with span("ranking.model"):
+                    scores = model.score(merged.iloc[np.flatnonzero(unranked)])
+                merged.loc[unranked, 'urgency_score'] = scores
+                merged.loc[unranked, 'risk_category'] = model.categories(scores)
             
             # Clean up temporary columns if any
             if 'risk_category_api' in merged.columns:
@@ -74,13 +121,23 @@ def apply_ranking_logic(df):
                 del merged['ai_score']
                 
             df = merged
+            count("ranking.path.api")
         else:
             print("API response missing 'id' column. Falling back.")
             api_data = None # Trigger fallback
 
-    if not api_data:
+    if not api_data and model is not None:
+        # --- LOCAL MODEL PATH ---
+        # Batch inference over the whole frame
+        with span("ranking.model"):
+            scores = model.score(df)
+        count("ranking.path.model")
+        df['urgency_score'] = scores
+        df['risk_category'] = model.categories(scores)
+    elif not api_data:
         # --- FALLBACK PATH ---
         print("Using local fallback logic.")
+        count("ranking.path.fallback")
         if 'danger_level' in df.columns:
             # Map danger_level to risk_category
             # Thresholds: >75 Critical, >50 High, else Low
@@ -98,24 +155,40 @@ def apply_ranking_logic(df):
             df['urgency_score'] = 0.0
             df['risk_category'] = 'LOW'
 
+    # Fire time-to-impact (from the spread projection) can only raise a citizen's priority
+    if 'time_to_impact_min' in df.columns:
+        df = apply_time_to_impact(df, boost_score=not api_data)
+
     # Sorting Logic
     # We want Critical first, then High, then Low.
-    # Within categories, sort by urgency_score descending.
-    
-    # Create a helper for category sort order
-    cat_order = {'CRITICAL': 3, 'HIGH': 2, 'LOW': 1, 'MEDIUM': 1} # Handle potentially other values
-    
-    # Create a temporary rank column
-    df['cat_rank'] = df['risk_category'].map(lambda x: cat_order.get(x.upper(), 0))
-    
-    # Sort by Category Rank (desc), then Score (desc)
-    df = df.sort_values(by=['cat_rank', 'urgency_score'], ascending=[False, False])
-    
-    # Drop temp column
-    df = df.drop(columns=['cat_rank'])
+    # Within categories, sort by urgency_score descending (stable, see rank_order).
+    with span("ranking.sort"):
+        df = rank_order(df)
     
     return df
 
+@timed("ranking.time_to_impact")
+def apply_time_to_impact(df, boost_score=True):
+    """
+    Escalates risk using the projected fire arrival time ('time_to_impact_min'):
+    fire within TTI_CRITICAL_MIN -> CRITICAL, within TTI_HIGH_MIN -> at least HIGH.
+    With boost_score (local ranking scale 0-100) the urgency score is raised to
+    100 * exp(-tti / TTI_HIGH_MIN) when that is higher.
+    """
+    tti = df['time_to_impact_min'].to_numpy(dtype=float)
+    tti = np.where(np.isnan(tti), np.inf, tti)
+
+    upper = df['risk_category'].astype(str).str.upper().to_numpy()
+    category = df['risk_category'].to_numpy(dtype=object).copy()
+    category[tti <= TTI_CRITICAL_MIN] = 'CRITICAL'
+    category[(tti > TTI_CRITICAL_MIN) & (tti <= TTI_HIGH_MIN) & ~np.isin(upper, ['CRITICAL', 'HIGH'])] = 'HIGH'
+    df['risk_category'] = category
+
+    if boost_score:
+        boost = 100.0 * np.exp(-tti / TTI_HIGH_MIN)
+        df['urgency_score'] = np.maximum(df['urgency_score'].to_numpy(dtype=float), boost)
+    return df
+
 # Deprecated but kept for compatibility if imported elsewhere temporarily
 def calculate_urgency_score(df, fire_lat, fire_lon):
     return apply_ranking_logic(df)
\ No newline at end of file
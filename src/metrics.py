@@ -0,0 +1,233 @@
+"""
+Lightweight instrumentation: span timers, counters and size observations.
+
+    with span("map.build"):
+        ...
+    count("ranking.path.api")
+    observe("blob.bytes", len(payload))
+    cache_hit("snapshot_store", hit)
+
+Collection is off unless METRICS_ENABLED is set (or enabled from the ops panel).
+While off, span() returns a shared no-op context manager and the other calls return
+after one attribute check, so instrumented code pays well under a microsecond.
+
+Recent samples are kept per name (bounded), for percentiles in the ops panel, the
+JSON metrics file and the Prometheus text endpoint.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from src.config import METRICS_ENABLED
+
+# Percentiles reported for spans and sizes
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Series:
+    """Count, sum and the most recent samples of one span or size."""
+    __slots__ = ('count', 'total', 'samples')
+
+    def __init__(self, reservoir):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=reservoir)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def summary(self):
+        values = np.fromiter(self.samples, dtype=float)
+        quantiles = np.quantile(values, QUANTILES) if len(values) else [np.nan] * len(QUANTILES)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": float(values.max()) if len(values) else np.nan,
+            **{f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, quantiles)},
+        }
+
+
+class Metrics:
+    """Process-wide registry (thread-safe: Streamlit sessions run in threads)."""
+
+    def __init__(self, enabled=METRICS_ENABLED, reservoir=1024):
+        self.enabled = enabled
+        self.reservoir = reservoir
+        self.started_at = time.time()
+        self._spans = {}
+        self._sizes = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """Context manager timing a stage (seconds)."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator version of span()."""
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            wrapper.__wrapped__ = fn
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        with self._lock:
+            series = self._spans.get(name)
+            if series is None:
+                series = self._spans[name] = _Series(self.reservoir)
+            series.add(seconds)
+
+    def observe(self, name, value):
+        """Records a size (e.g. payload bytes)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._sizes.get(name)
+            if series is None:
+                series = self._sizes[name] = _Series(self.reservoir)
+            series.add(float(value))
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def cache_hit(self, cache, hit):
+        """Counts a lookup of a cache as '<cache>.hit' or '<cache>.miss'."""
+        self.count(f"{cache}.hit" if hit else f"{cache}.miss")
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._sizes.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def summary(self):
+        """Spans (seconds), sizes, counters and cache hit rates as plain dicts."""
+        with self._lock:
+            spans = {name: series.summary() for name, series in sorted(self._spans.items())}
+            sizes = {name: series.summary() for name, series in sorted(self._sizes.items())}
+            counters = dict(sorted(self._counters.items()))
+
+        hit_rates = {}
+        for name in counters:
+            if name.endswith('.hit') or name.endswith('.miss'):
+                cache = name.rsplit('.', 1)[0]
+                hits = counters.get(f"{cache}.hit", 0)
+                lookups = hits + counters.get(f"{cache}.miss", 0)
+                hit_rates[cache] = {"hit_rate": hits / lookups, "lookups": lookups}
+        return {
+            "enabled": self.enabled,
+            "started_at": self.started_at,
+            "spans": spans,
+            "sizes": sizes,
+            "counters": counters,
+            "cache_hit_rates": hit_rates,
+        }
+
+    def write_file(self, path):
+        """Writes summary() as JSON (atomically, like the local replicas)."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2, default=float)
+        os.replace(tmp_path, path)
+        return path
+
+    def prometheus_text(self, prefix="aigis"):
+        """Prometheus text exposition format (spans and sizes as summaries)."""
+        data = self.summary()
+        lines = []
+
+        def summary_lines(metric, label, series, help_text):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+            for name, stats in series.items():
+                for q in QUANTILES:
+                    value = stats[f"p{int(q * 100)}"]
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q}"}} {value:.9g}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {stats["sum"]:.9g}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {stats["count"]}')
+
+        summary_lines(f"{prefix}_span_seconds", "span", data["spans"], "Stage latency")
+        summary_lines(f"{prefix}_size", "name", data["sizes"], "Payload sizes")
+        lines.append(f"# HELP {prefix}_events_total Event counters")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in data["counters"].items():
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+# Module-level shortcuts on the process-wide registry
+span = metrics.span
+timed = metrics.timed
+observe = metrics.observe
+count = metrics.count
+cache_hit = metrics.cache_hit
+
+
+def start_metrics_server(port, host="127.0.0.1", registry=metrics):
+    """Serves registry.prometheus_text() on http://host:port/metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # No access log on stderr
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics endpoint on http://{host}:{server.server_address[1]}/metrics")
+    return server
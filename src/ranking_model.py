@@ -0,0 +1,170 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from src.config import RANKING_MODEL_PATH
+from src.notes import FLAG_BITS, NOTE_FLAGS, note_features
+
+# Distance from danger (metres) at which the proximity feature reaches 0
+PROXIMITY_RANGE_M = 3000.0
+
+
+def _column(df, name):
+    """Numeric column as float64 (zeros if the column is missing, NaN -> 0)."""
+    if name not in df.columns:
+        return np.zeros(len(df))
+    values = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+    return np.nan_to_num(values, nan=0.0)
+
+
+def _proximity(df):
+    # 1 at the danger, 0 from PROXIMITY_RANGE_M on (and when the distance is unknown)
+    if 'distance_from_danger' not in df.columns:
+        return np.zeros(len(df))
+    distance = pd.to_numeric(df['distance_from_danger'], errors='coerce').to_numpy(dtype=float)
+    return np.nan_to_num(1.0 - np.clip(distance / PROXIMITY_RANGE_M, 0.0, 1.0), nan=0.0)
+
+
+def _note_flag(name):
+    bit = FLAG_BITS[name]
+    return lambda df: ((note_features(df)['note_flags'].to_numpy() & bit) != 0).astype(float)
+
+
+# Numeric features: name -> function(df) -> float array scaled to about [0, 1]
+# The note_* features use the structured note columns of src.notes (extracted when absent):
+# severity, crew size, and one 0/1 feature per note flag (note_machine_support, note_bedridden, ...)
+NUMERIC_FEATURES = {
+    'vulnerability': lambda df: np.clip(_column(df, 'vulnerability_score') / 10.0, 0.0, 1.0),
+    'life_support': lambda df: (_column(df, 'life_support') != 0).astype(float),
+    'proximity': _proximity,
+    'danger_level': lambda df: np.clip(_column(df, 'danger_level') / 100.0, 0.0, 1.0),
+    'note_severity': lambda df: note_features(df)['note_severity'].to_numpy(dtype=float) / 4.0,
+    'note_crew': lambda df: np.clip((note_features(df)['required_crew'].to_numpy(dtype=float) - 1.0) / 2.0, 0.0, 1.0),
+    **{f'note_{name}': _note_flag(name) for name in NOTE_FLAGS},
+}
+
+
+def extract_features(df, feature_names):
+    """
+    Feature matrix (len(df) x len(feature_names), float32) for a model.
+
+    Names are NUMERIC_FEATURES keys. Missing source columns give zero features, so any
+    citizen frame can be scored.
+    """
+    unknown = [name for name in feature_names if name not in NUMERIC_FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown ranking features: {', '.join(unknown)}")
+    X = np.empty((len(df), len(feature_names)), dtype=np.float32)
+    for j, name in enumerate(feature_names):
+        X[:, j] = NUMERIC_FEATURES[name](df)
+    return X
+
+
+class RankingModel(ABC):
+    """
+    Interface of a local ranking model.
+
+    Subclasses set feature_names and implement
+    predict(X) -> urgency scores on the 0-100 scale of the ranking API. Risk
+    categories follow from the score with the model's thresholds.
+    """
+
+    feature_names = ()
+    # (category, minimum score exclusive), highest first; anything below is LOW
+    thresholds = (('CRITICAL', 75.0), ('HIGH', 50.0))
+
+    @abstractmethod
+    def predict(self, X):
+        """Urgency scores (0-100) of the rows of a feature matrix from extract_features."""
+
+    def score(self, df):
+        """Urgency scores (float64, 0-100) of every row of df, in one batch."""
+        return self.predict(extract_features(df, self.feature_names)).astype(float)
+
+    def categories(self, scores):
+        category = np.full(len(scores), 'LOW', dtype=object)
+        # Lowest threshold first, so higher categories overwrite it
+        for name, minimum in reversed(self.thresholds):
+            category[scores > minimum] = name
+        return category
+
+
+class LinearRankingModel(RankingModel):
+    """
+    score = clip(X @ weights + bias, 0, 100).
+
+    Portable format (JSON):
+        {"type": "linear", "features": [...], "weights": [...], "bias": 0.0,
+         "thresholds": {"CRITICAL": 75, "HIGH": 50}}
+    """
+
+    def __init__(self, feature_names, weights, bias=0.0, thresholds=None):
+        if len(feature_names) != len(weights):
+            raise ValueError("Linear ranking model needs one weight per feature")
+        unknown = [name for name in feature_names if name not in NUMERIC_FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown ranking features: {', '.join(unknown)}")
+        self.feature_names = tuple(feature_names)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        if thresholds:
+            self.thresholds = tuple(sorted(((k, float(v)) for k, v in thresholds.items()), key=lambda t: -t[1]))
+
+    def predict(self, X):
+        return np.clip(X @ self.weights + self.bias, 0.0, 100.0)
+
+    @classmethod
+    def fit(cls, df, target, feature_names, **kwargs):
+        """Least-squares fit of the weights to known scores (e.g. the API's ai_score)."""
+        X = extract_features(df, feature_names).astype(float)
+        design = np.column_stack([X, np.ones(len(X))])
+        coef, *_ = np.linalg.lstsq(design, np.asarray(target, dtype=float), rcond=None)
+        return cls(feature_names, coef[:-1], coef[-1], **kwargs)
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec['features'], spec['weights'], spec.get('bias', 0.0), spec.get('thresholds'))
+
+    def to_dict(self):
+        return {
+            "type": "linear",
+            "features": list(self.feature_names),
+            "weights": [round(float(w), 6) for w in self.weights],
+            "bias": self.bias,
+            "thresholds": dict(self.thresholds),
+        }
+
+
+# Model types of the portable format: "type" -> class with from_dict(spec)
+MODEL_TYPES = {
+    'linear': LinearRankingModel,
+}
+
+
+def load_ranking_model(path):
+    """Loads a model exported in the portable JSON format."""
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    model_type = spec.get('type', 'linear')
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"Unsupported ranking model type: {model_type}")
+    return MODEL_TYPES[model_type].from_dict(spec)
+
+
+_ranking_model = None
+_ranking_model_loaded = False
+_ranking_model_lock = threading.Lock()
+
+
+def get_ranking_model():
+    """Process-wide model from RANKING_MODEL_PATH (None if it cannot be loaded)."""
+    global _ranking_model, _ranking_model_loaded
+    with _ranking_model_lock:
+        if not _ranking_model_loaded:
+            _ranking_model_loaded = True
+            try:
+                _ranking_model = load_ranking_model(RANKING_MODEL_PATH)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Could not load ranking model '{RANKING_MODEL_PATH}': {e}")
+        return _ranking_model
@@ -0,0 +1,124 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from src.config import RANKING_API_URL, RANKING_TIMEOUT_S, RANKING_TTL_S
+from src.metrics import cache_hit, span
+from src.resilience import get_breaker, default_replica
+
+RANKINGS_REPLICA_KEY = "rankings"
+
+
+class RankingCache:
+    """
+    Stale-while-revalidate cache of the ranking API response.
+
+    get() never waits for the network: it returns the last good rankings (from
+    memory, or from the local replica after a restart) and, once they are older
+    than ttl_s, starts a single background refresh. The refresh uses a pooled HTTP
+    session, a bounded timeout and the 'ranking' circuit breaker; on failure the
+    stale rankings simply stay in place.
+
+    `version` moves only when a refresh brings different rankings, so consumers
+    (the snapshot store) re-rank only on real changes.
+    """
+
+    def __init__(self, url=RANKING_API_URL, ttl_s=RANKING_TTL_S, timeout_s=RANKING_TIMEOUT_S,
+                 fetch=None, replica=default_replica, retry_s=5.0):
+        self.url = url
+        self.ttl_s = ttl_s
+        self.retry_s = retry_s
+        self.timeout_s = timeout_s
+        self.replica = replica
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._fetch = fetch or self._fetch_from_api
+        self._lock = threading.Lock()
+        self._refreshing = None  # Running refresh thread, if any
+        self._last_attempt = 0.0
+
+        # Cold start: the last good rankings from the replica, marked with their original age
+        self.data, self.fetched_at = replica.load(RANKINGS_REPLICA_KEY)
+        self.version = 1 if self.data is not None else 0
+        self.last_error = None
+
+    def _fetch_from_api(self):
+        response = self.session.get(self.url, timeout=self.timeout_s)
+        response.raise_for_status()
+        return response.json()
+
+    @property
+    def age_s(self):
+        """Seconds since the rankings were fetched (None if there are none)."""
+        return time.time() - self.fetched_at if self.fetched_at is not None else None
+
+    @property
+    def is_stale(self):
+        return self.fetched_at is None or self.age_s >= self.ttl_s
+
+    def get(self):
+        """Last good rankings (list of dicts) or None, immediately; revalidates in the background when stale."""
+        stale = self.is_stale
+        cache_hit("rankings", not stale)
+        if stale:
+            self.revalidate()
+        return self.data
+
+    def current_version(self):
+        """Rankings version, revalidating in the background when stale."""
+        self.get()
+        return self.version
+
+    def revalidate(self):
+        """
+        Starts a background refresh unless one is running or the last attempt was less
+        than retry_s ago. Returns the refresh thread (None if none was started).
+        """
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+            if time.time() - self._last_attempt < self.retry_s:
+                return None
+            self._last_attempt = time.time()
+            self._refreshing = threading.Thread(target=self.refresh, name="ranking-refresh", daemon=True)
+            self._refreshing.start()
+            return self._refreshing
+
+    def refresh(self):
+        """One synchronous fetch. Returns True if new rankings were published."""
+        try:
+            with span("rankings.fetch"):
+                data = get_breaker("ranking").call(self._fetch)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error fetching rankings (serving rankings {self._age_text()}): {e}")
+            return False
+
+        self.replica.save(RANKINGS_REPLICA_KEY, data)
+        with self._lock:
+            self.last_error = None
+            self.fetched_at = time.time()
+            if data == self.data:
+                return False
+            self.data = data
+            self.version += 1
+        print("Successfully fetched rankings from API.")
+        return True
+
+    def _age_text(self):
+        return f"{self.age_s:.0f}s old" if self.age_s is not None else "from the local model"
+
+
+_ranking_cache = None
+_ranking_cache_lock = threading.Lock()
+
+
+def get_ranking_cache():
+    """Process-wide RankingCache."""
+    global _ranking_cache
+    with _ranking_cache_lock:
+        if _ranking_cache is None:
+            _ranking_cache = RankingCache()
+        return _ranking_cache
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+import pandas as pd
+from src.blod_util import download_json_from_blob
+from src.config import CITIZEN_BLOB_NAME, FIRE_BLOB_NAME, REFRESH_INTERVAL_S, FIRE_HISTORY_LENGTH
+from src.data import DataManager
+
+
+@dataclass(frozen=True)
+class SnapshotDiff:
+    """What changed between two snapshot versions (citizen ids and whether any fire perimeter moved)."""
+    added_ids: tuple = ()
+    removed_ids: tuple = ()
+    changed_ids: tuple = ()
+    fires_changed: bool = False
+
+    @property
+    def is_empty(self):
+        return not (self.added_ids or self.removed_ids or self.changed_ids or self.fires_changed)
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    One published version of the live data.
+    Snapshots are never modified after publication: consumers must copy before mutating.
+    """
+    version: int
+    citizens: pd.DataFrame
+    fires: pd.DataFrame
+    created_at: float
+    diff: SnapshotDiff = field(default_factory=SnapshotDiff)
+    # Recent (timestamp, fire_df) perimeters, oldest first, for the spread projection
+    fire_history: tuple = ()
+
+
+def diff_citizens(old, new, key='id'):
+    """
+    Vectorized comparison of two citizen frames aligned on their id.
+    Returns (added_ids, removed_ids, changed_ids) as tuples.
+    """
+    if new.empty:
+        removed = () if old is None or old.empty else tuple(old[key].tolist())
+        return (), removed, ()
+    if old is None or old.empty:
+        return tuple(new[key].tolist()), (), ()
+
+    old_indexed = old.set_index(key)
+    new_indexed = new.set_index(key)
+
+    added = new_indexed.index.difference(old_indexed.index)
+    removed = old_indexed.index.difference(new_indexed.index)
+    common = new_indexed.index.intersection(old_indexed.index)
+
+    if list(old_indexed.columns) != list(new_indexed.columns):
+        # Schema change: every surviving citizen is reported as changed
+        changed = common
+    else:
+        before = old_indexed.loc[common]
+        after = new_indexed.loc[common]
+        differs = (before.to_numpy() != after.to_numpy()) & ~(before.isna().to_numpy() & after.isna().to_numpy())
+        changed = common[differs.any(axis=1)]
+
+    return tuple(added.tolist()), tuple(removed.tolist()), tuple(changed.tolist())
+
+
+def drop_duplicate_ids(df, key='id'):
+    """(df without repeated ids, number of rows dropped); the last row of an id wins."""
+    if df.empty or key not in df.columns:
+        return df, 0
+    duplicated = df[key].duplicated(keep='last').to_numpy()
+    dropped = int(duplicated.sum())
+    return (df[~duplicated] if dropped else df), dropped
+
+
+def load_live_citizens():
+    return DataManager.citizens_from_json(download_json_from_blob(CITIZEN_BLOB_NAME))
+
+
+def load_live_fires():
+    return DataManager.fires_from_json(download_json_from_blob(FIRE_BLOB_NAME))
+
+
+class RefreshService(threading.Thread):
+    """
+    Background poller of the citizen and fire sources.
+
+    Each poll is diffed against the current snapshot; a new immutable DataSnapshot
+    (version + 1) is published only when something actually changed. The UI reads
+    latest() on a timer and redraws when the version moves.
+    """
+
+    def __init__(self, load_citizens=load_live_citizens, load_fires=load_live_fires,
+                 interval_s=REFRESH_INTERVAL_S):
+        super().__init__(name="data-refresh", daemon=True)
+        self.load_citizens = load_citizens
+        self.load_fires = load_fires
+        self.interval_s = interval_s
+        self._snapshot = DataSnapshot(0, pd.DataFrame(), pd.DataFrame(), time.time())
+        self._publish_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._fire_history = deque(maxlen=FIRE_HISTORY_LENGTH)
+        self.last_error = None
+
+    def latest(self):
+        """Current snapshot. Reading a single attribute is atomic, so no lock is needed."""
+        return self._snapshot
+
+    def refresh_once(self):
+        """
+        Polls both sources once. Returns the (possibly unchanged) latest snapshot.
+        On a source error the previous snapshot stays in place.
+        """
+        try:
+            citizens = self.load_citizens()
+            fires = self.load_fires()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Data refresh failed, keeping snapshot v{self._snapshot.version}: {e}")
+            return self._snapshot
+
+        with self._publish_lock:
+            current = self._snapshot
+            if current.version > 0 and citizens.empty and not current.citizens.empty:
+                # An empty download is treated as a glitch, not as "everyone left"
+                self.last_error = None
+                return current
+
+            try:
+                # Everything downstream (diffs, selection, dispatch, event log) is keyed by id
+                citizens, dropped = drop_duplicate_ids(citizens)
+                if dropped:
+                    print(f"Data refresh: dropped {dropped} citizen rows with a duplicate id")
+                added, removed, changed = diff_citizens(current.citizens, citizens)
+                diff = SnapshotDiff(
+                    added_ids=added,
+                    removed_ids=removed,
+                    changed_ids=changed,
+                    fires_changed=not current.fires.equals(fires)
+                )
+            except Exception as e:
+                self.last_error = f"Invalid data: {e}"
+                print(f"Data refresh failed, keeping snapshot v{current.version}: {self.last_error}")
+                return current
+
+            self.last_error = None
+            if current.version > 0 and diff.is_empty:
+                return current
+
+            now = time.time()
+            if diff.fires_changed:
+                self._fire_history.append((now, fires))
+            self._snapshot = DataSnapshot(current.version + 1, citizens, fires, now, diff, tuple(self._fire_history))
+            print(f"Published data snapshot v{self._snapshot.version} "
+                  f"(+{len(added)} / -{len(removed)} / ~{len(changed)} citizens, fires changed: {diff.fires_changed})")
+            return self._snapshot
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            try:
+                self.refresh_once()
+            except Exception as e:
+                # The thread must outlive any bad poll, or the dashboards freeze silently
+                self.last_error = str(e)
+                print(f"Data refresh failed unexpectedly: {e}")
+
+    def stop(self):
+        self._stop_event.set()
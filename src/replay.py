@@ -0,0 +1,246 @@
+"""
+Time-indexed history of the published snapshots, for incident replay.
+
+Every SharedSnapshot version the data plane publishes is recorded either as a
+keyframe (the full ranked frame, which carries the citizen columns, and the fire
+perimeters) or as a delta against the previous version: the rows added or changed,
+the ids removed, and the fire perimeters only when they moved. A keyframe is written
+every `keyframe_interval` versions (and whenever the columns change), so any moment
+is rebuilt from one keyframe and at most keyframe_interval - 1 deltas, applied at once:
+
+    history.at(timestamp) -> HistoricalSnapshot(version, recorded_at, ranked, fires)
+
+Records are pickled under `directory` (kept in memory when it is empty) as
+{seq}-{time in ms}-v{version}-{key|delta}.pkl, so the time index is rebuilt from the
+file names alone. Keyframe groups beyond max_keyframes are deleted, oldest first.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from src.config import HISTORY_DIR, HISTORY_KEYFRAME_INTERVAL, HISTORY_MAX_KEYFRAMES
+from src.logic import rank_order
+from src.metrics import cache_hit, observe, span
+
+_RECORD_NAME = re.compile(r"(\d{8})-(\d{13})-v(\d+)-(key|delta)\.pkl$")
+
+
+@dataclass(frozen=True)
+class HistoricalSnapshot:
+    """Ranked citizens and fire perimeters as published at one recorded version (read-only frames)."""
+    version: int
+    recorded_at: float
+    ranked: pd.DataFrame
+    fires: pd.DataFrame
+
+
+def changed_rows(prev, curr, key='id'):
+    """
+    (positions of the rows of curr added or changed since prev, ids of prev missing from curr).
+    Rows are aligned on their id by a hash lookup and compared column by column (and by
+    row label, so a rebuilt frame is identical), vectorized.
+    """
+    prev_ids = prev[key].to_numpy()
+    curr_ids = curr[key].to_numpy()
+    lookup = pd.Index(prev_ids).get_indexer(curr_ids)
+    differs = lookup < 0
+    common = np.flatnonzero(~differs)
+    pairs = [(curr.index.to_series(), prev.index.to_series())]
+    pairs += [(curr[column], prev[column]) for column in curr.columns]
+    for after, before in pairs:
+        # Compared as Series, so string columns stay in their native (Arrow) arrays
+        after = after.iloc[common].reset_index(drop=True)
+        before = before.iloc[lookup[common]].reset_index(drop=True)
+        unequal = after.ne(before)
+        if unequal.any():
+            # Missing on both sides is no change
+            unequal &= ~(after.isna() & before.isna())
+            differs[common[unequal.to_numpy()]] = True
+    removed = prev_ids[pd.Index(curr_ids).get_indexer(prev_ids) < 0]
+    return np.flatnonzero(differs), removed
+
+
+class SnapshotHistory:
+    """
+    Keyframe + delta store of the published versions with random access by timestamp.
+    Rebuilt versions are cached, so scrubbing forward applies only the new deltas.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, keyframe_interval=HISTORY_KEYFRAME_INTERVAL,
+                 max_keyframes=HISTORY_MAX_KEYFRAMES, cache_size=4):
+        self.directory = directory or None
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.max_keyframes = max_keyframes
+        self.cache_size = cache_size
+        self._entries = []  # dicts: seq, version, time, kind, path, record (in memory only)
+        self._times = []    # time of each entry, for bisect
+        self._loaded = OrderedDict()   # seq -> record read from disk
+        self._rebuilt = OrderedDict()  # seq -> HistoricalSnapshot
+        self._last = None   # (version, ranked, fires) of the last recorded version
+        self._since_keyframe = 0
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_index()
+
+    def _load_index(self):
+        for name in sorted(os.listdir(self.directory)):
+            match = _RECORD_NAME.match(name)
+            if match:
+                self._entries.append({'seq': int(match[1]), 'time': int(match[2]) / 1000, 'version': int(match[3]),
+                                      'kind': match[4], 'path': os.path.join(self.directory, name), 'record': None})
+        # Deltas are only readable after their keyframe
+        while self._entries and self._entries[0]['kind'] != 'key':
+            self._entries.pop(0)
+        self._times = [entry['time'] for entry in self._entries]
+        if self._entries:
+            self._next_seq = self._entries[-1]['seq'] + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def moments(self):
+        """(version, recorded_at) of every recorded version, oldest first."""
+        with self._lock:
+            return [(entry['version'], entry['time']) for entry in self._entries]
+
+    def record(self, shared, recorded_at=None):
+        """
+        Records a published SharedSnapshot, as a keyframe or as a delta against the
+        previously recorded version. Returns 'key' or 'delta' (None if already recorded).
+        """
+        ranked, fires = shared.ranked, shared.fires
+        with self._lock:
+            last = self._last
+            if last is not None and last[0] == shared.version:
+                return None
+            # Timestamps stay increasing, so the index can be bisected
+            recorded_at = max(recorded_at or time.time(), self._times[-1] if self._times else 0.0)
+            keyframe = (last is None or self._since_keyframe + 1 >= self.keyframe_interval
+                        or not last[1].dtypes.equals(ranked.dtypes))
+            with span("history.record"):
+                if keyframe:
+                    record = {'rows': ranked, 'removed': np.empty(0, dtype=np.int64), 'fires': fires}
+                else:
+                    positions, removed = changed_rows(last[1], ranked)
+                    record = {'rows': ranked.iloc[positions], 'removed': removed,
+                              'fires': None if last[2].equals(fires) else fires}
+                self._append(shared.version, recorded_at, 'key' if keyframe else 'delta', record)
+            self._since_keyframe = 0 if keyframe else self._since_keyframe + 1
+            self._last = (shared.version, ranked, fires)
+            if keyframe:
+                self._prune()
+        observe("history.rows", len(record['rows']))
+        return 'key' if keyframe else 'delta'
+
+    def _append(self, version, recorded_at, kind, record):
+        entry = {'seq': self._next_seq, 'version': version, 'time': recorded_at, 'kind': kind,
+                 'path': None, 'record': None}
+        self._next_seq += 1
+        if self.directory is None:
+            entry['record'] = record
+        else:
+            name = f"{entry['seq']:08d}-{int(recorded_at * 1000):013d}-v{version}-{kind}.pkl"
+            entry['path'] = os.path.join(self.directory, name)
+            # Written under a temporary name and renamed, like the local replicas
+            tmp_path = f"{entry['path']}.{os.getpid()}.tmp"
+            pd.to_pickle(record, tmp_path)
+            os.replace(tmp_path, entry['path'])
+            # Reading it back right after (playback of the live edge) needs no disk access
+            self._loaded[entry['seq']] = record
+            self._trim(self._loaded, self.keyframe_interval + 1)
+        self._entries.append(entry)
+        self._times.append(recorded_at)
+
+    def _prune(self):
+        keyframes = [i for i, entry in enumerate(self._entries) if entry['kind'] == 'key']
+        if len(keyframes) <= self.max_keyframes:
+            return
+        cut = keyframes[len(keyframes) - self.max_keyframes]
+        for entry in self._entries[:cut]:
+            if entry['path'] and os.path.exists(entry['path']):
+                os.remove(entry['path'])
+            self._loaded.pop(entry['seq'], None)
+            self._rebuilt.pop(entry['seq'], None)
+        del self._entries[:cut]
+        del self._times[:cut]
+
+    @staticmethod
+    def _trim(cache, size):
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+    def _record(self, entry):
+        if entry['record'] is not None:
+            return entry['record']
+        record = self._loaded.get(entry['seq'])
+        if record is None:
+            record = pd.read_pickle(entry['path'])
+            self._loaded[entry['seq']] = record
+            self._trim(self._loaded, self.keyframe_interval + 1)
+        return record
+
+    def at(self, timestamp=None):
+        """HistoricalSnapshot current at `timestamp` (the latest if None; None before the first record)."""
+        with self._lock:
+            i = len(self._entries) - 1 if timestamp is None else bisect.bisect_right(self._times, timestamp) - 1
+            if i < 0:
+                return None
+            target = self._entries[i]
+            cached = self._rebuilt.get(target['seq'])
+            cache_hit("history.at", cached is not None)
+            if cached is not None:
+                self._rebuilt.move_to_end(target['seq'])
+                return cached
+
+            # From the keyframe, or from a version of the same group rebuilt earlier
+            start = i
+            while self._entries[start]['kind'] != 'key':
+                start -= 1
+            base = None
+            for j in range(i - 1, start - 1, -1):
+                if self._entries[j]['seq'] in self._rebuilt:
+                    base, start = self._rebuilt[self._entries[j]['seq']], j + 1
+                    break
+            with span("history.rebuild"):
+                records = [self._record(entry) for entry in self._entries[start:i + 1]]
+                snapshot = self._rebuild(base, records, target)
+            self._rebuilt[target['seq']] = snapshot
+            self._trim(self._rebuilt, self.cache_size)
+            return snapshot
+
+    @staticmethod
+    def _rebuild(base, records, target):
+        if base is None:
+            ranked, fires = records[0]['rows'], records[0]['fires']
+            records = records[1:]
+        else:
+            ranked, fires = base.ranked, base.fires
+
+        ids = np.concatenate([np.empty(0, dtype=np.int64)] + [
+            np.concatenate([r['rows']['id'].to_numpy(dtype=np.int64), np.asarray(r['removed'], dtype=np.int64)])
+            for r in records
+        ])
+        if len(ids):
+            rows = pd.concat([r['rows'] for r in records])
+            # Position of each id's row in `rows`, -1 for a removal
+            row_positions = np.concatenate([
+                np.concatenate([offset + np.arange(len(r['rows'])), np.full(len(r['removed']), -1)])
+                for r, offset in zip(records, np.cumsum([0] + [len(r['rows']) for r in records[:-1]]))
+            ])
+            # The last delta touching an id wins: its row, or its removal
+            _, first_reversed = np.unique(ids[::-1], return_index=True)
+            latest = row_positions[len(ids) - 1 - first_reversed]
+            latest = np.sort(latest[latest >= 0])
+            ranked = rank_order(pd.concat([ranked[~ranked['id'].isin(ids)], rows.iloc[latest]]))
+
+        for record in records:
+            if record['fires'] is not None:
+                fires = record['fires']
+        return HistoricalSnapshot(target['version'], target['time'], ranked, fires)
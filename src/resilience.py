@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from src.config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_S, REPLICA_DIR
+
+# Circuit breaker states
+CLOSED = "CLOSED"        # Upstream healthy: calls go through
+OPEN = "OPEN"            # Upstream considered down: calls fail fast
+HALF_OPEN = "HALF_OPEN"  # Reset timeout elapsed: one probe call is let through
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail in
+    microseconds instead of waiting for a timeout. After reset_timeout_s a single
+    probe call is allowed (HALF_OPEN): success closes the circuit, failure opens it
+    for another reset_timeout_s.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout_s=BREAKER_RESET_S):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return CLOSED
+        if time.time() - self.opened_at >= self.reset_timeout_s:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self):
+        """True if a call may go to the upstream now."""
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.last_error = None
+            self._probing = False
+
+    def release_probe(self):
+        """Gives back a half-open probe slot that was not used for an upstream call."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    print(f"Circuit '{self.name}' opened after {self.failures} failure(s): {error}")
+                self.opened_at = time.time()
+            self._probing = False
+
+    def call(self, fn, *args, **kwargs):
+        """Runs fn through the breaker. Raises CircuitOpenError without calling fn while open."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} unavailable (circuit open): {self.last_error}")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Process-wide breaker for a dependency name (e.g. 'blob', 'ranking', 'openai')."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+class LocalReplica:
+    """
+    Last good response of each upstream, kept as JSON files on local disk.
+    Writes go to a temporary file and are renamed into place, so a crash never
+    leaves a half-written replica behind.
+    """
+
+    def __init__(self, directory=REPLICA_DIR):
+        self.directory = directory
+
+    def _path(self, key):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in key)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def save(self, key, data):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"saved_at": time.time(), "data": data}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not write replica '{key}': {e}")
+
+    def load(self, key):
+        """Returns (data, saved_at), or (None, None) if there is no usable replica."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            return stored["data"], stored["saved_at"]
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+
+default_replica = LocalReplica()
+
+# Dependencies currently served from their replica: name -> replica saved_at
+_degraded = {}
+
+
+def resilient_call(name, fn, replica_key=None, fallback=None, replica=None):
+    """
+    Calls an upstream with fail-fast and graceful degradation:
+    1. If the dependency's circuit is open, the upstream is skipped entirely.
+    2. Otherwise fn() is called; a success refreshes the local replica (if replica_key).
+    3. On failure the last good replica is returned, then fallback() if given.
+    4. With neither, the upstream error (or CircuitOpenError) is raised.
+    """
+    replica = replica or default_replica
+    breaker = get_breaker(name)
+    try:
+        result = breaker.call(fn)
+    except Exception as e:
+        error = e
+    else:
+        _degraded.pop(name, None)
+        if replica_key is not None:
+            replica.save(replica_key, result)
+        return result
+
+    if replica_key is not None:
+        data, saved_at = replica.load(replica_key)
+        if saved_at is not None:
+            _degraded[name] = saved_at
+            return data
+    if fallback is not None:
+        _degraded[name] = None
+        return fallback()
+    raise error
+
+
+def health_report():
+    """State of every dependency seen so far, for the UI / ops views."""
+    report = []
+    for name, breaker in sorted(_breakers.items()):
+        degraded = name in _degraded
+        saved_at = _degraded.get(name)
+        report.append({
+            "dependency": name,
+            "state": breaker.state,
+            "failures": breaker.failures,
+            "last_error": breaker.last_error,
+            "degraded": degraded or breaker.state != CLOSED,
+            "replica_age_s": round(time.time() - saved_at) if saved_at else None,
+        })
+    return report
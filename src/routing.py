@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from src.config import RESCUER_LAT, RESCUER_LON
+from src.geo import haversine_matrix
+
+# Urgency tiers visited in this order; anything else goes in the last tier
+ROUTE_TIERS = [['CRITICAL'], ['HIGH']]
+
+
+def nearest_neighbour_path(dist, start, stops):
+    """Greedy path from node `start` through all `stops` (indices into dist), always to the closest unvisited stop."""
+    remaining = np.asarray(stops, dtype=int)
+    path = []
+    current = start
+    while len(remaining):
+        nearest = int(np.argmin(dist[current, remaining]))
+        current = remaining[nearest]
+        path.append(current)
+        remaining = np.delete(remaining, nearest)
+    return path
+
+
+def two_opt(dist, start, path, max_passes=50):
+    """
+    Improves an open path with a fixed start node by reversing segments (2-opt).
+    Each pass evaluates, for every segment start i, all segment ends j in one vectorized step.
+    """
+    route = np.array([start] + list(path), dtype=int)
+    m = len(route) - 1
+    if m < 3:
+        return list(path)
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, m):
+            a, b = route[i - 1], route[i]
+            js = np.arange(i + 1, m + 1)
+            c = route[js]
+            # Open path: reversing up to the last stop has no outgoing edge to repair
+            d = route[np.minimum(js + 1, m)]
+            tail = np.where(js < m, dist[b, d] - dist[c, d], 0.0)
+            delta = dist[a, c] - dist[a, b] + tail
+
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-6:
+                j = js[best]
+                route[i:j + 1] = route[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+
+    return route[1:].tolist()
+
+
+def plan_route(citizens, start_lat=RESCUER_LAT, start_lon=RESCUER_LON, max_stops=25):
+    """
+    Plans the visit order of a rescue team over the top risk-ranked present citizens.
+
+    Urgency decides the tier order (CRITICAL, then HIGH, then the rest) and travel
+    distance the order within a tier: each tier is routed with nearest-neighbour plus
+    2-opt, starting from where the previous tier ended.
+
+    Args:
+        citizens: Ranked DataFrame (as returned by apply_ranking_logic, highest priority first).
+        start_lat, start_lon: Rescuer position.
+        max_stops: Number of top-ranked present citizens to include.
+
+    Returns:
+        DataFrame of the stops in visit order with 'stop_order', 'leg_m' and 'cumulative_m' columns.
+    """
+    if citizens is None or citizens.empty:
+        return pd.DataFrame()
+
+    if 'present' in citizens.columns:
+        candidates = citizens[citizens['present'].to_numpy() != 0]
+    else:
+        candidates = citizens
+    candidates = candidates.head(max_stops)
+    if candidates.empty:
+        return pd.DataFrame()
+
+    # Node 0 is the rescuer, node k (k >= 1) is candidates.iloc[k - 1]
+    lats = np.concatenate([[start_lat], candidates['lat'].to_numpy(dtype=float)])
+    lons = np.concatenate([[start_lon], candidates['lon'].to_numpy(dtype=float)])
+    dist = haversine_matrix(lats, lons)
+
+    categories = candidates['risk_category'].astype(str).str.upper().to_numpy() \
+        if 'risk_category' in candidates.columns else np.full(len(candidates), '')
+    tier_of = np.full(len(candidates), len(ROUTE_TIERS))
+    for tier, names in enumerate(ROUTE_TIERS):
+        tier_of[np.isin(categories, names) & (tier_of == len(ROUTE_TIERS))] = tier
+
+    order = []
+    current = 0
+    for tier in range(len(ROUTE_TIERS) + 1):
+        stops = np.flatnonzero(tier_of == tier) + 1
+        if len(stops) == 0:
+            continue
+        path = two_opt(dist, current, nearest_neighbour_path(dist, current, stops))
+        order.extend(path)
+        current = path[-1]
+
+    nodes = np.array(order)
+    legs = dist[np.concatenate([[0], nodes[:-1]]), nodes]
+
+    route = candidates.iloc[nodes - 1].copy()
+    route['stop_order'] = np.arange(1, len(nodes) + 1)
+    route['leg_m'] = legs
+    route['cumulative_m'] = np.cumsum(legs)
+    return route
@@ -0,0 +1,218 @@
+import bisect
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+
+# Distance bands over 'distance_from_danger' (metres): (label, lower bound, upper bound)
+DISTANCE_BANDS = [
+    ("< 500 m", 0, 500),
+    ("500 m - 1 km", 500, 1000),
+    ("1 - 2 km", 1000, 2000),
+    ("> 2 km", 2000, np.inf),
+]
+
+_TOKEN_SPLIT = re.compile(r"\W+")
+
+
+def _build_accent_table():
+    """str.translate table mapping accented Latin/Greek letters to their base letter."""
+    table = {}
+    for codepoint in range(0x80, 0x2000):
+        char = chr(codepoint)
+        if unicodedata.combining(char):
+            table[codepoint] = None
+            continue
+        base = "".join(c for c in unicodedata.normalize("NFD", char) if not unicodedata.combining(c))
+        if base and base != char:
+            table[codepoint] = base
+    return table
+
+
+_ACCENT_TABLE = _build_accent_table()
+
+
+def normalize_text(text):
+    """
+    Accent- and case-insensitive form of a (Greek or Latin) string.
+    'Μπείτε' -> 'μπειτε', 'ΣΟΒΑΡΆ' -> 'σοβαρα', final sigma folds to 'σ'.
+    """
+    if not isinstance(text, str):
+        return ""
+    return " ".join(text.translate(_ACCENT_TABLE).casefold().split())
+
+
+def _group_postings(key_parts, id_parts):
+    """
+    Groups (key, id) pairs into CSR-style posting lists.
+    Returns (sorted unique keys, offsets, ids) where the ids of keys[i] are
+    ids[offsets[i]:offsets[i + 1]], sorted and unique.
+    """
+    empty = ([], np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64))
+    if not key_parts:
+        return empty
+    keys = pd.concat(key_parts, ignore_index=True)
+    ids = np.concatenate(id_parts).astype(np.int64)
+    if len(keys) == 0:
+        return empty
+
+    key_codes, key_values = pd.factorize(keys, sort=True)
+    order = np.lexsort((ids, key_codes))
+    key_codes, ids = key_codes[order], ids[order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[1:] = (key_codes[1:] != key_codes[:-1]) | (ids[1:] != ids[:-1])
+    key_codes, ids = key_codes[keep], ids[keep]
+    offsets = np.searchsorted(key_codes, np.arange(len(key_values) + 1))
+    return list(key_values), offsets, ids
+
+
+class SubstringIndex:
+    """
+    Prefix and substring index over one text column.
+
+    Values are factorized first, so repetitive columns (like 'notes') are indexed once
+    per distinct value. Substring queries of 3+ characters intersect trigram posting
+    lists and verify only the surviving candidates; shorter queries use a sorted token
+    list for prefix matching.
+    """
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        self.codes = codes
+
+        # Normalize each distinct value once, with vectorized string ops
+        texts = pd.Series(uniques, dtype=object).where(lambda v: v.map(type) == str, "")
+        texts = (texts.astype(str).str.translate(_ACCENT_TABLE).str.casefold()
+                 .str.replace(r"\s+", " ", regex=True).str.strip())
+        self.texts = texts.tolist()
+
+        # Trigram postings: one vectorized slice per character offset
+        lengths = texts.str.len().to_numpy()
+        gram_parts, id_parts = [], []
+        for offset in range(int(lengths.max(initial=0)) - 2):
+            has_gram = np.flatnonzero(lengths >= offset + 3)
+            gram_parts.append(texts.iloc[has_gram].str.slice(offset, offset + 3))
+            id_parts.append(has_gram)
+        grams, self.gram_offsets, self.gram_ids = _group_postings(gram_parts, id_parts)
+        self.gram_lookup = {gram: i for i, gram in enumerate(grams)}
+
+        # Whole-token postings, sorted by token for prefix (range) lookups
+        tokens = texts.str.split(_TOKEN_SPLIT).explode()
+        tokens = tokens[tokens.notna() & (tokens != "")]
+        self.tokens, self.token_offsets, self.token_ids = _group_postings([tokens], [tokens.index.to_numpy()])
+
+    def _matching_text_ids(self, query):
+        if len(query) < 3:
+            # Prefix match on whole tokens: contiguous range in the sorted token list
+            lo = bisect.bisect_left(self.tokens, query)
+            hi = bisect.bisect_left(self.tokens, query + "\uffff")
+            return np.unique(self.token_ids[self.token_offsets[lo]:self.token_offsets[hi]])
+
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        if any(gram not in self.gram_lookup for gram in grams):
+            return np.empty(0, dtype=np.int64)
+        lists = [
+            self.gram_ids[self.gram_offsets[k]:self.gram_offsets[k + 1]]
+            for k in (self.gram_lookup[gram] for gram in grams)
+        ]
+
+        # Intersect the shortest posting lists first
+        lists.sort(key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+
+        if len(query) == 3:
+            return candidates
+        return np.array([i for i in candidates if query in self.texts[i]], dtype=np.int64)
+
+    def search(self, query):
+        """Boolean row mask of values containing the (normalized) query."""
+        query = normalize_text(query)
+        if not query:
+            return np.ones(len(self.codes), dtype=bool)
+
+        matched = np.zeros(len(self.texts) + 1, dtype=bool)
+        matched[self._matching_text_ids(query)] = True
+        # Code -1 (missing value) maps to the trailing False slot
+        return matched[self.codes]
+
+
+class CitizenIndex:
+    """
+    Query layer over the ranked citizen DataFrame.
+
+    Precomputes one boolean bitmap per risk category, flag and distance band, plus
+    substring indexes over 'fullname' and 'notes'. A filter combination is resolved
+    with bitmap AND/OR operations and returns row positions in the frame's order
+    (which is the ranking order of processed_data).
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self._all = np.ones(self.size, dtype=bool)
+
+        if 'risk_category' in df.columns:
+            codes, categories = pd.factorize(df['risk_category'].astype(str).str.upper())
+            self.category_bitmaps = {cat: codes == i for i, cat in enumerate(categories)}
+        else:
+            self.category_bitmaps = {}
+
+        self.flag_bitmaps = {}
+        for flag in ('present', 'life_support'):
+            if flag in df.columns:
+                self.flag_bitmaps[flag] = df[flag].fillna(0).to_numpy() != 0
+
+        self.band_bitmaps = {}
+        if 'distance_from_danger' in df.columns:
+            distance = df['distance_from_danger'].to_numpy(dtype=float)
+            for label, lower, upper in DISTANCE_BANDS:
+                self.band_bitmaps[label] = (distance >= lower) & (distance < upper)
+
+        self.text_indexes = {
+            column: SubstringIndex(df[column].to_numpy())
+            for column in ('fullname', 'notes') if column in df.columns
+        }
+
+    def query(self, categories=None, life_support=None, bands=None, text=None, present_only=True):
+        """
+        Returns the row positions matching all given filters.
+
+        Args:
+            categories: Iterable of risk categories (any of them matches).
+            life_support: True/False to require/exclude life support, None for either.
+            bands: Iterable of DISTANCE_BANDS labels (any of them matches).
+            text: Substring searched in fullname and notes (accent/case-insensitive).
+            present_only: Keep only present citizens.
+        """
+        mask = self._all.copy()
+
+        if present_only and 'present' in self.flag_bitmaps:
+            mask &= self.flag_bitmaps['present']
+
+        if categories:
+            mask &= self._any_of(self.category_bitmaps, [str(c).upper() for c in categories])
+
+        if life_support is not None and 'life_support' in self.flag_bitmaps:
+            bitmap = self.flag_bitmaps['life_support']
+            mask &= bitmap if life_support else ~bitmap
+
+        if bands:
+            mask &= self._any_of(self.band_bitmaps, bands)
+
+        if text and text.strip() and self.text_indexes:
+            text_mask = np.zeros(self.size, dtype=bool)
+            for index in self.text_indexes.values():
+                text_mask |= index.search(text)
+            mask &= text_mask
+
+        return np.flatnonzero(mask)
+
+    def _any_of(self, bitmaps, keys):
+        combined = np.zeros(self.size, dtype=bool)
+        for key in keys:
+            if key in bitmaps:
+                combined |= bitmaps[key]
+        return combined
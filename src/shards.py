@@ -0,0 +1,234 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from src.blod_util import download_json_from_blob
+from src.config import (DEFAULT_LAT, DEFAULT_LON, REFRESH_INTERVAL_S, SHARD_MANIFEST_BLOB,
+                        SHARD_AREA_RADIUS_M, SHARD_MEMORY_BUDGET_MB)
+from src.data import DataManager
+from src.geo import EARTH_RADIUS_M
+
+
+def area_around(lat, lon, radius_m):
+    """Bounding box (lat_min, lat_max, lon_min, lon_max) of a circle of radius_m around a point."""
+    pad_lat = np.degrees(radius_m / EARTH_RADIUS_M)
+    pad_lon = pad_lat / max(np.cos(np.radians(lat)), 1e-6)
+    return (lat - pad_lat, lat + pad_lat, lon - pad_lon, lon + pad_lon)
+
+
+def bbox_from_map_bounds(bounds):
+    """Converts st_folium's {'_southWest': {lat, lng}, '_northEast': {lat, lng}} to a bounding box."""
+    if not bounds or not bounds.get('_southWest') or not bounds.get('_northEast'):
+        return None
+    south_west, north_east = bounds['_southWest'], bounds['_northEast']
+    if south_west.get('lat') is None or north_east.get('lat') is None:
+        return None
+    return (south_west['lat'], north_east['lat'], south_west['lng'], north_east['lng'])
+
+
+def shard_namespace(shard_id):
+    """Stable 31-bit namespace of a shard id (the same in every process, unlike hash())."""
+    return zlib.crc32(shard_id.encode('utf-8')) & 0x7FFFFFFF
+
+
+def namespace_ids(citizens, shard_id):
+    """
+    Citizens of one shard with an 'id' unique across shards, (namespace << 32) | municipal id,
+    so selection, dispatch and the event log never mix up citizens of different shards.
+    The municipal id is kept as 'source_id' (the ranking API is matched on it and the shard id).
+    """
+    source_ids = pd.to_numeric(citizens['id'], errors='raise').to_numpy(dtype=np.int64)
+    if ((source_ids < 0) | (source_ids >= 1 << 32)).any():
+        raise ValueError(f"Shard {shard_id}: citizen ids must be in [0, 2**32)")
+    return citizens.assign(source_id=source_ids, id=(np.int64(shard_namespace(shard_id)) << 32) | source_ids)
+
+
+@dataclass(frozen=True)
+class ShardInfo:
+    """One region shard of the dataset as listed in the manifest."""
+    shard_id: str
+    citizens_blob: str
+    fires_blob: str = None
+    bbox: tuple = (-90.0, 90.0, -180.0, 180.0)  # (lat_min, lat_max, lon_min, lon_max)
+    incident: bool = False  # Shards with an active incident are loaded regardless of the viewport
+
+
+class ShardManifest:
+    """
+    Index of the region shards.
+
+    Manifest JSON:
+        {"shards": [{"id": "attica-east", "citizens_blob": "...", "fires_blob": "...",
+                     "bbox": [lat_min, lat_max, lon_min, lon_max], "incident": true}, ...]}
+
+    Bounding boxes are kept as arrays, so an area query is one vectorized comparison.
+    """
+
+    def __init__(self, shards):
+        self.shards = list(shards)
+        boxes = np.array([shard.bbox for shard in self.shards], dtype=float).reshape(-1, 4)
+        self.lat_min, self.lat_max, self.lon_min, self.lon_max = boxes.T
+        self.incident = np.array([shard.incident for shard in self.shards], dtype=bool)
+
+    @classmethod
+    def from_json(cls, json_data):
+        shards = []
+        for entry in (json_data or {}).get('shards', []):
+            shards.append(ShardInfo(
+                shard_id=str(entry['id']),
+                citizens_blob=entry['citizens_blob'],
+                fires_blob=entry.get('fires_blob'),
+                bbox=tuple(float(v) for v in entry.get('bbox', ShardInfo.bbox)),
+                incident=bool(entry.get('incident', False))
+            ))
+        return cls(shards)
+
+    def intersecting(self, areas=(), include_incidents=True):
+        """Shards whose bounding box intersects any of the given areas (plus the incident shards)."""
+        mask = self.incident.copy() if include_incidents else np.zeros(len(self.shards), dtype=bool)
+        for lat_min, lat_max, lon_min, lon_max in areas:
+            mask |= ((self.lat_min <= lat_max) & (self.lat_max >= lat_min)
+                     & (self.lon_min <= lon_max) & (self.lon_max >= lon_min))
+        return [shard for shard, keep in zip(self.shards, mask) if keep]
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum()) if df is not None and not df.empty else 0
+
+
+class ShardCache:
+    """
+    Loaded shards under a memory budget.
+
+    Entries are refreshed when older than max_age_s and evicted least-recently-used
+    once the total size (DataFrame deep memory usage) exceeds budget_bytes. Shards
+    requested by the current call are never evicted by it, even if they alone exceed
+    the budget.
+    """
+
+    def __init__(self, load_shard, budget_bytes, max_age_s=REFRESH_INTERVAL_S):
+        self.load_shard = load_shard
+        self.budget_bytes = budget_bytes
+        self.max_age_s = max_age_s
+        self._entries = OrderedDict()  # shard_id -> (loaded_at, citizens, fires, size)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def memory_bytes(self):
+        return sum(entry[3] for entry in self._entries.values())
+
+    def loaded_ids(self):
+        return list(self._entries)
+
+    def get_many(self, shards):
+        """Returns [(shard, citizens, fires)] for the given shards, loading stale or missing ones."""
+        results = []
+        now = time.time()
+        with self._lock:
+            for shard in shards:
+                entry = self._entries.get(shard.shard_id)
+                if entry is None or now - entry[0] >= self.max_age_s:
+                    entry = self._load(shard, entry)
+                self._entries.move_to_end(shard.shard_id)
+                results.append((shard, entry[1], entry[2]))
+            self._evict(keep={shard.shard_id for shard in shards})
+        return results
+
+    def _load(self, shard, previous):
+        try:
+            citizens, fires = self.load_shard(shard)
+        except Exception as e:
+            if previous is None:
+                raise
+            # A stale copy beats silently dropping the region's citizens
+            print(f"Shard {shard.shard_id} refresh failed, keeping the copy from {time.ctime(previous[0])}: {e}")
+            return previous
+        entry = (time.time(), citizens, fires, frame_bytes(citizens) + frame_bytes(fires))
+        self._entries[shard.shard_id] = entry
+        return entry
+
+    def _evict(self, keep):
+        total = self.memory_bytes
+        for shard_id in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            if shard_id in keep:
+                continue
+            total -= self._entries.pop(shard_id)[3]
+            self.evictions += 1
+            print(f"Evicted shard {shard_id} (memory budget {self.budget_bytes / 1e6:.0f} MB)")
+        if total > self.budget_bytes:
+            print(f"Active shards use {total / 1e6:.0f} MB, above the {self.budget_bytes / 1e6:.0f} MB budget")
+
+
+def load_manifest_shard(shard):
+    return DataManager.load_shard(shard.citizens_blob, shard.fires_blob)
+
+
+def load_live_manifest():
+    return ShardManifest.from_json(download_json_from_blob(SHARD_MANIFEST_BLOB))
+
+
+class ShardedDataSource:
+    """
+    Citizen and fire loaders over a region-sharded dataset, for RefreshService.
+
+    The active area is the union of the base area (around the default location),
+    the map viewports reported by the sessions in the last viewport_ttl_s seconds
+    and the shards flagged as incidents in the manifest. Only shards intersecting it
+    are loaded. Citizen ids are namespaced by shard (namespace_ids) and fire ids are
+    prefixed with the shard id, so records from different shards never collide.
+    """
+
+    def __init__(self, load_manifest=load_live_manifest, load_shard=load_manifest_shard,
+                 budget_mb=SHARD_MEMORY_BUDGET_MB, base_area=None, viewport_ttl_s=600):
+        self.load_manifest = load_manifest
+        self.cache = ShardCache(load_shard, budget_bytes=budget_mb * 1e6)
+        self.base_area = base_area or area_around(DEFAULT_LAT, DEFAULT_LON, SHARD_AREA_RADIUS_M)
+        self.viewport_ttl_s = viewport_ttl_s
+        self._viewports = {}  # viewer key -> (bbox, reported_at)
+        self.manifest = ShardManifest([])
+
+    def set_viewport(self, viewer, bbox):
+        """Area a session is looking at; picked up by the next refresh."""
+        if bbox is not None:
+            self._viewports[viewer] = (bbox, time.time())
+
+    def active_shards(self):
+        now = time.time()
+        viewports = [bbox for bbox, reported_at in list(self._viewports.values())
+                     if now - reported_at < self.viewport_ttl_s]
+        return self.manifest.intersecting([self.base_area] + viewports)
+
+    def load_citizens(self):
+        # The manifest is re-read with the citizens, so new incidents/shards appear on the next poll
+        self.manifest = self.load_manifest()
+        frames, namespaces = [], {}
+        for shard, citizens, _ in self.cache.get_many(self.active_shards()):
+            other = namespaces.setdefault(shard_namespace(shard.shard_id), shard.shard_id)
+            if other != shard.shard_id:
+                raise ValueError(f"Shards {other} and {shard.shard_id} have the same id namespace; rename one")
+            if not citizens.empty:
+                frames.append(namespace_ids(citizens, shard.shard_id).assign(shard_id=shard.shard_id))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def load_fires(self):
+        frames, bounds = [], {}
+        for shard, _, fires in self.cache.get_many(self.active_shards()):
+            if fires.empty:
+                continue
+            prefixed = fires.assign(fire_id=shard.shard_id + "/" + fires['fire_id'].astype(str))
+            frames.append(prefixed)
+            for fire_id, box in fires.attrs.get('bounds', {}).items():
+                bounds[f"{shard.shard_id}/{fire_id}"] = box
+
+        if not frames:
+            return pd.DataFrame()
+        combined = pd.concat(frames, ignore_index=True)
+        # concat drops attrs: carry the cached per-fire bounding boxes over under the new ids
+        combined.attrs = {'bounds': bounds} if len(bounds) == combined['fire_id'].nunique() else {}
+        return combined
@@ -1,55 +1,65 @@
 import requests
-from src.config import INFOBIP_API_KEY, INFOBIP_BASE_URL
-import json
+from src.config import INFOBIP_API_KEY, INFOBIP_BASE_URL, SMS_TIMEOUT_S
 
-def send_infobip_sms(recipients, message_text, sender_name="Hackathon"):
+def send_bulk_sms(destinations, message_text, sender_name="Hackathon", batch_size=1000, bulk_id=None):
     """
-    Στέλνει SMS μέσω του Infobip API.
+    Στέλνει το ίδιο SMS σε πολλούς παραλήπτες με ένα μόνο bulk request.
+
+    Οι παραλήπτες χωρίζονται σε πακέτα (batch_size) μέσα στο ίδιο payload,
+    ώστε μια μαζική ειδοποίηση να μη γίνεται ένα request ανά πολίτη.
 
     Args:
-        api_key (str): Το API Key της Infobip.
-        base_url (str): Το Base URL (π.χ. 'w42p6r.api.infobip.com').
-        recipient (str): Το κινητό του παραλήπτη (με κωδικό χώρας, π.χ. '306912345678').
+        destinations (list): Λίστα από dicts της μορφής {'to': '3069...'}.
         message_text (str): Το κείμενο του μηνύματος.
-        sender_name (str): Το όνομα αποστολέα (μπορεί να αγνοηθεί στο trial).
+        sender_name (str): Το όνομα αποστολέα.
+        batch_size (int): Μέγιστος αριθμός παραληπτών ανά μήνυμα του payload.
+        bulk_id (str): Προαιρετικό bulkId της Infobip (π.χ. το idempotency key της ουράς).
 
     Returns:
-        dict: Το response από το API ή None αν υπάρξει σφάλμα.
+        dict: {'sent': πλήθος παραληπτών που δέχτηκε η Infobip}.
+
+    Raises:
+        RuntimeError: Αν η Infobip δεν έχει ρυθμιστεί ή απαντήσει με σφάλμα
+            (η ουρά SMS τότε ξαναπροσπαθεί και ο circuit breaker μετρά την αποτυχία).
+        requests.RequestException: Σε σφάλμα σύνδεσης ή timeout.
     """
-    
-    # Κατασκευή του URL
+    if not destinations:
+        return {"sent": 0}
+    if not INFOBIP_API_KEY or not INFOBIP_BASE_URL:
+        raise RuntimeError("Infobip is not configured (INFOBIP_API_KEY / INFOBIP_BASE_URL)")
+
     url = f"https://{INFOBIP_BASE_URL}/sms/2/text/advanced"
 
-    # Headers
     headers = {
         "Authorization": f"App {INFOBIP_API_KEY}",
         "Content-Type": "application/json",
         "Accept": "application/json"
     }
 
-    # Payload
     payload = {
         "messages": [
             {
                 "from": sender_name,
-                "destinations": recipients,
+                "destinations": destinations[start:start + batch_size],
                 "text": message_text
             }
+            for start in range(0, len(destinations), batch_size)
         ]
     }
+    if bulk_id:
+        payload["bulkId"] = bulk_id
+
+    response = requests.post(url, json=payload, headers=headers, timeout=SMS_TIMEOUT_S)
+    if response.status_code != 200:
+        raise RuntimeError(f"Infobip returned {response.status_code}: {response.text[:200]}")
 
-    try:
-        #response = requests.post(url, json=payload, headers=headers)
-        
-        # Έλεγχος επιτυχίας (Status Code 200 OK)
-        if True:  # response.status_code == 200:
-            print(f"✅ SMS sent successfully to {recipients}!")
-            return True#response.json()
-        else:
-            print(f"❌ Error sending SMS. Status: {response.status_code}")
-            print(f"Details: {response.text}")
-            return None
-
-    except Exception as e:
-        print(f"❌ Connection Error: {e}")
-        return None
+    # Ανά παραλήπτη: ό,τι δεν απορρίφθηκε έχει γίνει δεκτό (PENDING / DELIVERED)
+    messages = response.json().get("messages")
+    if messages is None:
+        sent = len(destinations)
+    else:
+        sent = sum(1 for m in messages if m.get("status", {}).get("groupName") != "REJECTED")
+    if sent == 0:
+        raise RuntimeError("Infobip rejected every recipient")
+    print(f"✅ Bulk SMS accepted for {sent}/{len(destinations)} recipients in {len(payload['messages'])} batch(es)")
+    return {"sent": sent}
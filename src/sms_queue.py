@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from src.config import SMS_QUEUE_DB, SMS_MAX_ATTEMPTS, SMS_DEDUPE_WINDOW_S, SMS_LEASE_S
+from src.sms import send_bulk_sms
+from src.resilience import get_breaker
+
+# Job states
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sms_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    destinations TEXT NOT NULL,
+    message_text TEXT NOT NULL,
+    sender_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    sent_count INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    content_hash TEXT,
+    lease_owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sms_jobs_pending ON sms_jobs (status, next_attempt_at);
+"""
+# Columns added after the first schema, created on databases that predate them
+_ADDED_COLUMNS = {'content_hash': "TEXT", 'lease_owner': "TEXT", 'lease_until': "REAL"}
+
+
+def content_hash(destinations, message_text):
+    """Hash of "this message to these recipients" (recipient order does not matter)."""
+    phones = sorted(d['to'] for d in destinations)
+    digest = hashlib.sha256()
+    digest.update(json.dumps(phones).encode('utf-8'))
+    digest.update(message_text.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+class SmsQueue:
+    """
+    Durable outbound SMS queue backed by SQLite.
+    Jobs survive app restarts; the UI only enqueues and polls, a SmsWorker sends.
+
+    A job being sent is leased to the queue instance that claimed it for lease_s seconds
+    (longer than a send takes), so several processes can share the database: only jobs
+    whose lease ran out (their worker died) are claimed again. A worker whose lease ran
+    out can no longer mark its job sent or failed.
+    """
+
+    def __init__(self, db_path=SMS_QUEUE_DB, max_attempts=SMS_MAX_ATTEMPTS, dedupe_window_s=SMS_DEDUPE_WINDOW_S,
+                 lease_s=SMS_LEASE_S):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.dedupe_window_s = dedupe_window_s
+        self.lease_s = lease_s
+        # Lease owner of the jobs this instance claims
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(sms_jobs)")}
+        for name, sql_type in _ADDED_COLUMNS.items():
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE sms_jobs ADD COLUMN {name} {sql_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sms_jobs_content ON sms_jobs (content_hash, created_at)")
+
+    def enqueue(self, destinations, message_text, idempotency_key=None, sender_name="Hackathon"):
+        """
+        Adds a job unless the same one was already submitted. Returns (key, created);
+        the key is the handle for get_status().
+
+        With an explicit idempotency_key, a job with that key is the same one. Otherwise
+        a job with the same message and recipients created in the last dedupe_window_s
+        seconds (and not failed) is: a rerun, double click or browser refresh is not sent
+        twice, and the key returned is the earlier job's.
+        """
+        digest = content_hash(destinations, message_text)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if idempotency_key is None:
+                    row = self._conn.execute(
+                        "SELECT idempotency_key FROM sms_jobs WHERE content_hash = ? AND created_at >= ?"
+                        " AND status != ? ORDER BY id DESC LIMIT 1",
+                        (digest, now - self.dedupe_window_s, FAILED)
+                    ).fetchone()
+                    if row:
+                        self._conn.execute("COMMIT")
+                        return row['idempotency_key'], False
+                key = idempotency_key or f"{digest[:16]}-{uuid.uuid4().hex[:16]}"
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO sms_jobs (idempotency_key, destinations, message_text, sender_name,"
+                    " status, next_attempt_at, created_at, updated_at, content_hash)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(destinations), message_text, sender_name, QUEUED, now, now, now, digest)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return key, cursor.rowcount == 1
+
+    def get_status(self, idempotency_key):
+        """Returns the job as a dict (status, attempts, sent_count, last_error, ...) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sms_jobs WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim_next(self):
+        """
+        Atomically moves the oldest due job to 'sending', leased to this instance, and
+        returns it. A job left in 'sending' by a worker whose lease expired is due again.
+        Returns None when nothing is due.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM sms_jobs WHERE (status = ? AND next_attempt_at <= ?)"
+                    " OR (status = ? AND COALESCE(lease_until, 0) < ?) ORDER BY id LIMIT 1",
+                    (QUEUED, now, SENDING, now)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE sms_jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_until = ?,"
+                        " updated_at = ? WHERE id = ?",
+                        (SENDING, self.owner, now + self.lease_s, now, row['id'])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if not row:
+            return None
+        job = self._row_to_job(row)
+        job['status'] = SENDING
+        job['attempts'] += 1
+        job['lease_owner'] = self.owner
+        job['lease_until'] = now + self.lease_s
+        return job
+
+    def mark_sent(self, job, sent_count):
+        """Records the send. Returns False (nothing written) if the job's lease was lost."""
+        return self._settle(job, status=SENT, sent_count=sent_count, last_error=None)
+
+    def mark_failed(self, job, error):
+        """
+        Schedules a retry with exponential backoff, or gives up after max_attempts.
+        Returns False (nothing written) if the job's lease was lost.
+        """
+        if job['attempts'] >= self.max_attempts:
+            return self._settle(job, status=FAILED, last_error=str(error))
+        delay = min(2 ** job['attempts'], 300)
+        return self._settle(job, status=QUEUED, last_error=str(error), next_attempt_at=time.time() + delay)
+
+    def requeue_interrupted(self):
+        """
+        Puts jobs left in 'sending' by a crashed or restarted worker (lease expired) back
+        in the queue; jobs another live process is still sending keep their lease.
+        The idempotency key is passed to Infobip as bulkId, so a resend can be traced.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sms_jobs SET status = ?, next_attempt_at = ?, lease_owner = NULL, lease_until = NULL,"
+                " updated_at = ? WHERE status = ? AND COALESCE(lease_until, 0) < ?",
+                (QUEUED, now, now, SENDING, now)
+            )
+        return cursor.rowcount
+
+    def pending_count(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM sms_jobs WHERE status IN (?, ?)", (QUEUED, SENDING)
+            ).fetchone()
+        return row[0]
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE sms_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def _settle(self, job, **fields):
+        # Only the current lease may settle a job: after it expired and another worker
+        # claimed the job again, a late write would undo that worker's send or repeat it
+        fields.update(lease_owner=None, lease_until=None, updated_at=time.time())
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE sms_jobs SET {assignments} WHERE id = ? AND lease_owner = ? AND lease_until = ?",
+                (*fields.values(), job['id'], job['lease_owner'], job['lease_until'])
+            )
+        if cursor.rowcount == 0:
+            print(f"⚠️ SMS job {job['idempotency_key']} lost its lease; its status is left to the new owner.")
+        return cursor.rowcount == 1
+
+    @staticmethod
+    def _row_to_job(row):
+        job = dict(row)
+        job['destinations'] = json.loads(job['destinations'])
+        return job
+
+
+class SmsWorker(threading.Thread):
+    """Background thread that drains the SmsQueue through send_bulk_sms."""
+
+    def __init__(self, queue, poll_interval=1.0, sender=send_bulk_sms, breaker=None):
+        super().__init__(name="sms-worker", daemon=True)
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.sender = sender
+        self.breaker = breaker or get_breaker("sms")
+        self._stop_event = threading.Event()
+
+    def run(self):
+        self.queue.requeue_interrupted()
+        while not self._stop_event.is_set():
+            if not self.process_next():
+                self._stop_event.wait(self.poll_interval)
+
+    def process_next(self):
+        """
+        Sends one due job. Returns False when the queue had nothing to do.
+        While the SMS provider's circuit is open, jobs stay queued without using up attempts.
+        """
+        if not self.breaker.allow():
+            return False
+        try:
+            job = self.queue.claim_next()
+        except Exception as e:
+            print(f"❌ SMS worker could not claim a job: {e}")
+            job = None
+        if job is None:
+            # Nothing was sent: a half-open probe slot must not stay taken
+            self.breaker.release_probe()
+            return False
+        try:
+            result = self.sender(
+                job['destinations'],
+                job['message_text'],
+                sender_name=job['sender_name'],
+                bulk_id=job['idempotency_key']
+            )
+            if result:
+                self.breaker.record_success()
+                self.queue.mark_sent(job, result.get('sent', len(job['destinations'])))
+            else:
+                self.breaker.record_failure("SMS provider returned no result")
+                self.queue.mark_failed(job, "SMS provider returned no result")
+        except Exception as e:
+            print(f"❌ SMS worker error: {e}")
+            self.breaker.record_failure(e)
+            self.queue.mark_failed(job, e)
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_sms_queue = None
+_sms_queue_lock = threading.Lock()
+
+
+def get_sms_queue():
+    """
+    Process-wide SmsQueue with its SmsWorker, started on first use. Every producer of
+    the process (dashboard broadcasts, escalation alerts) shares it, in the Streamlit
+    process as in the worker service.
+    """
+    global _sms_queue
+    with _sms_queue_lock:
+        if _sms_queue is None:
+            _sms_queue = SmsQueue()
+            SmsWorker(_sms_queue).start()
+        return _sms_queue
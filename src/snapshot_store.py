@@ -0,0 +1,111 @@
+import threading
+from dataclasses import dataclass, field
+import pandas as pd
+from src.metrics import cache_hit, span
+
+
+@dataclass(frozen=True)
+class SharedSnapshot:
+    """
+    Ranked view of one DataSnapshot, shared by every session of the server process.
+
+    Sessions hold a reference to it (never a copy) and must treat the frames as
+    read-only: under pandas copy-on-write, filtering, slicing and .assign() already
+    return new objects, only in-place writes (df[col] = ..., df.loc[...] = ...) are
+    not allowed. Values derived from it (route plans, indexes, projections) are
+    memoized in `derived`, so they are dropped together with the version.
+
+    `version` counts publications of the store: it moves when either the data
+    (data_version, the DataSnapshot version) or the API rankings (ranking_version) change.
+    """
+    version: int
+    citizens: pd.DataFrame
+    ranked: pd.DataFrame
+    fires: pd.DataFrame
+    fire_history: tuple
+    created_at: float
+    data_version: int = 0
+    ranking_version: int = 0
+    derived: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def memory_bytes(self):
+        frames = [self.citizens, self.ranked, self.fires]
+        return int(sum(df.memory_usage(deep=True).sum() for df in frames if df is not None and not df.empty))
+
+
+class SnapshotStore:
+    """
+    Process-wide holder of the current SharedSnapshot.
+
+    The first session that sees a new DataSnapshot version (or new API rankings)
+    ranks it (once, under a lock) and publishes the result with a single reference
+    assignment, which is the atomic swap: concurrent readers get either the old or
+    the new version, never a mix. Older versions are freed as soon as no session
+    references them anymore.
+    """
+
+    def __init__(self, rank, rankings=None, max_derived=32):
+        # rank(snapshot) -> ranked citizens DataFrame
+        self.rank = rank
+        # Optional RankingCache: its version is part of what the ranked view depends on
+        self.rankings = rankings
+        self.max_derived = max_derived
+        self._current = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def current(self, snapshot):
+        """SharedSnapshot for the given DataSnapshot (built on first use of its version or of new rankings)."""
+        ranking_version = self.rankings.current_version() if self.rankings is not None else 0
+        shared = self._current
+        if shared is not None and not self._outdated(shared, snapshot, ranking_version):
+            cache_hit("snapshot_store", True)
+            return shared
+
+        with self._lock:
+            shared = self._current
+            if shared is None or self._outdated(shared, snapshot, ranking_version):
+                cache_hit("snapshot_store", False)
+                with span("snapshot_store.rank"):
+                    ranked = self.rank(snapshot)
+                shared = SharedSnapshot(
+                    version=shared.version + 1 if shared is not None else 1,
+                    citizens=snapshot.citizens,
+                    ranked=ranked,
+                    fires=snapshot.fires,
+                    fire_history=snapshot.fire_history,
+                    created_at=snapshot.created_at,
+                    data_version=snapshot.version,
+                    ranking_version=ranking_version
+                )
+                self.builds += 1
+                self._current = shared
+        return shared
+
+    @staticmethod
+    def _outdated(shared, snapshot, ranking_version):
+        if snapshot.version < shared.data_version:
+            # Never go back to older data, even for newer rankings
+            return False
+        return snapshot.version > shared.data_version or ranking_version > shared.ranking_version
+
+    def derived(self, shared, key, compute):
+        """
+        Value computed once per (version, key) and shared by all sessions.
+        compute() runs under the store lock, so concurrent sessions never duplicate it.
+        """
+        cache = shared.derived
+        kind = key[0] if isinstance(key, tuple) else key
+        if key in cache:
+            cache_hit(f"derived.{kind}", True)
+            return cache[key]
+        with self._lock:
+            cache_hit(f"derived.{kind}", key in cache)
+            if key not in cache:
+                if len(cache) >= self.max_derived:
+                    # Oldest entry first (dicts keep insertion order)
+                    cache.pop(next(iter(cache)))
+                with span(f"derived.{kind}"):
+                    cache[key] = compute()
+            return cache[key]
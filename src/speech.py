@@ -1,12 +1,20 @@
-import azure.cognitiveservices.speech as speechsdk
 import streamlit as st
 from src.config import SPEECH_KEY, SPEECH_REGION
+from src.metrics import observe, span
+from src.resilience import get_breaker
+from src.lazy import lazy_module
 import re
 
+speechsdk = lazy_module("azure.cognitiveservices.speech")
+
 def recognize_speech_from_file(audio_file_path):
     """
     Reads audio from a FILE (not the mic) and sends it to Azure.
     """
+    breaker = get_breaker("speech")
+    if not breaker.allow():
+        st.sidebar.error("Speech service offline, please type your message.")
+        return None
     try:
         speech_config = speechsdk.SpeechConfig(
             subscription=SPEECH_KEY, 
@@ -22,8 +30,14 @@ def recognize_speech_from_file(audio_file_path):
             audio_config=audio_config  # <--- MUST BE INCLUDED
         )
         
-        result = speech_recognizer.recognize_once_async().get()
-        
+        with span("speech.stt"):
+            result = speech_recognizer.recognize_once_async().get()
+
+        if result.reason == speechsdk.ResultReason.Canceled:
+            breaker.record_failure(result.cancellation_details.reason)
+        else:
+            breaker.record_success()
+
         if result.reason == speechsdk.ResultReason.RecognizedSpeech:
             return result.text
         elif result.reason == speechsdk.ResultReason.NoMatch:
@@ -34,6 +48,7 @@ def recognize_speech_from_file(audio_file_path):
             return None
             
     except Exception as e:
+        breaker.record_failure(e)
         st.error(f"Error: {e}")
         return None
     
@@ -51,7 +66,11 @@ def detect_language_voice(text):
 def text_to_speech(text):
     """
     Converts text to speech, dynamically selecting the language.
+    Returns None at once while the speech service is known to be down.
     """
+    breaker = get_breaker("speech")
+    if not breaker.allow():
+        return None
     try:
         # 1. Determine the correct voice
         voice_name = detect_language_voice(text)
@@ -64,14 +83,20 @@ def text_to_speech(text):
         speech_synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
 
         # 4. Speak
-        result = speech_synthesizer.speak_text_async(text).get()
+        with span("speech.tts"):
+            result = speech_synthesizer.speak_text_async(text).get()
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+            breaker.record_success()
+            observe("speech.audio_bytes", len(result.audio_data))
             return result.audio_data
         elif result.reason == speechsdk.ResultReason.Canceled:
+            breaker.record_failure(result.cancellation_details.reason)
             print(f"Canceled: {result.cancellation_details.reason}")
             return None
+        breaker.record_success()
 
     except Exception as e:
+        breaker.record_failure(e)
         print(f"TTS Error: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Seeded, vectorized generator of synthetic datasets with the schema of the live blobs.
+
+    python -m src.synthetic --rows 1000000 --out synthetic/
+    python -m src.worker --citizens synthetic/citizens.json --fires synthetic/fires.json
+
+Every column is drawn with one NumPy call over all rows, so 10M citizens take
+seconds. Text columns ('fullname', 'notes') are categoricals over small tables of
+realistic values: same values as strings, a fraction of the memory.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.config import DEFAULT_LAT, DEFAULT_LON
+from src.geo import EARTH_RADIUS_M, add_fire_lod, project_to_metres
+from src.notes import NOTE_FEATURE_COLUMNS, add_note_features
+
+# gender 1 / 0, as in the live dataset
+FEMALE_FIRST_NAMES = ["Κατερίνα", "Φωτεινή", "Άννα", "Μαρία", "Ελπίδα", "Αγγελική", "Ελένη", "Σοφία",
+                      "Βασιλική", "Κωνσταντίνα"]
+FEMALE_LAST_NAMES = ["Παπαδοπούλου", "Σιδηροπούλου", "Θεοδωρίδου", "Πολίτη", "Μάνου", "Στρατή", "Σαμαρά",
+                     "Μακρή", "Στεργίου", "Κωνσταντίνου", "Βασιλείου"]
+MALE_FIRST_NAMES = ["Γιώργος", "Χρήστος", "Νίκος", "Θανάσης", "Δημήτρης", "Αναστάσιος", "Μιχάλης", "Πέτρος",
+                    "Αλέξανδρος"]
+MALE_LAST_NAMES = ["Λαμπρόπουλος", "Ρούσσος", "Ανδρεάδης", "Τσεκούρας", "Ιωαννίδης", "Τσιλιγγίρης",
+                   "Μπεκιάρης", "Παπακώστας", "Παπαδόπουλος"]
+
+# Notes: "<severity> <condition>. [<need>. ]<access>"; severity follows the vulnerability
+# score and a need is only written for citizens on life support
+SEVERITIES = ["Ήπια", "Μέτρια", "Σοβαρά", "Πολύ σοβαρά"]
+CONDITIONS = ["καρδιολογικά προβλήματα", "αναπνευστικά προβλήματα", "άνοια", "κώφωση", "τύφλωση",
+              "αρθρίτιδα", "αναπηρία", "επιληψία", "κατάκοιτος"]
+NEEDS = ["", "Χρειάζεται υποστήριξη από μηχάνημα. ", "Χρειάζεται άμεση ιατρική υποστήριξη. "]
+ACCESS = ["Μπείτε από την πίσω πόρτα", "Είσοδος από τον κήπο", "Χρησιμοποιήστε ήρεμο τόνο",
+          "Η κύρια είσοδος είναι μπλοκαρισμένη", "Η αυλή έχει σκύλο, είναι φιλικός", "Απαιτούνται δύο διασώστες"]
+
+# Fire perimeters: radius profile r(θ) = base * (1 + Σ amplitude_k cos(k θ + phase_k))
+FIRE_HARMONICS = 4
+# Angular resolution of the radius lookup used for per-citizen distances
+RADIUS_TABLE_SIZE = 4096
+
+
+def _name_table():
+    """All fullnames, female ones first: (names, number of female names)."""
+    female = [f"{first} {last}" for first in FEMALE_FIRST_NAMES for last in FEMALE_LAST_NAMES]
+    male = [f"{first} {last}" for first in MALE_FIRST_NAMES for last in MALE_LAST_NAMES]
+    return female + male, len(female)
+
+
+def _notes_table():
+    """All note texts, indexed by ((severity * C + condition) * N + need) * A + access."""
+    return [
+        f"{severity} {condition}. {need}{access}"
+        for severity in SEVERITIES for condition in CONDITIONS for need in NEEDS for access in ACCESS
+    ]
+
+
+def generate_fire_profiles(n_fires, rng, center_lat=DEFAULT_LAT, center_lon=DEFAULT_LON):
+    """
+    Random star-shaped fire fronts 1.5-4 km from the center.
+    Returns a list of dicts: lat/lon of the fire center, base radius (m) and the
+    amplitudes/phases of the radius harmonics.
+    """
+    bearing = rng.uniform(0, 2 * np.pi, n_fires)
+    offset = rng.uniform(1500, 4000, n_fires)
+    lat = center_lat + np.degrees(offset * np.sin(bearing) / EARTH_RADIUS_M)
+    lon = center_lon + np.degrees(offset * np.cos(bearing) / (EARTH_RADIUS_M * np.cos(np.radians(center_lat))))
+    base = rng.uniform(300, 900, n_fires)
+    # Decaying amplitudes keep r(θ) > 0.3 * base
+    amplitude = rng.uniform(0, 0.25, (n_fires, FIRE_HARMONICS)) / np.arange(1, FIRE_HARMONICS + 1)
+    phase = rng.uniform(0, 2 * np.pi, (n_fires, FIRE_HARMONICS))
+    return [
+        {'lat': lat[k], 'lon': lon[k], 'base': base[k], 'amplitude': amplitude[k], 'phase': phase[k]}
+        for k in range(n_fires)
+    ]
+
+
+def _fire_radius(profile, theta):
+    harmonics = np.arange(1, FIRE_HARMONICS + 1)
+    waves = profile['amplitude'] * np.cos(np.multiply.outer(theta, harmonics) + profile['phase'])
+    return profile['base'] * (1.0 + waves.sum(axis=-1))
+
+
+def fires_frame(profiles, vertices=200):
+    """Flat fire DataFrame (fire_id, lat, lon + LOD columns) of the given fire profiles."""
+    if not profiles:
+        return pd.DataFrame()
+    theta = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    parts = []
+    for fire_id, profile in enumerate(profiles):
+        r = _fire_radius(profile, theta)
+        lat = profile['lat'] + np.degrees(r * np.sin(theta) / EARTH_RADIUS_M)
+        lon = profile['lon'] + np.degrees(r * np.cos(theta) / (EARTH_RADIUS_M * np.cos(np.radians(profile['lat']))))
+        parts.append(pd.DataFrame({'fire_id': fire_id, 'lat': lat, 'lon': lon}))
+    return add_fire_lod(pd.concat(parts, ignore_index=True))
+
+
+def distance_to_profiles_m(lat, lon, profiles):
+    """
+    Distance in metres from each point to the nearest fire front, measured radially
+    from the fire center (0 inside). Exact for the star-shaped synthetic fronts along
+    the radius (up to the lookup resolution) and O(points) per fire, which is what
+    makes 10M rows cheap.
+    """
+    result = np.full(len(lat), np.inf)
+    grid = np.linspace(-np.pi, np.pi, RADIUS_TABLE_SIZE, endpoint=False)
+    for profile in profiles:
+        x, y = project_to_metres(lat, lon, profile['lat'], profile['lon'])
+        # r(θ) from a lookup table: one gather instead of the harmonics per point
+        table = _fire_radius(profile, grid)
+        index = ((np.arctan2(y, x) + np.pi) * (RADIUS_TABLE_SIZE / (2 * np.pi))).astype(np.int64)
+        gap = np.hypot(x, y) - table[index % RADIUS_TABLE_SIZE]
+        np.minimum(result, np.maximum(gap, 0.0), out=result)
+    return result
+
+
+def generate_dataset(n, seed=0, center_lat=DEFAULT_LAT, center_lon=DEFAULT_LON,
+                     n_fires=2, fire_vertices=200, n_clusters=8, spread_m=1500.0):
+    """
+    Synthetic citizens and fires with the live schema.
+
+    Citizens live in n_clusters neighbourhoods around the center (spread_m apart).
+    'distance_from_danger' is the distance to the generated fires and 'danger_level'
+    follows it like in the live data (100 - distance / 25, capped at 95).
+
+    Returns:
+        (citizens DataFrame like DataManager.citizens_from_json,
+         fire DataFrame like DataManager.fires_from_json)
+    """
+    rng = np.random.default_rng(seed)
+
+    # 1. Locations: neighbourhood centers, then citizens around them
+    cluster_x = rng.normal(0, spread_m, n_clusters)
+    cluster_y = rng.normal(0, spread_m, n_clusters)
+    cluster = rng.choice(n_clusters, n, p=rng.dirichlet(np.ones(n_clusters)))
+    x = cluster_x[cluster] + rng.normal(0, spread_m / 3, n)
+    y = cluster_y[cluster] + rng.normal(0, spread_m / 3, n)
+    lat = center_lat + np.degrees(y / EARTH_RADIUS_M)
+    lon = center_lon + np.degrees(x / (EARTH_RADIUS_M * np.cos(np.radians(center_lat))))
+
+    # 2. Health: life support raises the vulnerability score, as in the live data
+    gender = rng.integers(0, 2, n, dtype=np.int64)
+    life_support = (rng.random(n) < 0.44).astype(np.int64)
+    vulnerability = np.clip(np.rint(rng.normal(5.8, 2.1, n) + 1.8 * life_support), 2, 10).astype(np.int64)
+    present = (rng.random(n) < 0.5).astype(np.int64)
+
+    # 3. Texts as codes into the name / notes tables
+    names, n_female = _name_table()
+    name_code = np.where(gender == 1, rng.integers(0, n_female, n), rng.integers(n_female, len(names), n))
+    severity = np.clip((vulnerability - 2) * len(SEVERITIES) // 9, 0, len(SEVERITIES) - 1)
+    need = np.where(life_support == 1, rng.integers(1, len(NEEDS), n), 0)
+    notes_code = (((severity * len(CONDITIONS) + rng.integers(0, len(CONDITIONS), n)) * len(NEEDS) + need)
+                  * len(ACCESS) + rng.integers(0, len(ACCESS), n))
+
+    # 4. Fires and the danger columns derived from them
+    profiles = generate_fire_profiles(n_fires, rng, center_lat, center_lon)
+    distance = np.rint(distance_to_profiles_m(lat, lon, profiles))
+    distance = np.where(np.isfinite(distance), distance, 10000).astype(np.int64)
+    danger_level = np.clip(np.rint(100 - distance / 25), 0, 95).astype(np.int64)
+
+    citizens = pd.DataFrame({
+        'id': np.arange(1, n + 1, dtype=np.int64),
+        'fullname': pd.Categorical.from_codes(name_code, names),
+        'gender': gender,
+        'life_support': life_support,
+        'vulnerability_score': vulnerability,
+        'notes': pd.Categorical.from_codes(notes_code, _notes_table()),
+        'present': present,
+        'distance_from_danger': distance,
+        'danger_level': danger_level,
+        'lat': lat,
+        'lon': lon,
+    })
+    return add_note_features(citizens), fires_frame(profiles, fire_vertices)
+
+
+def synthetic_snapshot(n, seed=0, version=1, **kwargs):
+    """DataSnapshot of a generated dataset (kwargs as in generate_dataset)."""
+    from src.refresh import DataSnapshot
+    citizens, fires = generate_dataset(n, seed=seed, **kwargs)
+    created_at = time.time()
+    history = ((created_at, fires),) if not fires.empty else ()
+    return DataSnapshot(version=version, citizens=citizens, fires=fires, created_at=created_at,
+                        fire_history=history)
+
+
+def citizens_to_json(citizens, path):
+    """
+    Writes citizens in the blob format (coordinates nested as {"lat", "lon"}), readable
+    by DataManager.citizens_from_json. Serialization is pandas' C encoder; the nesting
+    is added by two plain replacements, since quotes inside values are always escaped.
+    """
+    # Derived note features are not part of the blob format
+    rest = [c for c in citizens.columns if c not in ('lat', 'lon', *NOTE_FEATURE_COLUMNS)]
+    flat = citizens[['lat', 'lon'] + rest].to_json(orient='records', force_ascii=False, double_precision=7)
+    nested = flat.replace('{"lat":', '{"coordinates":{"lat":')
+    if rest:
+        nested = nested.replace(f',"{rest[0]}":', f'}},"{rest[0]}":')
+    else:
+        nested = nested.replace('}', '}}')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(nested)
+
+
+def fires_to_json(fires, path):
+    """Writes fires in the blob format (list of polygons, each a list of {"lat", "lon"})."""
+    polygons = []
+    if not fires.empty:
+        for _, group in fires.groupby('fire_id', sort=True):
+            polygons.append([{'lat': lat, 'lon': lon} for lat, lon in
+                             zip(group['lat'].round(7).tolist(), group['lon'].round(7).tolist())])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(polygons, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic citizen / fire dataset generator")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of citizens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fires", type=int, default=2, help="Number of fire perimeters")
+    parser.add_argument("--fire-vertices", type=int, default=200, help="Vertices per fire perimeter")
+    parser.add_argument("--out", default="synthetic", help="Output directory")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    citizens, fires = generate_dataset(args.rows, seed=args.seed, n_fires=args.fires,
+                                       fire_vertices=args.fire_vertices)
+    print(f"Generated {len(citizens)} citizens and {args.fires} fires in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(args.out, exist_ok=True)
+    citizens_to_json(citizens, os.path.join(args.out, "citizens.json"))
+    fires_to_json(fires, os.path.join(args.out, "fires.json"))
+    print(f"Wrote {args.out}/citizens.json and {args.out}/fires.json")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,30 @@
-import folium
-from streamlit_folium import st_folium
 import os
 import io
-from pydub import AudioSegment
 from streamlit_mic_recorder import mic_recorder
 from src.speech import recognize_speech_from_file
-from src.sms import send_infobip_sms
-from src.config import DEFAULT_LAT, DEFAULT_LON
+from src.sms_queue import get_sms_queue, SENT, FAILED
+from src.geo import fires_for_zoom
+from src.broadcast import select_broadcast_recipients, build_sms_destinations, DEFAULT_BROADCAST_MESSAGE
+from src.search import DISTANCE_BANDS
+from src.config import (DEFAULT_LAT, DEFAULT_LON, RESCUER_LAT, RESCUER_LON, METRICS_FILE, SOS_SMS_RECIPIENTS,
+                        BROADCAST_PHONE_COLUMN)
+from src.metrics import span
+from src.lazy import lazy_attribute, lazy_module
+import numpy as np
 import pandas as pd
 import streamlit as st
+import time
+
+# Map and audio libraries load on first use, so the header and sidebar paint first
+folium = lazy_module("folium")
+st_folium = lazy_attribute("streamlit_folium", "st_folium")
+AudioSegment = lazy_attribute("pydub", "AudioSegment")
+
+SOS_MESSAGE = "🆘 SOS ALERT! Critical situation reported via PwC Hackathon App. 📍 Check dashboard."
+
+# Rows per page in the citizen list
+LIST_PAGE_SIZE = 50
+
 
 def render_chat_interface(messages, on_voice_input=None):
     """
@@ -121,8 +137,12 @@ def render_sidebar(messages, on_voice_input=None):
 
 
 
-def render_header():
-    """Renders the main header with an SOS action."""
+def render_header(processed_data=None, fire_df=None, select_recipients=select_broadcast_recipients):
+    """
+    Renders the main header with an SOS action.
+    When citizen and fire data are provided, also offers a geo-targeted broadcast
+    (recipients chosen by select_recipients(processed_data, fire_df, radius_m, categories)).
+    """
     col_head1, col_head2 = st.columns([3, 1])
     
     with col_head1:
@@ -134,24 +154,114 @@ def render_header():
         
         # --- SOS BUTTON ADDED HERE ---
         # Using type="primary" to make it stand out visually
-        if st.button("Sent SOS SMS", type="primary", use_container_width=True):
-            # 1. Δείχνουμε ότι κάτι συμβαίνει (UX)
-            with st.spinner("Contacting Infobip API..."):
-                result = None
-                # 2. Καλούμε τη συνάρτηση
-                result = send_infobip_sms(
-                    recipients=[{'to': '306943428465'}, {'to': '4915202042012'}],#, {'to':'306980800178'}],  # nikos 306943428465, theodora 4915202042012, veroniki 306980800178
-                    message_text="🆘 SOS ALERT! Critical situation reported via PwC Hackathon App. 📍 Check dashboard."
-                )
-            
-            # 3. Ελέγχουμε το αποτέλεσμα και ενημερώνουμε το UI
-            if result:
-                st.toast("🚨 SOS SMS has been broadcasted!", icon="⚠️")
-                st.success("Message sent successfully!") # Προαιρετικό, μένει στην οθόνη
+        if st.button("Sent SOS SMS", type="primary", use_container_width=True, disabled=not SOS_SMS_RECIPIENTS,
+                     help=None if SOS_SMS_RECIPIENTS else "Set SOS_SMS_RECIPIENTS to enable the SOS SMS."):
+            # Μόνο καταχώρηση στην ουρά· την αποστολή την κάνει ο background worker.
+            # Διπλό κλικ / rerun / refresh μέσα στο παράθυρο dedupe δεν ξαναστέλνει.
+            st.session_state.sos_job_key, created = get_sms_queue().enqueue(
+                destinations=[{'to': phone} for phone in SOS_SMS_RECIPIENTS],
+                message_text=SOS_MESSAGE
+            )
+            if created:
+                st.toast("🚨 SOS SMS queued for broadcast!", icon="⚠️")
             else:
-                st.error("Failed to send SMS. Check console/logs.")
-            
-def render_map(processed_data, fire_df, center_coords=None, zoom=10, selected_id=None):
+                st.toast("The same SOS SMS was just sent, not sending it again.", icon="ℹ️")
+
+        if st.session_state.get('sos_job_key'):
+            render_sms_job_status(st.session_state.sos_job_key)
+
+    if processed_data is not None and fire_df is not None and not fire_df.empty:
+        render_targeted_broadcast(processed_data, fire_df, select_recipients)
+
+
+def render_targeted_broadcast(processed_data, fire_df, select_recipients=select_broadcast_recipients):
+    """Renders the geo-targeted SOS broadcast controls (citizens near the fire perimeters)."""
+    with st.expander("📡 Targeted SOS broadcast"):
+        has_phones = BROADCAST_PHONE_COLUMN in processed_data.columns
+        if not has_phones:
+            st.warning(f"Targeted broadcasts text each citizen's mobile number, but the citizen data has no "
+                       f"'{BROADCAST_PHONE_COLUMN}' column. Set BROADCAST_PHONE_COLUMN to the column that holds it.")
+        c1, c2 = st.columns(2)
+        with c1:
+            radius_m = st.slider("Radius from fire perimeter (m)", 100, 5000, 1000, step=100)
+        with c2:
+            categories = st.multiselect(
+                "Risk categories",
+                options=['CRITICAL', 'HIGH', 'LOW'],
+                default=['CRITICAL', 'HIGH', 'LOW']
+            )
+
+        recipients = select_recipients(processed_data, fire_df, radius_m, categories)
+        destinations = build_sms_destinations(recipients)
+        if has_phones:
+            st.caption(f"{len(recipients)} present citizens in range, {len(destinations)} with a phone number.")
+
+        if not categories:
+            st.caption("Select at least one risk category to broadcast.")
+        if st.button(f"Broadcast to {len(destinations)} citizens", disabled=not categories or not destinations):
+            st.session_state.broadcast_job_key, created = get_sms_queue().enqueue(
+                destinations=destinations,
+                message_text=DEFAULT_BROADCAST_MESSAGE.format(radius=radius_m)
+            )
+            if created:
+                st.toast(f"🚨 Broadcast to {len(destinations)} citizens queued!", icon="⚠️")
+            else:
+                st.toast("The same broadcast was just sent to these citizens, not sending it again.", icon="ℹ️")
+
+        if st.session_state.get('broadcast_job_key'):
+            render_sms_job_status(st.session_state.broadcast_job_key)
+
+
+def render_sms_job_status(job_key):
+    """Shows the status of an outbound SMS job, polling the queue only until it is sent or failed."""
+    job = get_sms_queue().get_status(job_key)
+    if job is None:
+        return
+    if job['status'] in (SENT, FAILED):
+        render_sms_job(job)
+    else:
+        poll_sms_job_status(job_key)
+
+
+@st.fragment(run_every=2)
+def poll_sms_job_status(job_key):
+    """Refreshes a pending job's status without rerunning the page."""
+    job = get_sms_queue().get_status(job_key)
+    if job['status'] in (SENT, FAILED):
+        # One full rerun renders the final status outside this fragment, which stops the polling
+        st.rerun()
+    render_sms_job(job)
+
+
+def render_sms_job(job):
+    """Renders one job's status message (sent, failed, retrying or queued)."""
+    if job['status'] == SENT:
+        st.success(f"Message sent to {job['sent_count']} recipients.")
+    elif job['status'] == FAILED:
+        st.error(f"Failed to send SMS after {job['attempts']} attempts: {job['last_error']}")
+    elif job['last_error']:
+        st.warning(f"Retrying SMS (attempt {job['attempts']}): {job['last_error']}")
+    else:
+        st.info("SMS queued, sending in the background...")
+
+def lod_view_change(view, zoom):
+    """
+    (zoom, [lat, lon]) the map should be rebuilt at when the view st_folium reports
+    (its last returned value: zoom, center) shows another fire level of detail than
+    `zoom`, the zoom the map was built with; None while the level is the same. The
+    LOD levels are whole zoom levels (see fires_for_zoom), so a pan or a zoom within
+    one level keeps the map as it is.
+    """
+    if not view or not view.get('zoom'):
+        return None
+    if int(np.ceil(view['zoom'])) == int(np.ceil(zoom)):
+        return None
+    center = view.get('center') or {}
+    return view['zoom'], ([center['lat'], center['lng']] if 'lat' in center and 'lng' in center else None)
+
+
+def render_map(processed_data, fire_df, center_coords=None, zoom=10, selected_id=None, route=None,
+               projected_fire_df=None, key=None):
     """
     Renders the Folium map.
 
@@ -160,18 +270,36 @@ def render_map(processed_data, fire_df, center_coords=None, zoom=10, selected_id
         center_coords: Tuple (lat, lon) to center the map.
         zoom: Initial zoom level.
         selected_id: ID of the citizen to automatically open the popup for.
+        route: Optional planned route (from plan_route) to draw from the rescuer position.
+        projected_fire_df: Optional projected fire perimeters (from FireSpreadModel.project), drawn dashed.
+        key: Optional session-state key holding st_folium's last returned value (see lod_view_change).
 
     Returns:
         The clicked object from st_folium.
     """
     st.subheader("📍 Live Tactical Map")
 
+    with span("map.build"):
+        m = build_map(processed_data, fire_df, center_coords, zoom, selected_id, route, projected_fire_df)
+
+    # Render Map using streamlit-folium with maximized size
+    with span("map.st_folium"):
+        return st_folium(m, use_container_width=True, height=700, key=key)
+
+def build_map(processed_data, fire_df, center_coords=None, zoom=10, selected_id=None, route=None,
+              projected_fire_df=None):
+    """Folium map with the fire, citizen and route layers of render_map (same arguments)."""
     # Initialize Map
     if center_coords is None:
         center_coords = [DEFAULT_LAT, DEFAULT_LON]
 
     m = folium.Map(location=center_coords, zoom_start=zoom)
 
+    # Only the perimeter vertices visible at this zoom level (Douglas-Peucker LOD)
+    fire_df = fires_for_zoom(fire_df, zoom)
+    if fire_df is None or fire_df.empty:
+        fire_df = pd.DataFrame(columns=['fire_id', 'lat', 'lon'])  # No active fires
+
         # Layer 1: Fire Location
     for fire_id, fire_group in fire_df.groupby('fire_id'):
             
@@ -201,6 +329,18 @@ def render_map(processed_data, fire_df, center_coords=None, zoom=10, selected_id
                 # tooltip=f"Fire Zone {fire_id}"
             ).add_to(m)
 
+    # Layer 1b: Projected fire perimeter
+    if projected_fire_df is not None and not projected_fire_df.empty:
+        for fire_id, fire_group in projected_fire_df.groupby('fire_id'):
+            folium.Polygon(
+                locations=fire_group[['lat', 'lon']].values.tolist(),
+                color='orange',
+                weight=2,
+                dash_array='6 6',
+                fill=False,
+                tooltip=f"Projected spread of fire {fire_id}"
+            ).add_to(m)
+
     # Layer 2: The People
     for _, row in processed_data.iterrows():
         if row['present'] == 0:
@@ -245,55 +385,284 @@ def render_map(processed_data, fire_df, center_coords=None, zoom=10, selected_id
         
 
 
-    # Render Map using streamlit-folium with maximized size
-    return st_folium(m, use_container_width=True, height=700)
+    # Layer 3: Planned rescue route
+    if route is not None and not route.empty:
+        path = [[RESCUER_LAT, RESCUER_LON]] + route[['lat', 'lon']].values.tolist()
+        folium.PolyLine(path, color='blue', weight=3, opacity=0.8, tooltip="Rescue route").add_to(m)
+        folium.Marker(
+            location=[RESCUER_LAT, RESCUER_LON],
+            tooltip="Rescue team",
+            icon=folium.Icon(color='blue', icon='ambulance', prefix='fa')
+        ).add_to(m)
+        for stop_order, lat, lon in zip(route['stop_order'], route['lat'], route['lon']):
+            folium.Marker(
+                location=[lat, lon],
+                icon=folium.DivIcon(html=f'<div style="font-weight:bold;color:blue">{stop_order}</div>')
+            ).add_to(m)
+
+    return m
+
+def format_age(seconds):
+    """'45 s', '12 min', '3 h' style age for captions."""
+    if seconds < 90:
+        return f"{seconds:.0f} s"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.0f} h"
+
+
+def render_snapshot_caption(snapshot, rankings_fetched_at=None):
+    """
+    Version and freshness of the data and of the API rankings behind the current view.
+    rankings_fetched_at is the live RankingCache time (data plane), not the one the
+    snapshot was ranked with: unchanged rankings refresh it without a new version.
+    """
+    updated = time.strftime('%H:%M:%S', time.localtime(snapshot.created_at))
+    if rankings_fetched_at is not None:
+        rankings = f"API rankings {format_age(time.time() - rankings_fetched_at)} old"
+    else:
+        rankings = "local ranking model"
+    st.caption(f"Live data v{snapshot.data_version} · updated {updated} · {rankings}")
+
+
+def render_degraded_banner(report):
+    """Warns the operator about upstreams that are down or served from their local replica."""
+    notes = []
+    for item in report:
+        if not item['degraded']:
+            continue
+        note = f"{item['dependency']} ({item['state'].lower().replace('_', '-')}"
+        if item['replica_age_s'] is not None:
+            note += f", last good copy {item['replica_age_s'] // 60} min old"
+        notes.append(note + ")")
+    if notes:
+        st.warning("⚠️ Degraded mode, working offline for: " + ", ".join(notes))
+
+
+def render_rank_alerts(alerts, new_alerts):
+    """Toasts the escalations raised since the session last looked, and lists the recent ones."""
+    for alert in new_alerts[-5:]:
+        st.toast(f"🚨 {alert['fullname'] or 'ID ' + str(alert['id'])}: {alert['from'] or 'new'} → {alert['to']}")
+    if not alerts:
+        return
+    with st.expander(f"🚨 Risk escalations ({len(alerts)})", expanded=bool(new_alerts)):
+        table = pd.DataFrame(alerts[::-1])
+        table['time'] = pd.to_datetime(table['time'], unit='s').dt.strftime('%H:%M:%S')
+        st.dataframe(table[['time', 'id', 'fullname', 'from', 'to', 'reason']], hide_index=True,
+                     use_container_width=True, height=min(35 * len(table) + 38, 250))
+
+
+def render_replay_controls(moments):
+    """
+    Playback controls over the recorded (version, recorded_at) moments.
+    Returns (selected position, playing); starts at the latest moment.
+    """
+    if "replay_next" in st.session_state:
+        st.session_state.replay_position = st.session_state.pop("replay_next")
+    if st.session_state.get("replay_position") not in range(len(moments)):
+        st.session_state.replay_position = len(moments) - 1
+
+    c1, c2 = st.columns([1, 6])
+    playing = c1.toggle("▶ Play", key="replay_playing")
+    position = c2.select_slider(
+        "Recorded moment", options=list(range(len(moments))), key="replay_position",
+        format_func=lambda i: f"{time.strftime('%H:%M:%S', time.localtime(moments[i][1]))} · v{moments[i][0]}"
+    )
+    return position, playing
+
+
+def render_replay_view(snapshot, center_coords=None, zoom=12.5):
+    """Map and top of the list as they were at one recorded version (a HistoricalSnapshot)."""
+    ranked = snapshot.ranked
+    recorded = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot.recorded_at))
+    categories = ranked['risk_category'].value_counts() if 'risk_category' in ranked.columns else {}
+    summary = ", ".join(f"{categories[name]} {name}" for name in ('CRITICAL', 'HIGH') if name in categories)
+    st.caption(f"Replaying v{snapshot.version} recorded {recorded} · {len(ranked)} citizens"
+               + (f" · {summary}" if summary else ""))
+
+    col_map, col_list = st.columns([7, 3])
+    with col_map:
+        with span("map.build"):
+            m = build_map(ranked, snapshot.fires, center_coords, zoom)
+        # Read-only map: interactions do not rerun the app
+        st_folium(m, use_container_width=True, height=500, key="replay_map", returned_objects=[])
+    with col_list:
+        columns = [c for c in ('id', 'fullname', 'risk_category', 'urgency_score', 'present') if c in ranked.columns]
+        st.dataframe(ranked[columns].head(LIST_PAGE_SIZE), hide_index=True, use_container_width=True, height=500)
+
+
+def render_ops_panel(registry):
+    """
+    Ops view of the instrumentation (src.metrics): per-stage latency percentiles,
+    cache hit rates, payload sizes and counters, with JSON / Prometheus export.
+    """
+    with st.expander("🛠️ Ops metrics", expanded=True):
+        # The flag is process-wide: only an operator's change writes it (in the callback, which
+        # runs before this), a rerun only shows its current value
+        def set_enabled():
+            registry.enabled = st.session_state.ops_metrics_enabled
+
+        st.session_state.ops_metrics_enabled = registry.enabled
+        st.toggle("Collect metrics", key="ops_metrics_enabled", on_change=set_enabled)
+        summary = registry.summary()
+
+        if summary["spans"]:
+            spans = pd.DataFrame.from_dict(summary["spans"], orient='index')
+            latency = spans[['p50', 'p90', 'p99', 'max']] * 1000
+            latency.insert(0, 'count', spans['count'])
+            st.dataframe(latency.round(1).rename(columns=lambda c: c if c == 'count' else f"{c} (ms)"),
+                         use_container_width=True)
+        else:
+            st.caption("No spans recorded yet.")
+
+        c1, c2 = st.columns(2)
+        with c1:
+            if summary["cache_hit_rates"]:
+                st.dataframe(pd.DataFrame.from_dict(summary["cache_hit_rates"], orient='index').round(3),
+                             use_container_width=True)
+            if summary["counters"]:
+                st.dataframe(pd.Series(summary["counters"], name="count"), use_container_width=True)
+        with c2:
+            if summary["sizes"]:
+                sizes = pd.DataFrame.from_dict(summary["sizes"], orient='index')
+                st.dataframe((sizes[['p50', 'p90', 'max']] / 1024).round(1).rename(columns=lambda c: f"{c} (KiB)"),
+                             use_container_width=True)
+
+        c1, c2, c3 = st.columns(3)
+        if c1.button("Write metrics file", key="ops_write_metrics"):
+            st.success(f"Metrics written to {registry.write_file(METRICS_FILE)}")
+        c2.download_button("Prometheus text", registry.prometheus_text(), file_name="metrics.prom",
+                           key="ops_download_prometheus")
+        if c3.button("Reset", key="ops_reset_metrics"):
+            registry.reset()
+
+
+def render_citizen_filters():
+    """
+    Renders the list filters (risk category, life support, distance band, name/notes search).
+    Returns them as keyword arguments for CitizenIndex.query.
+    """
+    with st.expander("🔎 Filter citizens"):
+        text = st.text_input("Search name or notes", key="citizen_filter_text")
+        categories = st.multiselect("Risk category", ['CRITICAL', 'HIGH', 'LOW'], key="citizen_filter_categories")
+        bands = st.multiselect("Distance from danger", [band[0] for band in DISTANCE_BANDS], key="citizen_filter_bands")
+        life_support = st.radio(
+            "Life support", ["Any", "Yes", "No"], horizontal=True, key="citizen_filter_life_support"
+        )
+
+    return {
+        "text": text,
+        "categories": categories,
+        "bands": bands,
+        "life_support": {"Any": None, "Yes": True, "No": False}[life_support],
+    }
+
+
+def list_page(full_data, positions, page, page_size=LIST_PAGE_SIZE):
+    """
+    One page of the citizen list: (display frame, positions in full_data of its rows, start).
+    The page number is clamped to the existing pages; row i of the display frame is
+    full_data.iloc[page_positions[i]], which maps a list selection back to its citizen.
+    """
+    n_pages = max(1, -(-len(positions) // page_size))
+    start = (min(max(page, 1), n_pages) - 1) * page_size
+    page_positions = np.asarray(positions)[start:start + page_size]
+    cols = [c for c in ('id', 'fullname', 'risk_category', 'life_support') if c in full_data.columns]
+    # Rows first: the column selection then only copies the page
+    display_df = full_data.iloc[page_positions][cols].reset_index(drop=True)
+    return display_df, page_positions, start
 
-def render_citizen_list(full_data, selected_id=None, widget_key="citizen_list"):
+
+def render_citizen_list(full_data, selected_id=None, widget_key="citizen_list", page_size=LIST_PAGE_SIZE, positions=None):
     """
-    Renders the citizen list as a selectable dataframe with visual highlighting.
-    Filters out citizens who are not present (present == 0).
+    Renders the citizen list as a paginated, selectable dataframe with visual highlighting.
+    Filters out citizens who are not present (present == 0), unless the caller passes
+    precomputed row positions (e.g. from CitizenIndex.query).
+
+    Only the current page is copied, styled and sent to the browser, so the cost of a
+    rerun does not grow with the number of present citizens.
+
+    Returns:
+        The selected citizen row (pd.Series from full_data) or None.
     """
     st.subheader("Citizens")
 
     # 1. Detail View
     # We use full_data here to ensure we can still see details of a selected person 
     # even if they just became "not present" in the latest update.
+    ids = full_data['id'].to_numpy()
     if selected_id is not None:
-        selected_row = full_data[full_data['id'] == selected_id]
-        if not selected_row.empty:
-            row = selected_row.iloc[0]
+        selected_pos = np.flatnonzero(ids == selected_id)
+        if len(selected_pos):
+            row = full_data.iloc[selected_pos[0]]
             st.info(f"🎯 **Selected:** {row.get('fullname', row['id'])}")
 
     # --- FILTERING LOGIC START ---
-    # Create a new dataframe for the list view that excludes non-present citizens
-    if 'present' in full_data.columns:
-        list_source = full_data[full_data['present'] != 0].copy()
+    # Work on row positions only; no frame is copied until the page is sliced
+    if positions is not None:
+        positions = np.asarray(positions)
+    elif 'present' in full_data.columns:
+        positions = np.flatnonzero(full_data['present'].to_numpy() != 0)
     else:
-        list_source = full_data.copy()
+        positions = np.arange(len(full_data))
     # --- FILTERING LOGIC END ---
 
-    # 2. Prepare Data
-    cols = ['id', 'fullname', 'risk_category', 'life_support']
-    # Ensure we use list_source here, not full_data
-    available_cols = [c for c in cols if c in list_source.columns]
-    display_df = list_source[available_cols].copy()
-
-    # 3. Define the Highlighter Logic
-    def highlight_selected(row):
-        if selected_id is not None and row['id'] == selected_id:
-            return ['background-color: #ffffb3; color: black'] * len(row)
-        return [''] * len(row)
-
-    # 4. Apply the Style
-    styled_df = display_df.style.apply(highlight_selected, axis=1)
-
-    # 5. Render with Dynamic Key
-    return st.dataframe(
-        styled_df,
-        use_container_width=True,
-        hide_index=True,
-        selection_mode="single-row",
-        on_select="rerun",
-        height=600,
-        key=widget_key
-    )
\ No newline at end of file
+    # 2. Pagination
+    total = len(positions)
+    n_pages = max(1, -(-total // page_size))
+    page_key = "citizen_list_page"
+
+    # Jump to the page of a citizen selected elsewhere (e.g. on the map), once per selection
+    if selected_id is not None and st.session_state.get("citizen_list_paged_to") != selected_id:
+        st.session_state.citizen_list_paged_to = selected_id
+        in_list = np.flatnonzero(ids[positions] == selected_id)
+        if len(in_list):
+            st.session_state[page_key] = int(in_list[0] // page_size) + 1
+
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+
+    page = st.number_input("Page", min_value=1, max_value=n_pages, step=1, key=page_key)
+    # Paging, styling and the dataframe serialization are the list's render time
+    with span("list.render"):
+        # 3. Prepare Data (only the page's rows are copied)
+        display_df, page_positions, start = list_page(full_data, positions, page, page_size)
+        st.caption(f"Showing {start + 1 if total else 0}-{start + len(page_positions)} of {total} citizens")
+
+        # 4. Highlight only the selected row (no per-row Python callback)
+        styled_df = display_df.style
+        if selected_id is not None:
+            selected_rows = np.flatnonzero(display_df['id'].to_numpy() == selected_id)
+            if len(selected_rows):
+                styled_df = styled_df.set_properties(
+                    subset=pd.IndexSlice[selected_rows.tolist(), :],
+                    **{'background-color': '#ffffb3', 'color': 'black'}
+                )
+
+        # 5. Render with Dynamic Key (per page, so a selection never leaks onto another page)
+        event = st.dataframe(
+            styled_df,
+            use_container_width=True,
+            hide_index=True,
+            selection_mode="single-row",
+            on_select="rerun",
+            height=600,
+            key=f"{widget_key}_p{page}"
+        )
+
+    if event and event["selection"]["rows"]:
+        return full_data.iloc[page_positions[event["selection"]["rows"][0]]]
+    return None
+
+
+def render_dispatch_panel(planner, assigned):
+    """Renders the per-team dispatch summary and the citizens assigned to a chosen team."""
+    if assigned is None or assigned.empty:
+        st.info("No present CRITICAL/HIGH citizens to dispatch.")
+        return
+
+    st.dataframe(planner.summary(assigned), use_container_width=True, hide_index=True)
+
+    team_id = st.selectbox("Team", planner.teams['team_id'].tolist(), key="dispatch_team")
+    cols = [c for c in ['id', 'fullname', 'risk_category', 'required_crew', 'notes'] if c in assigned.columns]
+    st.dataframe(assigned.loc[assigned['team_id'] == team_id, cols], use_container_width=True, hide_index=True)
@@ -0,0 +1,217 @@
+"""
+Data-plane worker service.
+
+Runs the LocalDataPlane (refresh, ranking, index, routing, fire projection,
+broadcast selection) in its own process and serves it over
+multiprocessing.connection, so any number of Streamlit front-ends can share it.
+
+    python -m src.worker                                   # live blobs
+    python -m src.worker --citizens dummy_data/dataset_250_finalDEL.json   # local files only
+
+Front-ends use it when WORKER_ADDRESS is set (e.g. WORKER_ADDRESS=127.0.0.1:6100).
+Both sides need the same WORKER_AUTHKEY: requests are unpickled, so anyone holding
+the key can run code in the worker. Keep it secret and bind to loopback unless needed.
+"""
+import argparse
+import dataclasses
+import json
+import threading
+from multiprocessing.connection import Listener, Client
+from src.config import WORKER_ADDRESS, WORKER_AUTHKEY
+from src.data import DataManager
+from src.data_plane import LocalDataPlane
+
+
+class WorkerError(RuntimeError):
+    """Raised by RemoteDataPlane when the worker reports an error for a call."""
+
+
+def require_authkey(authkey):
+    """The worker authkey as bytes; raises ValueError when it is not configured."""
+    if not authkey:
+        raise ValueError("WORKER_AUTHKEY must be set to use the data-plane worker")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+def parse_address(address):
+    """'host:port' -> (host, port)."""
+    host, _, port = address.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+class WorkerServer:
+    """
+    Serves a LocalDataPlane. Each client connection gets its own thread; a request
+    is (method, args, kwargs) and the reply ('ok', result) or ('error', message).
+    """
+
+    def __init__(self, plane, address, authkey=WORKER_AUTHKEY):
+        self.plane = plane
+        self.listener = Listener(address, authkey=require_authkey(authkey))
+        self.address = self.listener.address
+        self._closed = threading.Event()
+
+    def serve_forever(self):
+        print(f"Data-plane worker listening on {self.address[0]}:{self.address[1]}")
+        while not self._closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self._closed.is_set():
+                    break
+                continue
+            except Exception as e:
+                # e.g. a client with the wrong authkey
+                print(f"Rejected worker connection: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if method not in LocalDataPlane.RPC_METHODS:
+                        raise AttributeError(f"Unknown data-plane method: {method}")
+                    result = getattr(self.plane, method)(*args, **kwargs)
+                    if method == 'snapshot' and result is not None:
+                        # Clients get the frames only: derived values and fire history stay here
+                        result = dataclasses.replace(result, fire_history=(), derived={})
+                    reply = ('ok', result)
+                except Exception as e:
+                    print(f"Data-plane call {method} failed: {e}")
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def close(self):
+        self._closed.set()
+        self.listener.close()
+
+
+class RemoteDataPlane:
+    """
+    Client side of the worker, with the data-plane API of LocalDataPlane.
+
+    The latest SharedSnapshot is fetched once per version and shared by all sessions
+    of this front-end process; each thread (Streamlit session) uses its own connection.
+    """
+
+    def __init__(self, address, authkey=WORKER_AUTHKEY):
+        self.address = address
+        self.authkey = require_authkey(authkey)
+        self._local = threading.local()
+        self._shared = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, method, *args, **kwargs):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((method, args, kwargs))
+                status, value = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Broken connection (e.g. worker restarted): reconnect once
+                self._local.conn = None
+                if attempt:
+                    raise
+        if status != 'ok':
+            raise WorkerError(value)
+        return value
+
+    def current(self):
+        known = self._shared.version if self._shared is not None else None
+        fresh = self._call('snapshot', known)
+        if fresh is not None:
+            with self._lock:
+                if self._shared is None or fresh.version > self._shared.version:
+                    self._shared = fresh
+        return self._shared
+
+    def snapshot(self, known_version=None):
+        shared = self.current()
+        return None if shared.version == known_version else shared
+
+    def query(self, version=None, **filters):
+        return self._call('query', version, **filters)
+
+    def route(self, version=None, max_stops=25):
+        return self._call('route', version, max_stops=max_stops)
+
+    def project_fires(self, version=None, minutes=60):
+        return self._call('project_fires', version, minutes=minutes)
+
+    def broadcast_recipients(self, version=None, radius_m=1000, categories=None):
+        return self._call('broadcast_recipients', version, radius_m=radius_m, categories=categories)
+
+    def set_viewport(self, viewer, bbox):
+        self._call('set_viewport', viewer, bbox)
+
+    def health(self):
+        return self._call('health')
+
+    def rankings_fetched_at(self):
+        return self._call('rankings_fetched_at')
+
+    def alerts(self, since_version=0):
+        return self._call('alerts', since_version)
+
+    def timeline(self, citizen_id=None, start=None, end=None):
+        return self._call('timeline', citizen_id, start=start, end=end)
+
+    def replay_moments(self):
+        return self._call('replay_moments')
+
+    def replay(self, timestamp=None):
+        return self._call('replay', timestamp)
+
+
+def local_file_loaders(citizens_path, fires_path=None):
+    """Loaders reading the datasets from local JSON files (no cloud access)."""
+    def read(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_citizens():
+        return DataManager.citizens_from_json(read(citizens_path))
+
+    def load_fires():
+        return DataManager.fires_from_json(read(fires_path)) if fires_path else DataManager.fires_from_json([])
+
+    return load_citizens, load_fires
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data-plane worker service")
+    parser.add_argument("--address", default=WORKER_ADDRESS or "127.0.0.1:6100", help="host:port to listen on")
+    parser.add_argument("--citizens", help="Local citizen JSON file instead of the blob")
+    parser.add_argument("--fires", help="Local fire JSON file instead of the blob")
+    args = parser.parse_args()
+    if not WORKER_AUTHKEY:
+        parser.error("WORKER_AUTHKEY must be set (the same secret on the worker and the dashboards)")
+
+    loaders = local_file_loaders(args.citizens, args.fires) if args.citizens else (None, None)
+    plane = LocalDataPlane.create(*loaders)
+    server = WorkerServer(plane, parse_address(args.address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+        plane.service.stop()
+
+
+if __name__ == '__main__':
+    main()
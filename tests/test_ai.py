@@ -1,6 +1,9 @@
+import json
 import unittest
 from unittest.mock import MagicMock, patch
+import pandas as pd
 from src.ai import AIAssistant
+from src.notes import add_note_features
 
 class TestAIAssistant(unittest.TestCase):
 
@@ -48,5 +51,21 @@ class TestAIAssistant(unittest.TestCase):
         response = AIAssistant.get_response("Hello", self.context_data)
         self.assertIn("configuration is missing", response)
 
+    def test_build_context_sends_only_the_selected_note(self):
+        """Raw note text reaches the prompt only for the selected citizen."""
+        notes = ["Needs oxygen, lives alone on the third floor", "Walks with a cane, back door is open"]
+        raw_data = add_note_features(pd.DataFrame({'id': [1, 2], 'fullname': ['Jane', 'Bob'], 'notes': notes}))
+        processed_data = raw_data.assign(risk_category=['CRITICAL', 'LOW'], urgency_score=[90.0, 10.0])
+
+        context = json.dumps(AIAssistant.build_context(None, raw_data, processed_data), ensure_ascii=False)
+        for note in notes:
+            self.assertNotIn(note, context)
+        self.assertIn("note_summary", context)
+
+        selected = processed_data.iloc[0].to_dict()
+        context = json.dumps(AIAssistant.build_context(selected, raw_data, processed_data), ensure_ascii=False)
+        self.assertEqual(context.count(notes[0]), 1)
+        self.assertNotIn(notes[1], context)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from benchmarks.loadtest import make_trace, summarize, ACTION_WEIGHTS
+from benchmarks.run import compare
+
+
+class TestBenchmarkBaseline(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {"ranking_api[250]": {"median_s": 0.010, "bytes": None},
+                         "ai_context[250]": {"median_s": 0.010, "bytes": 1000}}
+
+    def result(self, median_s, size_bytes=None):
+        return {"median_s": median_s, "min_s": median_s, "repeats": 3, "bytes": size_bytes}
+
+    def test_within_tolerance(self):
+        status, _ = compare("ranking_api[250]", self.result(0.014), self.baseline, 0.5, 0.1)
+        self.assertEqual(status, "ok")
+
+    def test_slower_than_tolerance(self):
+        status, note = compare("ranking_api[250]", self.result(0.016), self.baseline, 0.5, 0.1)
+        self.assertEqual(status, "REGRESSION")
+        self.assertIn("x1.60", note)
+
+    def test_payload_growth(self):
+        status, _ = compare("ai_context[250]", self.result(0.010, 1200), self.baseline, 0.5, 0.1)
+        self.assertEqual(status, "REGRESSION")
+
+    def test_new_benchmark(self):
+        status, _ = compare("render_map[250]", self.result(1.0), self.baseline, 0.5, 0.1)
+        self.assertEqual(status, "new")
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_trace_is_seeded(self):
+        trace = make_trace(50, seed=3)
+        self.assertEqual(trace, make_trace(50, seed=3))
+        self.assertEqual(trace[0], {"action": "open"})
+        self.assertEqual(len(trace), 51)
+        self.assertTrue({step["action"] for step in trace[1:]} <= set(ACTION_WEIGHTS))
+        self.assertTrue(all("text" in step for step in trace if step["action"] == "chat"))
+
+    def test_summary(self):
+        samples = [("map_click", 0.1)] * 9 + [("chat", 2.0)]
+        report = summarize(samples, wall_s=5.0)
+        self.assertEqual(report["throughput_per_s"], 2.0)
+        self.assertEqual(report["latency"]["all"]["count"], 10)
+        self.assertAlmostEqual(report["latency"]["map_click"]["p95_ms"], 100.0)
+        self.assertAlmostEqual(report["latency"]["all"]["max_ms"], 2000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.dispatch import DispatchPlanner, default_teams, required_crew_from_notes
+
+
+class TestDispatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 400
+        self.citizens = pd.DataFrame({
+            'id': np.arange(1, n + 1),
+            'lat': 38.04 + rng.normal(0, 0.03, n),
+            'lon': 23.99 + rng.normal(0, 0.03, n),
+            'present': 1,
+            'risk_category': rng.choice(['CRITICAL', 'HIGH', 'LOW'], n),
+            'notes': rng.choice(['Απαιτούνται δύο διασώστες', 'Μπείτε από την πίσω πόρτα'], n, p=[0.2, 0.8])
+        })
+        self.teams = default_teams(4)
+        self.teams.loc[0, 'crew'] = 1
+
+    def test_required_crew_from_notes(self):
+        crew = required_crew_from_notes(['Απαιτούνται δύο διασώστες', 'ΤΡΕΙΣ ΔΙΑΣΩΣΤΕΣ', None, 'Ήπια κώφωση'])
+        self.assertEqual(crew.tolist(), [2, 3, 1, 1])
+
+    def test_plan_respects_categories_capacity_and_crew(self):
+        planner = DispatchPlanner(self.teams)
+        assigned = planner.plan(self.citizens)
+
+        expected = self.citizens['risk_category'].isin(['CRITICAL', 'HIGH']).sum()
+        self.assertEqual(len(assigned), expected)
+        self.assertFalse(assigned['team_id'].isna().any())
+
+        loads = assigned['team_id'].value_counts()
+        self.assertLessEqual(loads.max(), planner._capacity(len(assigned)))
+
+        crews = assigned['team_id'].map(self.teams.set_index('team_id')['crew'])
+        self.assertTrue((crews >= assigned['required_crew']).all())
+
+    def test_update_is_incremental(self):
+        planner = DispatchPlanner(self.teams)
+        first = planner.plan(self.citizens).set_index('id')['team_id']
+
+        # Rescue a few citizens: everyone else keeps their team, no full replan
+        updated = self.citizens.copy()
+        rescued = first.index[:5]
+        updated.loc[updated['id'].isin(rescued), 'present'] = 0
+        second = planner.update(updated).set_index('id')['team_id']
+
+        self.assertEqual(planner.full_replans, 1)
+        self.assertFalse(second.index.isin(rescued).any())
+        pd.testing.assert_series_equal(second, first.drop(rescued))
+
+    def test_update_assigns_newcomers(self):
+        planner = DispatchPlanner(self.teams)
+        planner.plan(self.citizens)
+        newcomer = self.citizens.iloc[[0]].assign(id=999, risk_category='CRITICAL')
+        assigned = planner.update(pd.concat([self.citizens, newcomer], ignore_index=True))
+        self.assertIn(999, assigned['id'].tolist())
+        self.assertTrue(assigned.loc[assigned['id'] == 999, 'team_id'].notna().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+from src.event_log import (ADDED, BASELINE, ESCALATED, LEFT, REMOVED, EventLog, RankChangeTracker, RankState,
+                           diff_rank_states, sms_alert_notifier)
+from src.refresh import SnapshotDiff
+
+
+def make_shared(version, categories, present=None, ids=None, data_version=None, ranking_version=0):
+    ids = list(ids if ids is not None else range(1, len(categories) + 1))
+    ranked = pd.DataFrame({
+        'id': ids,
+        'fullname': [f"Citizen {i}" for i in ids],
+        'risk_category': categories,
+        'present': present if present is not None else [1] * len(ids),
+        'urgency_score': np.linspace(1, 0, len(ids)),
+    })
+    return SimpleNamespace(version=version, data_version=data_version or version,
+                           ranking_version=ranking_version, ranked=ranked)
+
+
+class TestDiff(unittest.TestCase):
+    def test_baseline_then_changes(self):
+        first = RankState.from_ranked(make_shared(1, ['LOW', 'HIGH', 'LOW']).ranked)
+        self.assertTrue((diff_rank_states(None, first)['flags'] == BASELINE).all())
+
+        second = RankState.from_ranked(make_shared(2, ['CRITICAL', 'HIGH', 'LOW'], present=[1, 1, 0]).ranked)
+        events = diff_rank_states(first, second)
+        self.assertEqual(events['id'].tolist(), [1, 3])
+        self.assertEqual(events['flags'].tolist(), [ESCALATED, LEFT])
+        self.assertEqual(events['prev_category'].tolist(), [0, 0])
+
+    def test_added_removed_and_candidates(self):
+        prev = RankState.from_ranked(make_shared(1, ['LOW', 'LOW', 'LOW']).ranked)
+        curr = RankState.from_ranked(make_shared(2, ['HIGH', 'LOW', 'CRITICAL'], ids=[3, 2, 4]).ranked)
+        events = diff_rank_states(prev, curr)
+        self.assertEqual(events['id'].tolist(), [1, 3, 4])
+        self.assertEqual(events['flags'].tolist(), [REMOVED, ESCALATED, ADDED])
+        # Only the candidate ids are compared
+        self.assertEqual(diff_rank_states(prev, curr, candidate_ids=[4, 2])['id'].tolist(), [4])
+
+
+class TestEventLog(unittest.TestCase):
+    def test_replay_and_timeline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log = EventLog(directory)
+            tracker = RankChangeTracker(log)
+            tracker.observe(make_shared(1, ['LOW', 'LOW', 'HIGH']))
+            log_times = [log.read()['time'].max()]
+            tracker.observe(make_shared(2, ['CRITICAL', 'LOW', 'HIGH']))
+            tracker.observe(make_shared(3, ['CRITICAL', 'LOW'], ids=[1, 2]))
+
+            at_start = log.state_at(log_times[0])
+            self.assertEqual(at_start['risk_category'].tolist(), ['LOW', 'LOW', 'HIGH'])
+            latest = log.state_at()
+            self.assertEqual(latest['id'].tolist(), [1, 2])
+            self.assertEqual(latest['risk_category'].tolist(), ['CRITICAL', 'LOW'])
+
+            timeline = log.timeline(1)
+            self.assertEqual(timeline['change'].tolist(), ['baseline', 'escalated'])
+            self.assertEqual(timeline['category'].tolist(), ['LOW', 'CRITICAL'])
+
+    def test_reopened_and_compacted_log_resumes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tracker = RankChangeTracker(EventLog(directory))
+            tracker.observe(make_shared(1, ['LOW', 'LOW']))
+            tracker.observe(make_shared(2, ['HIGH', 'LOW']))
+
+            reopened = EventLog(directory)
+            self.assertEqual((len(reopened), reopened.segment_count), (3, 2))
+            self.assertEqual(reopened.compact(), 1)
+            self.assertEqual(EventLog(directory).segment_count, 1)
+
+            # After a restart only what changed meanwhile is logged (no new baseline)
+            tracker = RankChangeTracker(EventLog(directory))
+            alerts = tracker.observe(make_shared(1, ['HIGH', 'CRITICAL']))
+            self.assertEqual([alert['id'] for alert in alerts], [2])
+            self.assertEqual(len(tracker.log), 4)
+
+    def test_append_compacts_past_the_segment_threshold(self):
+        columns = {'id': [1], 'flags': [ESCALATED], 'category': [2], 'present': [1], 'score': [0.5],
+                   'prev_category': [0], 'prev_present': [1]}
+        with tempfile.TemporaryDirectory() as directory:
+            log = EventLog(directory, compact_after=3)
+            for version in range(1, 5):
+                log.append(version, 1000.0 + version, columns)
+            self.assertEqual((len(log), log.segment_count), (4, 1))
+            self.assertEqual(len(os.listdir(directory)), 1)
+            self.assertEqual(log.read()['version'].tolist(), [1, 2, 3, 4])
+
+
+class TestRankChangeTracker(unittest.TestCase):
+    def test_alerts_on_escalation_and_arrival(self):
+        notify = MagicMock()
+        tracker = RankChangeTracker(EventLog(None), min_category='HIGH', notify=notify)
+        self.assertEqual(tracker.observe(make_shared(1, ['LOW', 'HIGH', 'CRITICAL'], present=[1, 1, 0])), [])
+        alerts = tracker.observe(make_shared(2, ['HIGH', 'HIGH', 'CRITICAL'], present=[1, 1, 1]))
+        self.assertEqual([(a['id'], a['reason'], a['from'], a['to']) for a in alerts],
+                         [(1, 'escalated', 'LOW', 'HIGH'), (3, 'arrived', 'CRITICAL', 'CRITICAL')])
+        self.assertEqual(alerts[0]['fullname'], 'Citizen 1')
+        notify.assert_called_once_with(alerts)
+        # Versions are observed once
+        self.assertEqual(tracker.observe(make_shared(2, ['LOW', 'LOW', 'LOW'])), [])
+        self.assertEqual(tracker.since(1), alerts)
+        self.assertEqual(tracker.since(2), [])
+
+    def test_data_diff_limits_the_comparison(self):
+        tracker = RankChangeTracker(EventLog(None))
+        tracker.observe(make_shared(1, ['LOW', 'LOW', 'LOW']))
+        # Citizen 3 changed but the refresh only reported 1: only 1 is compared
+        alerts = tracker.observe(make_shared(2, ['CRITICAL', 'LOW', 'CRITICAL']), SnapshotDiff(changed_ids=(1,)))
+        self.assertEqual([alert['id'] for alert in alerts], [1])
+        # A ranking change compares everything
+        alerts = tracker.observe(make_shared(3, ['CRITICAL', 'CRITICAL', 'CRITICAL'], data_version=2,
+                                             ranking_version=1), SnapshotDiff())
+        self.assertEqual([alert['id'] for alert in alerts], [2])
+
+    def test_sms_notifier_enqueues_one_message(self):
+        queue = MagicMock()
+        notify = sms_alert_notifier(['+301', '+302'], queue=queue, max_listed=1)
+        notify([{'id': 1, 'fullname': 'A', 'to': 'CRITICAL'}, {'id': 2, 'fullname': 'B', 'to': 'CRITICAL'}])
+        destinations, text = queue.enqueue.call_args.args
+        self.assertEqual(destinations, [{'to': '+301'}, {'to': '+302'}])
+        self.assertIn("ID 1 A -> CRITICAL (+1 more)", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
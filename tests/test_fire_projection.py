@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.geo import EARTH_RADIUS_M
+from src.fire_projection import FireSpreadModel, add_time_to_impact
+from src.logic import apply_time_to_impact
+
+CENTER_LAT, CENTER_LON = 38.04, 23.99
+
+
+def circle_fire(radius_m, fire_id=1, n=64):
+    angle = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    lat = CENTER_LAT + np.degrees(radius_m * np.sin(angle) / EARTH_RADIUS_M)
+    lon = CENTER_LON + np.degrees(radius_m * np.cos(angle) / (EARTH_RADIUS_M * np.cos(np.radians(CENTER_LAT))))
+    return pd.DataFrame({'fire_id': fire_id, 'lat': lat, 'lon': lon})
+
+
+def north_of_center(metres):
+    return CENTER_LAT + np.degrees(metres / EARTH_RADIUS_M)
+
+
+class TestFireProjection(unittest.TestCase):
+    def setUp(self):
+        # Circle growing by 100 m every 10 minutes (~0.167 m/s in every direction)
+        self.history = [(t * 600.0, circle_fire(1000 + 100 * t)) for t in range(3)]
+        self.model = FireSpreadModel.fit(self.history)
+
+    def test_spread_rate_from_history(self):
+        self.assertAlmostEqual(self.model.max_rate, 100 / 600, delta=0.02)
+
+    def test_time_to_impact(self):
+        lat = [CENTER_LAT, north_of_center(3200), north_of_center(50_000)]
+        lon = [CENTER_LON] * 3
+        eta = self.model.time_to_impact(lat, lon)
+
+        self.assertEqual(eta[0], 0.0)
+        # 2 km outside the 1.2 km perimeter at 1/6 m/s -> ~200 minutes
+        self.assertAlmostEqual(eta[1] / 60, 200, delta=25)
+        self.assertTrue(np.isinf(eta[2]))
+
+    def test_projection_expands_perimeter(self):
+        projected = self.model.project(3600)
+        radius = (projected['lat'].max() - CENTER_LAT) * np.radians(1) * EARTH_RADIUS_M
+        self.assertAlmostEqual(radius, 1200 + 600, delta=60)
+
+    def test_single_snapshot_does_not_spread(self):
+        model = FireSpreadModel.fit(self.history[-1:])
+        self.assertEqual(model.max_rate, 0.0)
+        eta = model.time_to_impact([north_of_center(1500)], [CENTER_LON])
+        self.assertTrue(np.isinf(eta[0]))
+
+    def test_time_to_impact_escalates_ranking(self):
+        citizens = pd.DataFrame({
+            'id': [1, 2, 3],
+            'lat': [north_of_center(1300), north_of_center(1700), north_of_center(20_000)],
+            'lon': [CENTER_LON] * 3,
+        })
+        ranked = add_time_to_impact(citizens, self.history)
+        ranked['risk_category'] = 'LOW'
+        ranked['urgency_score'] = 10.0
+
+        ranked = apply_time_to_impact(ranked)
+        self.assertEqual(ranked['risk_category'].tolist(), ['CRITICAL', 'HIGH', 'LOW'])
+        self.assertGreater(ranked['urgency_score'].iloc[0], ranked['urgency_score'].iloc[1])
+        self.assertEqual(ranked['urgency_score'].iloc[2], 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.geo import (haversine_m, points_in_polygon, distance_to_polygon, distance_to_fires_m,
+                     add_fire_lod, fires_for_zoom, fires_within_tolerance, fire_bounds)
+from src.broadcast import select_broadcast_recipients, build_sms_destinations
+
+
+def square_fire(center_lat=38.04, center_lon=23.99, half_size=0.01, fire_id=0):
+    return pd.DataFrame({
+        'fire_id': [fire_id] * 4,
+        'lat': [center_lat - half_size, center_lat - half_size, center_lat + half_size, center_lat + half_size],
+        'lon': [center_lon - half_size, center_lon + half_size, center_lon + half_size, center_lon - half_size]
+    })
+
+
+class TestGeo(unittest.TestCase):
+    def test_haversine_known_distance(self):
+        # One degree of latitude is ~111.2 km
+        self.assertAlmostEqual(haversine_m(0.0, 0.0, 1.0, 0.0) / 1000, 111.19, places=1)
+
+    def test_points_in_polygon(self):
+        px = np.array([0.0, 10.0, 10.0, 0.0])
+        py = np.array([0.0, 0.0, 10.0, 10.0])
+        inside = points_in_polygon([5, 15, -1, 9.9], [5, 5, 5, 0.1], px, py)
+        self.assertEqual(inside.tolist(), [True, False, False, True])
+
+    def test_distance_to_polygon_with_and_without_limit(self):
+        px = np.array([0.0, 10.0, 10.0, 0.0])
+        py = np.array([0.0, 0.0, 10.0, 10.0])
+        x = np.array([5.0, 13.0, 20.0])
+        y = np.array([5.0, 5.0, 14.0])
+
+        exact = distance_to_polygon(x, y, px, py)
+        np.testing.assert_allclose(exact, [0.0, 3.0, np.hypot(10, 4)])
+
+        limited = distance_to_polygon(x, y, px, py, max_distance=5)
+        self.assertEqual(limited[:2].tolist(), [0.0, 3.0])
+        self.assertTrue(np.isinf(limited[2]))
+
+    def test_distance_to_fires_m(self):
+        fire = square_fire()
+        # Center of the square, and a point ~1.1 km north of its top edge
+        dist = distance_to_fires_m([38.04, 38.06], [23.99, 23.99], fire)
+        self.assertEqual(dist[0], 0.0)
+        self.assertAlmostEqual(dist[1], 1112, delta=5)
+
+    def test_fire_lod_levels(self):
+        # Noisy 2 km circle with 4000 vertices
+        rng = np.random.default_rng(3)
+        angle = np.linspace(0, 2 * np.pi, 4000, endpoint=False)
+        radius = 0.018 + rng.normal(0, 0.00002, len(angle))
+        fire = pd.DataFrame({'fire_id': 0, 'lat': 38.04 + radius * np.sin(angle), 'lon': 23.99 + radius * np.cos(angle)})
+        lod = add_fire_lod(fire)
+
+        counts = [len(fires_for_zoom(lod, zoom)) for zoom in (8, 12, 16, 18)]
+        self.assertEqual(counts, sorted(counts))
+        self.assertGreaterEqual(counts[0], 3)
+        self.assertLess(counts[1], 200)
+        self.assertEqual(counts[-1], len(fire))
+        self.assertEqual(fire_bounds(lod)[0], (fire['lat'].min(), fire['lat'].max(), fire['lon'].min(), fire['lon'].max()))
+
+        # Simplified distances stay within the tolerance of the exact ones
+        lat = 38.04 + rng.uniform(-0.03, 0.03, 500)
+        lon = 23.99 + rng.uniform(-0.03, 0.03, 500)
+        exact = distance_to_fires_m(lat, lon, lod)
+        simplified = distance_to_fires_m(lat, lon, lod, tolerance_m=10)
+        self.assertLess(len(fires_within_tolerance(lod, 10)), len(fire))
+        self.assertLessEqual(np.abs(exact - simplified).max(), 10 + 1e-6)
+
+
+class TestBroadcast(unittest.TestCase):
+    def setUp(self):
+        self.citizens = pd.DataFrame({
+            'id': [1, 2, 3, 4],
+            'lat': [38.04, 38.052, 38.04, 38.20],
+            'lon': [23.99, 23.99, 23.99, 23.99],
+            'present': [1, 1, 0, 1],
+            'risk_category': ['CRITICAL', 'LOW', 'HIGH', 'CRITICAL'],
+            'phone': ['306900000001', '306900000002', '306900000003', None]
+        })
+        self.fire = square_fire()
+
+    def test_select_recipients_radius_and_presence(self):
+        recipients = select_broadcast_recipients(self.citizens, self.fire, radius_m=500)
+        # id 3 is not present, id 4 is ~17 km away
+        self.assertEqual(recipients['id'].tolist(), [1, 2])
+        self.assertEqual(recipients.iloc[0]['fire_distance_m'], 0.0)
+
+    def test_select_recipients_category_filter(self):
+        recipients = select_broadcast_recipients(self.citizens, self.fire, radius_m=500, categories=['critical'])
+        self.assertEqual(recipients['id'].tolist(), [1])
+        # An empty selection selects nobody (None means no filter)
+        self.assertTrue(select_broadcast_recipients(self.citizens, self.fire, radius_m=500, categories=[]).empty)
+
+    def test_build_sms_destinations(self):
+        destinations = build_sms_destinations(self.citizens)
+        self.assertEqual(destinations, [{'to': '306900000001'}, {'to': '306900000002'}, {'to': '306900000003'}])
+        self.assertEqual(build_sms_destinations(self.citizens.drop(columns=['phone'])), [])
+        # The contact column is configurable (BROADCAST_PHONE_COLUMN)
+        mobiles = self.citizens.rename(columns={'phone': 'mobile'})
+        self.assertEqual(len(build_sms_destinations(mobiles, phone_column='mobile')), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
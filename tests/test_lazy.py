@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+import src.ai as ai
+from src.lazy import lazy_attribute, lazy_module, prewarm
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_module_imported_on_first_access(self):
+        sys.modules.pop('colorsys', None)
+        colorsys = lazy_module('colorsys')
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertEqual(colorsys.rgb_to_hsv(1.0, 0.0, 0.0)[0], 0.0)
+        self.assertIn('colorsys', sys.modules)
+
+    def test_attribute_call_and_attribute_access(self):
+        OrderedDict = lazy_attribute('collections', 'OrderedDict')
+        self.assertEqual(list(OrderedDict(a=1)), ['a'])
+        self.assertEqual(OrderedDict.fromkeys('ab'), {'a': None, 'b': None})
+
+    def test_prewarm_imports_in_background(self):
+        sys.modules.pop('wave', None)
+        hook = MagicMock()
+        prewarm(('wave',), hooks=(hook,)).join(timeout=10)
+        self.assertIn('wave', sys.modules)
+        hook.assert_called_once()
+
+    def test_startup_imports_skip_heavy_sdks(self):
+        code = ("import sys, src.ui, src.ai, src.blod_util, src.speech; "
+                "print(','.join(m for m in ('openai', 'folium', 'azure.storage.blob', "
+                "'azure.cognitiveservices.speech', 'pydub') if m in sys.modules))")
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), '')
+
+
+class TestSharedOpenAIClient(unittest.TestCase):
+    def test_client_reused_until_configuration_changes(self):
+        with patch('src.ai.AzureOpenAI') as factory, patch('src.ai.AZURE_OPENAI_API_KEY', 'key'):
+            first = ai.get_openai_client()
+            self.assertIs(ai.get_openai_client(), first)
+            with patch('src.ai.AZURE_OPENAI_API_KEY', 'rotated'):
+                ai.get_openai_client()
+        self.assertEqual(factory.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@ import unittest
 import pandas as pd
 import numpy as np
 import os
-from src.logic import calculate_urgency_score
+from unittest.mock import patch
+from src.logic import apply_ranking_logic, calculate_urgency_score, category_rank, rank_order
 from src.data import DataManager
 
 class TestLogic(unittest.TestCase):
@@ -46,12 +47,26 @@ class TestLogic(unittest.TestCase):
         result = calculate_urgency_score(df, 0, 0)
         self.assertEqual(result.iloc[0]['urgency_score'], 0)
 
+    def test_category_rank(self):
+        ranks = category_rank(['CRITICAL', 'High', 'low', 'MEDIUM', 'unknown', None])
+        self.assertEqual(ranks.tolist(), [3, 2, 1, 1, 0, 0])
+
+    def test_ranking_order_is_stable(self):
+        # Ties on category and score keep their input order, in the live ranking and in rank_order
+        df = pd.DataFrame({'id': np.arange(1, 9), 'danger_level': [50, 90, 50, 50, 90, 50, 50, 50]})
+        with patch('src.logic.fetch_rankings_from_api', return_value=None), \
+                patch('src.logic.get_ranking_model', return_value=None):
+            ranked = apply_ranking_logic(df, mode='api')
+        self.assertEqual(ranked['id'].tolist(), [2, 5, 1, 3, 4, 6, 7, 8])
+        pd.testing.assert_frame_equal(rank_order(ranked), ranked)
+
 class TestData(unittest.TestCase):
     def test_data_generation(self):
         # Test original generation method
         df = DataManager.load_vulnerable_citizens(n=10)
         self.assertEqual(len(df), 10)
-        expected_cols = ['id', 'lat', 'lon', 'age', 'mobility', 'has_disease', 'oxygen_level']
+        expected_cols = ['id', 'lat', 'lon', 'fullname', 'life_support', 'vulnerability_score',
+                         'notes', 'present', 'distance_from_danger', 'danger_level']
         for col in expected_cols:
             self.assertIn(col, df.columns)
 
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import urllib.request
+from src.metrics import Metrics, start_metrics_server
+
+
+class TestMetrics(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        registry = Metrics(enabled=False)
+        with registry.span("stage"):
+            pass
+        registry.count("events")
+        registry.observe("bytes", 100)
+        decorated = registry.timed("fn")(lambda x: x + 1)
+        self.assertEqual(decorated(1), 2)
+        summary = registry.summary()
+        self.assertEqual((summary["spans"], summary["sizes"], summary["counters"]), ({}, {}, {}))
+
+    def test_disabled_overhead(self):
+        registry = Metrics(enabled=False)
+        n = 100_000
+        start = time.perf_counter()
+        for _ in range(n):
+            with registry.span("stage"):
+                pass
+        # Generous bound: a no-op span costs well under a microsecond
+        self.assertLess((time.perf_counter() - start) / n, 5e-6)
+
+    def test_spans_percentiles(self):
+        registry = Metrics(enabled=True)
+        for ms in range(1, 101):
+            registry.record("stage", ms / 1000)
+        stats = registry.summary()["spans"]["stage"]
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["p50"], 0.0505, places=4)
+        self.assertAlmostEqual(stats["max"], 0.1)
+        with registry.span("timed"):
+            time.sleep(0.01)
+        self.assertGreaterEqual(registry.summary()["spans"]["timed"]["p50"], 0.009)
+
+    def test_cache_hit_rates(self):
+        registry = Metrics(enabled=True)
+        for hit in (True, True, True, False):
+            registry.cache_hit("store", hit)
+        self.assertEqual(registry.summary()["cache_hit_rates"]["store"], {"hit_rate": 0.75, "lookups": 4})
+
+    def test_exports(self):
+        registry = Metrics(enabled=True)
+        registry.record("map.build", 0.25)
+        registry.observe("blob.bytes", 2048)
+        registry.count("ranking.path.api")
+        text = registry.prometheus_text()
+        self.assertIn('aigis_span_seconds{span="map.build",quantile="0.5"} 0.25', text)
+        self.assertIn('aigis_span_seconds_count{span="map.build"} 1', text)
+        self.assertIn('aigis_size_sum{name="blob.bytes"} 2048', text)
+        self.assertIn('aigis_events_total{name="ranking.path.api"} 1', text)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            registry.write_file(path)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)["counters"], {"ranking.path.api": 1})
+
+    def test_prometheus_endpoint(self):
+        registry = Metrics(enabled=True)
+        registry.count("events", 3)
+        server = start_metrics_server(0, registry=registry)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertIn('aigis_events_total{name="events"} 3', response.read().decode())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.data import DataManager
+from src.notes import (FLAG_BITS, NoteFeatureExtractor, add_note_features, extract_note, has_note_flag,
+                       with_note_summary)
+
+NOTES = [
+    "Πολύ σοβαρά καρδιολογικά προβλήματα. Χρειάζεται υποστήριξη από μηχάνημα. Απαιτούνται δύο διασώστες",
+    "Ήπια σοβαρή αρθρίτιδα. Μπείτε από την πίσω πόρτα",
+    None,
+    "ΣΟΒΑΡΑ ΑΝΟΙΑ. Η κύρια είσοδος είναι μπλοκαρισμένη. 3 διασώστες",
+]
+
+
+class TestExtraction(unittest.TestCase):
+    def test_extract_note(self):
+        flags, severity, crew = extract_note(NOTES[0])
+        self.assertEqual(flags, FLAG_BITS['cardiac'] | FLAG_BITS['machine_support'])
+        self.assertEqual((severity, crew), (4, 2))
+        # The first severity wins ("Ήπια σοβαρή" is mild); accents and case are folded
+        self.assertEqual(extract_note(NOTES[1]), (FLAG_BITS['arthritis'] | FLAG_BITS['back_door'], 1, 1))
+        self.assertEqual(extract_note(NOTES[3]), (FLAG_BITS['dementia'] | FLAG_BITS['main_entrance_blocked'], 3, 3))
+        self.assertEqual(extract_note("Χωρίς ιδιαίτερες οδηγίες"), (0, 0, 1))
+
+    def test_extract_column(self):
+        features = NoteFeatureExtractor().extract(pd.Series(NOTES * 2, index=range(10, 18)))
+        self.assertEqual(list(features.index), list(range(10, 18)))
+        self.assertEqual(features['required_crew'].tolist(), [2, 1, 1, 3] * 2)
+        self.assertEqual(features['note_severity'].tolist(), [4, 1, 0, 3] * 2)
+        np.testing.assert_array_equal(has_note_flag(features['note_flags'], 'back_door'), [0, 1, 0, 0] * 2)
+
+    def test_only_new_notes_are_extracted(self):
+        extractor = NoteFeatureExtractor()
+        extractor.extract(pd.Series(NOTES * 100))
+        self.assertEqual((extractor.misses, extractor.hits), (3, 0))
+        extractor.extract(pd.Series(NOTES + ["Μέτρια κώφωση. Χρησιμοποιήστε ήρεμο τόνο"]))
+        self.assertEqual((extractor.misses, extractor.hits), (4, 3))
+
+    def test_cache_bounded_and_persisted(self):
+        extractor = NoteFeatureExtractor(max_entries=2)
+        extractor.extract(pd.Series(NOTES))
+        self.assertEqual(len(extractor), 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "notes_cache.json")
+            extractor.save(path)
+            loaded = NoteFeatureExtractor()
+            self.assertEqual(loaded.load(path), 2)
+        loaded.extract(pd.Series(NOTES))
+        self.assertEqual((loaded.misses, loaded.hits), (1, 2))
+
+
+class TestConsumers(unittest.TestCase):
+    def test_data_manager_adds_features(self):
+        df = DataManager.citizens_from_json([
+            {'id': 1, 'coordinates': {'lat': 38.0, 'lon': 24.0}, 'notes': NOTES[0]},
+            {'id': 2, 'coordinates': {'lat': 38.1, 'lon': 24.1}, 'notes': NOTES[1]},
+        ])
+        self.assertEqual(df['required_crew'].tolist(), [2, 1])
+        self.assertEqual(df['note_severity'].tolist(), [4, 1])
+
+    def test_note_summary_replaces_notes(self):
+        df = add_note_features(pd.DataFrame({'id': [1, 2, 3], 'notes': NOTES[:3]}))
+        out = with_note_summary(df)
+        self.assertEqual(list(out.columns), ['id', 'note_summary'])
+        self.assertEqual(out['note_summary'].iloc[0],
+                         "severity: very severe; medical: cardiac, machine support; crew: 2")
+        self.assertEqual(out['note_summary'].iloc[1], "severity: mild; medical: arthritis; access: back door")
+        self.assertEqual(out['note_summary'].iloc[2], "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from src.logic import apply_ranking_logic
+from src.ranking_model import LinearRankingModel, RankingModel, extract_features, load_ranking_model
+
+FEATURES = ["vulnerability", "life_support", "proximity", "note_bedridden", "note_machine_support"]
+
+
+def citizens(n=4):
+    notes = [
+        "Πολύ σοβαρά ΚΑΤΑΚΟΙΤΟΣ. Χρειάζεται υποστήριξη από μηχάνημα",
+        "Ήπια κώφωση. Είσοδος από τον κήπο",
+        None,
+        "Σοβαρά άνοια. Μπείτε από την πίσω πόρτα",
+    ]
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'vulnerability_score': np.resize([10, 2, 5, 8], n),
+        'life_support': np.resize([1, 0, 0, 1], n),
+        'distance_from_danger': np.resize([0, 3000, 1500, 600], n),
+        'danger_level': np.resize([90, 10, 60, 40], n),
+        'notes': np.resize(np.array(notes, dtype=object), n),
+    })
+
+
+class TestFeatures(unittest.TestCase):
+    def test_extract_features(self):
+        X = extract_features(citizens(), FEATURES)
+        self.assertEqual(X.shape, (4, 5))
+        self.assertEqual(X.dtype, np.float32)
+        np.testing.assert_allclose(X[:, 0], [1.0, 0.2, 0.5, 0.8])
+        np.testing.assert_allclose(X[:, 2], [1.0, 0.0, 0.5, 0.8])
+        # Note flags of src.notes (accent/case-insensitive); missing notes flag nothing
+        np.testing.assert_array_equal(X[:, 3], [1, 0, 0, 0])
+        np.testing.assert_array_equal(X[:, 4], [1, 0, 0, 0])
+
+    def test_missing_columns_are_zero(self):
+        X = extract_features(pd.DataFrame({'id': [1, 2]}), FEATURES)
+        np.testing.assert_array_equal(X, np.zeros((2, 5)))
+
+    def test_unknown_features_rejected(self):
+        with self.assertRaises(ValueError):
+            extract_features(citizens(), ["age"])
+        with self.assertRaises(ValueError):
+            LinearRankingModel(["notes:oxygen"], [1.0])
+
+    def test_note_severity_and_crew(self):
+        X = extract_features(citizens(), ["note_severity", "note_crew"])
+        np.testing.assert_allclose(X[:, 0], [1.0, 0.25, 0.0, 0.75])
+        np.testing.assert_array_equal(X[:, 1], [0, 0, 0, 0])
+
+
+class TestLinearRankingModel(unittest.TestCase):
+    def setUp(self):
+        self.model = LinearRankingModel(FEATURES, [40, 20, 20, 10, 10])
+
+    def test_scores_and_categories(self):
+        scores = self.model.score(citizens())
+        np.testing.assert_allclose(scores, [100.0, 8.0, 30.0, 68.0], rtol=1e-6)
+        self.assertEqual(list(self.model.categories(scores)), ['CRITICAL', 'LOW', 'LOW', 'HIGH'])
+
+    def test_portable_round_trip(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(self.model.to_dict(), f, ensure_ascii=False)
+        loaded = load_ranking_model(f.name)
+        df = citizens()
+        np.testing.assert_allclose(loaded.score(df), self.model.score(df))
+        self.assertEqual(loaded.thresholds, self.model.thresholds)
+
+    def test_fit_recovers_weights(self):
+        df = citizens(400)
+        df['vulnerability_score'] = np.random.default_rng(1).integers(0, 11, len(df))
+        target = self.model.score(df)
+        fitted = LinearRankingModel.fit(df, target, FEATURES)
+        np.testing.assert_allclose(fitted.score(df), target, atol=1e-3)
+
+    def test_bundled_model_loads(self):
+        model = load_ranking_model('models/ranking_model.json')
+        df = pd.read_json('dummy_data/dataset_250_finalDEL.json')
+        scores = model.score(df)
+        self.assertEqual(len(scores), len(df))
+        self.assertTrue(((scores >= 0) & (scores <= 100)).all())
+
+    def test_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            RankingModel()
+
+
+class TestRankingModes(unittest.TestCase):
+    def setUp(self):
+        self.model = LinearRankingModel(FEATURES, [40, 20, 20, 10, 10])
+        patcher = patch('src.logic.get_ranking_model', return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_model_mode_ignores_api(self):
+        with patch('src.logic.fetch_rankings_from_api') as fetch:
+            ranked = apply_ranking_logic(citizens(), mode='model')
+        fetch.assert_not_called()
+        self.assertEqual(list(ranked['id']), [1, 4, 3, 2])
+        self.assertEqual(list(ranked['risk_category']), ['CRITICAL', 'HIGH', 'LOW', 'LOW'])
+
+    def test_hybrid_scores_citizens_missing_from_api(self):
+        api = [{'id': 2, 'risk_category': 'High', 'ai_score': 55.0}]
+        with patch('src.logic.fetch_rankings_from_api', return_value=api):
+            ranked = apply_ranking_logic(citizens(), mode='hybrid').set_index('id')
+        self.assertEqual(ranked.loc[2, 'urgency_score'], 55.0)
+        self.assertEqual(ranked.loc[1, 'risk_category'], 'CRITICAL')
+        self.assertAlmostEqual(ranked.loc[4, 'urgency_score'], 68.0, places=4)
+
+    def test_hybrid_without_api_uses_model(self):
+        with patch('src.logic.fetch_rankings_from_api', return_value=None):
+            ranked = apply_ranking_logic(citizens(), mode='hybrid')
+        self.assertEqual(ranked.iloc[0]['urgency_score'], 100.0)
+
+    def test_api_mode_keeps_danger_level_fallback(self):
+        with patch('src.logic.fetch_rankings_from_api', return_value=None):
+            ranked = apply_ranking_logic(citizens(), mode='api')
+        self.assertEqual(list(ranked['urgency_score']), [90.0, 60.0, 40.0, 10.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+from src import resilience
+from src.data_plane import LocalDataPlane
+from src.refresh import DataSnapshot
+from src.resilience import LocalReplica
+from src.rankings import RankingCache
+from src.snapshot_store import SnapshotStore
+
+
+class SlowApi:
+    """Fake ranking API: returns self.data after `delay` seconds, or raises when self.down."""
+
+    def __init__(self, data, delay=0.0):
+        self.data = data
+        self.delay = delay
+        self.down = False
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.down:
+            raise ConnectionError("ranking API down")
+        return self.data
+
+
+class TestRankingCache(unittest.TestCase):
+    def setUp(self):
+        # A background refresh may still be writing the replica when the test ends
+        directory = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.addCleanup(directory.cleanup)
+        self.replica = LocalReplica(directory.name)
+        patcher = patch.dict(resilience._breakers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_cache(self, api, ttl_s=60):
+        return RankingCache(url="http://ranking.invalid", ttl_s=ttl_s, fetch=api, replica=self.replica, retry_s=0)
+
+    def test_get_never_waits_for_the_api(self):
+        api = SlowApi([{"id": 1, "risk_category": "HIGH"}], delay=0.3)
+        cache = self.make_cache(api)
+
+        start = time.perf_counter()
+        self.assertIsNone(cache.get())  # cold start: nothing yet, local fallback
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+        cache._refreshing.join()
+        self.assertEqual(cache.get(), api.data)
+        self.assertEqual(cache.version, 1)
+        self.assertEqual(api.calls, 1)  # fresh: no second fetch
+
+    def test_stale_rankings_survive_a_dead_api(self):
+        api = SlowApi([{"id": 1}])
+        cache = self.make_cache(api, ttl_s=0)
+        self.assertTrue(cache.refresh())
+
+        api.down = True
+        cache.get()
+        cache._refreshing.join()
+        self.assertEqual(cache.get(), [{"id": 1}])
+        self.assertIsNotNone(cache.last_error)
+        self.assertEqual(cache.version, 1)
+
+    def test_cold_start_from_replica(self):
+        self.make_cache(SlowApi([{"id": 2}])).refresh()
+        restarted = self.make_cache(SlowApi([{"id": 2}]))
+        self.assertEqual(restarted.data, [{"id": 2}])
+        self.assertIsNotNone(restarted.age_s)
+
+    def test_store_reranks_on_new_rankings_only(self):
+        api = SlowApi([{"id": 1}])
+        cache = self.make_cache(api, ttl_s=0)
+        cache.refresh()
+        store = SnapshotStore(lambda snapshot: snapshot.citizens, rankings=cache)
+        snapshot = DataSnapshot(1, pd.DataFrame({'id': [1]}), pd.DataFrame(), time.time())
+
+        first = store.current(snapshot)
+        if cache._refreshing is not None:
+            cache._refreshing.join()
+        self.assertIs(store.current(snapshot), first)  # same rankings: no rebuild
+        # The age shown is the cache's, refreshed by unchanged rankings too
+        plane = LocalDataPlane(MagicMock(), store=store)
+        cache.fetched_at -= 600
+        cache.refresh()
+        self.assertIs(store.current(snapshot), first)
+        self.assertLess(time.time() - plane.rankings_fetched_at(), 60)
+
+        api.data = [{"id": 1, "risk_category": "CRITICAL"}]
+        cache.refresh()
+        second = store.current(snapshot)
+        self.assertEqual((second.version, second.data_version, second.ranking_version), (2, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
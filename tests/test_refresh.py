@@ -0,0 +1,80 @@
+import unittest
+import pandas as pd
+from src.refresh import RefreshService, diff_citizens, drop_duplicate_ids
+
+
+def citizens(present=(1, 1, 0), ids=(1, 2, 3)):
+    return pd.DataFrame({
+        'id': list(ids),
+        'lat': [38.0 + i / 1000 for i in ids],
+        'lon': [23.9] * len(ids),
+        'present': list(present)
+    })
+
+
+FIRES = pd.DataFrame({'fire_id': [0, 0, 0], 'lat': [38.0, 38.1, 38.1], 'lon': [23.9, 23.9, 24.0]})
+
+
+class TestDiffCitizens(unittest.TestCase):
+    def test_added_removed_changed(self):
+        old = citizens()
+        new = citizens(present=(1, 0, 1), ids=(1, 2, 4))
+        added, removed, changed = diff_citizens(old, new)
+        self.assertEqual(added, (4,))
+        self.assertEqual(removed, (3,))
+        self.assertEqual(changed, (2,))
+
+    def test_identical_frames(self):
+        self.assertEqual(diff_citizens(citizens(), citizens()), ((), (), ()))
+
+
+class TestRefreshService(unittest.TestCase):
+    def setUp(self):
+        self.frames = [citizens()]
+        self.service = RefreshService(load_citizens=lambda: self.frames[-1], load_fires=lambda: FIRES)
+
+    def test_publishes_only_on_change(self):
+        first = self.service.refresh_once()
+        self.assertEqual(first.version, 1)
+
+        self.assertIs(self.service.refresh_once(), first)
+
+        self.frames.append(citizens(present=(0, 1, 0)))
+        second = self.service.refresh_once()
+        self.assertEqual(second.version, 2)
+        self.assertEqual(second.diff.changed_ids, (1,))
+        self.assertFalse(second.diff.fires_changed)
+        # The previously published snapshot is left untouched
+        self.assertEqual(first.citizens['present'].tolist(), [1, 1, 0])
+
+    def test_source_error_keeps_last_snapshot(self):
+        first = self.service.refresh_once()
+
+        def broken():
+            raise ConnectionError("blob down")
+
+        self.service.load_citizens = broken
+        self.assertIs(self.service.refresh_once(), first)
+        self.assertIn("blob down", self.service.last_error)
+
+
+    def test_duplicate_ids_are_dropped(self):
+        self.frames.append(citizens(present=(1, 0, 1), ids=(1, 2, 2)))
+        snapshot = self.service.refresh_once()
+        self.assertEqual(snapshot.citizens['id'].tolist(), [1, 2])
+        self.assertEqual(snapshot.citizens['present'].tolist(), [1, 1])
+        self.assertEqual(drop_duplicate_ids(citizens())[1], 0)
+
+    def test_invalid_data_keeps_last_snapshot(self):
+        first = self.service.refresh_once()
+        self.frames.append(pd.DataFrame({'lat': [38.0], 'lon': [23.9]}))
+        self.assertIs(self.service.refresh_once(), first)
+        self.assertIn("Invalid data", self.service.last_error)
+        # The next good poll clears the error
+        self.frames.append(citizens(present=(0, 0, 0)))
+        self.assertEqual(self.service.refresh_once().version, 2)
+        self.assertIsNone(self.service.last_error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from src.logic import rank_order
+from src.replay import SnapshotHistory, changed_rows
+
+
+def make_ranked(scores, categories=None, ids=None):
+    ids = list(ids if ids is not None else range(1, len(scores) + 1))
+    df = pd.DataFrame({
+        'id': ids,
+        'fullname': [f"Citizen {i}" for i in ids],
+        'risk_category': categories or ['LOW'] * len(ids),
+        'urgency_score': [float(s) for s in scores],
+    })
+    return rank_order(df)
+
+
+def make_shared(version, ranked, fires=None):
+    fires = fires if fires is not None else pd.DataFrame({'fire_id': [0], 'lat': [38.0], 'lon': [24.0]})
+    return SimpleNamespace(version=version, ranked=ranked, fires=fires)
+
+
+class TestDelta(unittest.TestCase):
+    def test_changed_rows(self):
+        prev = make_ranked([1, 2, 3])
+        curr = make_ranked([1, 5, 3, 4], ids=[1, 2, 3, 9])
+        positions, removed = changed_rows(prev, curr)
+        self.assertEqual(sorted(curr['id'].to_numpy()[positions].tolist()), [2, 9])
+        self.assertEqual(removed.tolist(), [])
+        _, removed = changed_rows(curr, prev)
+        self.assertEqual(removed.tolist(), [9])
+
+    def test_missing_values_are_equal(self):
+        prev = pd.DataFrame({'id': [1, 2], 'notes': [None, "a"]})
+        positions, _ = changed_rows(prev, prev.copy())
+        self.assertEqual(len(positions), 0)
+
+
+class TestSnapshotHistory(unittest.TestCase):
+    def setUp(self):
+        self.versions = [
+            make_ranked([10, 20, 30]),
+            make_ranked([10, 50, 30], categories=['LOW', 'CRITICAL', 'LOW']),
+            make_ranked([10, 50, 30, 5], categories=['LOW', 'CRITICAL', 'LOW', 'HIGH'], ids=[1, 2, 3, 4]),
+            make_ranked([50, 30, 5], categories=['CRITICAL', 'LOW', 'HIGH'], ids=[2, 3, 4]),
+        ]
+        self.moved_fire = pd.DataFrame({'fire_id': [0], 'lat': [38.1], 'lon': [24.1]})
+
+    def record_all(self, history):
+        kinds = []
+        for version, ranked in enumerate(self.versions, start=1):
+            fires = self.moved_fire if version >= 3 else None
+            kinds.append(history.record(make_shared(version, ranked, fires), recorded_at=1000.0 + version))
+        return kinds
+
+    def assert_replays(self, history):
+        for version, ranked in enumerate(self.versions, start=1):
+            snapshot = history.at(1000.0 + version + 0.5)
+            self.assertEqual(snapshot.version, version)
+            pd.testing.assert_frame_equal(snapshot.ranked, ranked)
+        self.assertIsNone(history.at(1000.0))
+        self.assertEqual(history.at(1002.0).fires['lat'].tolist(), [38.0])
+        self.assertEqual(history.at().fires['lat'].tolist(), [38.1])
+
+    def test_keyframes_and_deltas(self):
+        history = SnapshotHistory(None, keyframe_interval=3)
+        self.assertEqual(self.record_all(history), ['key', 'delta', 'delta', 'key'])
+        # Already recorded versions are skipped
+        self.assertIsNone(history.record(make_shared(4, self.versions[3])))
+        self.assertEqual([version for version, _ in history.moments()], [1, 2, 3, 4])
+        # Deltas hold only the changed rows
+        self.assertEqual(len(history._entries[1]['record']['rows']), 1)
+        self.assert_replays(history)
+        # Scrubbing backwards and forwards again gives the same frames (cached or rebuilt)
+        self.assert_replays(history)
+
+    def test_persisted_history_and_retention(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.record_all(SnapshotHistory(directory, keyframe_interval=2))
+            reopened = SnapshotHistory(directory, keyframe_interval=2, max_keyframes=2)
+            self.assertEqual(len(reopened), 4)
+            self.assert_replays(reopened)
+
+            # A restart starts with a keyframe; the oldest group is dropped beyond max_keyframes
+            self.assertEqual(reopened.record(make_shared(1, self.versions[0]), recorded_at=2000.0), 'key')
+            self.assertEqual([version for version, _ in reopened.moments()], [3, 4, 1])
+            self.assertEqual(len(os.listdir(directory)), 3)
+            self.assertIsNone(reopened.at(1002.5))
+
+    def test_rebuild_matches_many_random_versions(self):
+        rng = np.random.default_rng(0)
+        history = SnapshotHistory(None, keyframe_interval=5)
+        ranked = make_ranked(rng.random(200) * 100, ids=np.arange(200))
+        published = []
+        for version in range(1, 16):
+            ranked = ranked.copy()
+            changed = rng.choice(len(ranked), 10, replace=False)
+            ranked.iloc[changed, ranked.columns.get_loc('urgency_score')] = rng.random(10) * 100
+            ranked = rank_order(ranked[ranked['id'] != rng.integers(200)])
+            history.record(make_shared(version, ranked), recorded_at=float(version))
+            published.append(ranked)
+        for version in rng.permutation(15) + 1:
+            pd.testing.assert_frame_equal(history.at(float(version)).ranked, published[version - 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from src import resilience
+from src.resilience import (CircuitBreaker, CircuitOpenError, LocalReplica, resilient_call, health_report,
+                            get_breaker, CLOSED, OPEN, HALF_OPEN)
+from src.ai import AIAssistant
+
+
+def failing():
+    raise ConnectionError("upstream down")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_fails_fast(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_s=60)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(failing)
+        self.assertEqual(breaker.state, OPEN)
+
+        calls = []
+        start = time.perf_counter()
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: calls.append(1))
+        self.assertEqual(calls, [])
+        self.assertLess(time.perf_counter() - start, 0.01)
+
+    def test_half_open_allows_one_probe(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=0.05)
+        with self.assertRaises(ConnectionError):
+            breaker.call(failing)
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one probe at a time
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class TestResilientCall(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.replica = LocalReplica(directory.name)
+        patcher = patch.dict(resilience._breakers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        degraded = patch.dict(resilience._degraded, clear=True)
+        degraded.start()
+        self.addCleanup(degraded.stop)
+
+    def test_replica_serves_last_good_response(self):
+        data = [{"id": 1, "risk_category": "HIGH"}]
+        self.assertEqual(resilient_call("ranking", lambda: data, replica_key="rankings", replica=self.replica), data)
+        self.assertEqual(resilient_call("ranking", failing, replica_key="rankings", replica=self.replica), data)
+
+        report = {item['dependency']: item for item in health_report()}
+        self.assertTrue(report['ranking']['degraded'])
+        self.assertIsNotNone(report['ranking']['replica_age_s'])
+
+    def test_fallback_and_error_without_replica(self):
+        self.assertEqual(resilient_call("speech", failing, fallback=lambda: "offline", replica=self.replica), "offline")
+        with self.assertRaises(ConnectionError):
+            resilient_call("blob", failing, replica_key="missing", replica=self.replica)
+
+    def test_ai_answers_offline_while_circuit_is_open(self):
+        breaker = get_breaker("openai")
+        breaker.opened_at = time.time()
+        context = {'processed_data': [
+            {'id': 7, 'fullname': 'Α. Β.', 'risk_category': 'CRITICAL', 'present': 1, 'notes': 'Κατάκοιτος'},
+            {'id': 8, 'fullname': 'Γ. Δ.', 'risk_category': 'LOW', 'present': 1, 'notes': ''},
+        ]}
+        with patch('src.ai.AZURE_OPENAI_API_KEY', 'key'), patch('src.ai.AZURE_OPENAI_ENDPOINT', 'endpoint'), \
+                patch('src.ai.AZURE_OPENAI_DEPLOYMENT_NAME', 'deployment'), patch('src.ai.AzureOpenAI') as client:
+            response = AIAssistant.get_response("Ποιος είναι πρώτος;", context)
+        client.assert_not_called()
+        self.assertIn("Offline mode", response)
+        self.assertIn("ID 7", response)
+        self.assertNotIn("ID 8", response)
+
+
+if __name__ == '__main__':
+    unittest.main()
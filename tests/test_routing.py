@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.geo import haversine_matrix
+from src.routing import plan_route, nearest_neighbour_path, two_opt
+
+
+class TestRouting(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 60
+        self.citizens = pd.DataFrame({
+            'id': np.arange(1, n + 1),
+            'lat': 38.04 + rng.normal(0, 0.02, n),
+            'lon': 23.99 + rng.normal(0, 0.02, n),
+            'present': rng.integers(0, 2, n),
+            'risk_category': rng.choice(['CRITICAL', 'HIGH', 'LOW'], n)
+        })
+
+    def test_two_opt_never_lengthens_the_path(self):
+        lats = np.concatenate([[38.04], self.citizens['lat']])
+        lons = np.concatenate([[23.99], self.citizens['lon']])
+        dist = haversine_matrix(lats, lons)
+        stops = np.arange(1, len(lats))
+
+        def length(path):
+            nodes = [0] + list(path)
+            return sum(dist[a, b] for a, b in zip(nodes[:-1], nodes[1:]))
+
+        greedy = nearest_neighbour_path(dist, 0, stops)
+        improved = two_opt(dist, 0, greedy)
+        self.assertEqual(sorted(improved), stops.tolist())
+        self.assertLessEqual(length(improved), length(greedy) + 1e-6)
+
+    def test_plan_route_visits_tiers_in_order(self):
+        route = plan_route(self.citizens, start_lat=38.04, start_lon=23.99, max_stops=20)
+        present = self.citizens[self.citizens['present'] != 0].head(20)
+
+        self.assertEqual(sorted(route['id']), sorted(present['id']))
+        self.assertEqual(route['stop_order'].tolist(), list(range(1, len(route) + 1)))
+
+        rank = route['risk_category'].map({'CRITICAL': 0, 'HIGH': 1, 'LOW': 2}).to_numpy()
+        self.assertTrue(np.all(np.diff(rank) >= 0))
+        np.testing.assert_allclose(route['cumulative_m'].iloc[-1], route['leg_m'].sum())
+
+    def test_plan_route_empty(self):
+        self.assertTrue(plan_route(self.citizens.assign(present=0)).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
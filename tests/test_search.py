@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.search import CitizenIndex, normalize_text
+
+
+class TestNormalizeText(unittest.TestCase):
+    def test_accents_case_and_final_sigma(self):
+        self.assertEqual(normalize_text("ΣΟΒΑΡΆ  Μπείτε"), "σοβαρα μπειτε")
+        self.assertEqual(normalize_text("Ρούσσος"), "ρουσσοσ")
+        self.assertEqual(normalize_text(None), "")
+
+
+class TestCitizenIndex(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5],
+            'fullname': ['Φωτεινή Πολίτη', 'Ελπίδα Μάνου', 'Μαρία Ρούσσος', 'Νίκος Λαμπρόπουλος', 'Μαρία Μάνου'],
+            'notes': [
+                'Πολύ σοβαρά καρδιολογικά προβλήματα. Απαιτούνται δύο διασώστες',
+                'Σοβαρά αναπηρία. Μπείτε από την πίσω πόρτα',
+                None,
+                'Σοβαρά αναπηρία. Μπείτε από την πίσω πόρτα',
+                'Ήπια κώφωση. Είσοδος από τον κήπο'
+            ],
+            'present': [1, 1, 1, 0, 1],
+            'life_support': [0, 1, 1, 1, 0],
+            'distance_from_danger': [100, 700, 1500, 300, 2500],
+            'risk_category': ['CRITICAL', 'HIGH', 'LOW', 'CRITICAL', 'low']
+        })
+        self.index = CitizenIndex(self.df)
+
+    def test_present_only_by_default(self):
+        self.assertEqual(self.index.query().tolist(), [0, 1, 2, 4])
+        self.assertEqual(len(self.index.query(present_only=False)), 5)
+
+    def test_bitmap_filters(self):
+        self.assertEqual(self.index.query(categories=['critical', 'high']).tolist(), [0, 1])
+        self.assertEqual(self.index.query(categories=['LOW']).tolist(), [2, 4])
+        self.assertEqual(self.index.query(life_support=True).tolist(), [1, 2])
+        self.assertEqual(self.index.query(life_support=False).tolist(), [0, 4])
+        self.assertEqual(self.index.query(bands=['< 500 m', '> 2 km']).tolist(), [0, 4])
+
+    def test_text_search_is_accent_and_case_insensitive(self):
+        self.assertEqual(self.index.query(text='ΠΙΣΩ ΠΟΡΤΑ').tolist(), [1])
+        self.assertEqual(self.index.query(text='μανου').tolist(), [1, 4])
+        self.assertEqual(self.index.query(text='μαρια', life_support=True).tolist(), [2])
+        self.assertEqual(len(self.index.query(text='δεν υπαρχει')), 0)
+
+    def test_short_queries_match_token_prefixes(self):
+        self.assertEqual(self.index.query(text='Μα').tolist(), [1, 2, 4])
+        self.assertEqual(self.index.query(text='ρ', present_only=False).tolist(), [2])
+
+    def test_matches_brute_force_scan(self):
+        texts = (self.df['fullname'].map(normalize_text) + '|' + self.df['notes'].map(normalize_text))
+        for query in ['σοβαρα', 'απο την', 'ουσ', 'κηπο']:
+            expected = np.flatnonzero(texts.str.contains(normalize_text(query), regex=False).to_numpy())
+            np.testing.assert_array_equal(self.index.query(text=query, present_only=False), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
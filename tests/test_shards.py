@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+from src.data import DataManager
+from src.logic import apply_ranking_logic
+from src.shards import ShardManifest, ShardCache, ShardedDataSource, area_around, bbox_from_map_bounds, shard_namespace
+
+MANIFEST = {"shards": [
+    {"id": "athens", "citizens_blob": "athens.json", "fires_blob": "athens_fire.json", "bbox": [37.9, 38.1, 23.6, 23.9]},
+    {"id": "marathon", "citizens_blob": "marathon.json", "bbox": [38.1, 38.2, 23.9, 24.1]},
+    {"id": "patras", "citizens_blob": "patras.json", "bbox": [38.2, 38.3, 21.7, 21.8], "incident": True},
+    {"id": "thessaloniki", "citizens_blob": "thessaloniki.json", "bbox": [40.5, 40.7, 22.8, 23.0]},
+]}
+
+
+def fake_shard(shard):
+    lat = sum(shard.bbox[:2]) / 2
+    lon = sum(shard.bbox[2:]) / 2
+    # Municipal ids restart at 1 in every shard: they collide across shards
+    citizens = pd.DataFrame({'id': range(1, 101), 'lat': lat, 'lon': lon})
+    fires = DataManager.fires_from_json([[{'lat': lat, 'lon': lon}, {'lat': lat + 0.01, 'lon': lon},
+                                          {'lat': lat, 'lon': lon + 0.01}]]) if shard.fires_blob else pd.DataFrame()
+    return citizens, fires
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.manifest = ShardManifest.from_json(MANIFEST)
+        self.loaded = []
+
+    def counting_loader(self, shard):
+        self.loaded.append(shard.shard_id)
+        return fake_shard(shard)
+
+    def test_manifest_area_query(self):
+        area = area_around(38.0, 23.8, 5000)
+        ids = [shard.shard_id for shard in self.manifest.intersecting([area])]
+        self.assertEqual(ids, ["athens", "patras"])
+        ids = [shard.shard_id for shard in self.manifest.intersecting([area], include_incidents=False)]
+        self.assertEqual(ids, ["athens"])
+
+    def test_cache_reuses_and_evicts_under_budget(self):
+        shard_size = sum(int(df.memory_usage(deep=True).sum()) for df in fake_shard(self.manifest.shards[1]) if not df.empty)
+        cache = ShardCache(self.counting_loader, budget_bytes=2.5 * shard_size, max_age_s=60)
+
+        cache.get_many(self.manifest.shards[1:3])
+        cache.get_many(self.manifest.shards[1:2])
+        self.assertEqual(self.loaded, ["marathon", "patras"])
+
+        # Third shard pushes the total over budget: least recently used (patras) goes
+        cache.get_many(self.manifest.shards[3:4])
+        self.assertEqual(cache.loaded_ids(), ["marathon", "thessaloniki"])
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.memory_bytes, cache.budget_bytes)
+
+    def test_source_loads_only_active_shards(self):
+        source = ShardedDataSource(lambda: self.manifest, self.counting_loader,
+                                   base_area=area_around(38.0, 23.8, 5000))
+        citizens = source.load_citizens()
+        fires = source.load_fires()
+        self.assertEqual(sorted(citizens['shard_id'].unique()), ["athens", "patras"])
+        # Colliding municipal ids get distinct, stable ids; the municipal id is kept
+        self.assertTrue(citizens['id'].is_unique)
+        self.assertEqual(citizens['source_id'].tolist(), list(range(1, 101)) * 2)
+        athens = citizens[citizens['shard_id'] == "athens"]
+        self.assertEqual(athens['id'].iloc[0], (shard_namespace("athens") << 32) | 1)
+        self.assertEqual(fires['fire_id'].unique().tolist(), ["athens/0"])
+        self.assertIn("athens/0", fires.attrs['bounds'])
+        self.assertEqual(sorted(self.loaded), ["athens", "patras"])
+
+        # A viewport over Thessaloniki brings that shard in on the next load
+        bounds = {'_southWest': {'lat': 40.6, 'lng': 22.9}, '_northEast': {'lat': 40.65, 'lng': 22.95}}
+        source.set_viewport("viewer-1", bbox_from_map_bounds(bounds))
+        self.assertIn("thessaloniki", source.load_citizens()['shard_id'].unique())
+
+
+    def test_api_rankings_match_shard_and_municipal_id(self):
+        source = ShardedDataSource(lambda: self.manifest, self.counting_loader,
+                                   base_area=area_around(38.0, 23.8, 5000))
+        citizens = source.load_citizens()
+        # Municipal id 1 exists in both shards: only the Athens citizen is ranked CRITICAL
+        api = [{'id': 1, 'shard_id': "athens", 'risk_category': 'CRITICAL', 'ai_score': 99.0}]
+        with patch('src.logic.fetch_rankings_from_api', return_value=api):
+            ranked = apply_ranking_logic(citizens.copy(), mode='api')
+        critical = ranked[ranked['risk_category'] == 'CRITICAL']
+        self.assertEqual(critical[['shard_id', 'source_id']].values.tolist(), [["athens", 1]])
+        self.assertTrue(ranked['id'].is_unique)
+
+    def test_api_rankings_without_shard_use_the_model(self):
+        source = ShardedDataSource(lambda: self.manifest, self.counting_loader,
+                                   base_area=area_around(38.0, 23.8, 5000))
+        citizens = source.load_citizens()
+        api = [{'id': 1, 'risk_category': 'CRITICAL', 'ai_score': 99.0}]
+        model = MagicMock()
+        model.score.side_effect = lambda df: np.zeros(len(df))
+        model.categories.side_effect = lambda scores: np.full(len(scores), 'LOW', dtype=object)
+        with patch('src.logic.fetch_rankings_from_api', return_value=api), \
+                patch('src.logic.get_ranking_model', return_value=model):
+            ranked = apply_ranking_logic(citizens.copy(), mode='api')
+        self.assertEqual(len(model.score.call_args.args[0]), len(citizens))
+        self.assertNotIn(99.0, ranked['urgency_score'].tolist())
+        self.assertEqual(set(ranked['risk_category']), {'LOW'})
+
+
+if __name__ == '__main__':
+    unittest.main()
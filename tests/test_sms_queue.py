@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import requests
+from src.resilience import CircuitBreaker
+from src.sms import send_bulk_sms
+from src.sms_queue import SmsQueue, SmsWorker, content_hash, QUEUED, SENDING, SENT, FAILED
+
+DESTINATIONS = [{'to': '306900000001'}, {'to': '306900000002'}]
+
+
+class TestSmsQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "queue.db")
+        self.queue = SmsQueue(db_path=self.db_path, max_attempts=2)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_content_hash_ignores_recipient_order(self):
+        self.assertEqual(content_hash(DESTINATIONS, "hi"), content_hash(list(reversed(DESTINATIONS)), "hi"))
+        self.assertNotEqual(content_hash(DESTINATIONS, "hi"), content_hash(DESTINATIONS, "bye"))
+
+    def test_enqueue_is_idempotent(self):
+        self.assertEqual(self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1"), ("k1", True))
+        self.assertEqual(self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1"), ("k1", False))
+        self.assertEqual(self.queue.pending_count(), 1)
+        self.assertEqual(self.queue.get_status("k1")['status'], QUEUED)
+
+    def test_same_message_is_suppressed_within_a_sliding_window(self):
+        queue = SmsQueue(db_path=self.db_path, dedupe_window_s=60)
+        key, created = queue.enqueue(DESTINATIONS, "hi")
+        self.assertTrue(created)
+        # Any time within 60 s of the first job, whatever the clock bucket
+        job = queue.get_status(key)
+        queue._update(job['id'], created_at=job['created_at'] - 59)
+        self.assertEqual(queue.enqueue(list(reversed(DESTINATIONS)), "hi"), (key, False))
+        self.assertTrue(queue.enqueue(DESTINATIONS, "other")[1])
+
+        # Outside the window, or once the job failed, the message is sent again
+        queue._update(job['id'], created_at=job['created_at'] - 61)
+        later, created = queue.enqueue(DESTINATIONS, "hi")
+        self.assertTrue(created)
+        self.assertNotEqual(later, key)
+        queue._update(queue.get_status(later)['id'], status=FAILED)
+        self.assertTrue(queue.enqueue(DESTINATIONS, "hi")[1])
+
+    def test_worker_sends_job_once(self):
+        sender = MagicMock(return_value={'sent': 2})
+        self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1")
+        worker = SmsWorker(self.queue, sender=sender)
+
+        self.assertTrue(worker.process_next())
+        self.assertFalse(worker.process_next())
+
+        sender.assert_called_once_with(DESTINATIONS, "hi", sender_name="Hackathon", bulk_id="k1")
+        job = self.queue.get_status("k1")
+        self.assertEqual(job['status'], SENT)
+        self.assertEqual(job['sent_count'], 2)
+
+    def test_failed_job_is_retried_then_given_up(self):
+        sender = MagicMock(side_effect=ConnectionError("down"))
+        self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1")
+        worker = SmsWorker(self.queue, sender=sender)
+
+        worker.process_next()
+        job = self.queue.get_status("k1")
+        self.assertEqual(job['status'], QUEUED)
+        self.assertIn("down", job['last_error'])
+
+        # Make the retry due immediately
+        self.queue._update(job['id'], next_attempt_at=0)
+        worker.process_next()
+        self.assertEqual(self.queue.get_status("k1")['status'], FAILED)
+
+    def test_failed_claim_gives_back_the_probe(self):
+        breaker = CircuitBreaker("sms-test", failure_threshold=1, reset_timeout_s=0)
+        breaker.record_failure("down")
+        worker = SmsWorker(self.queue, sender=MagicMock(), breaker=breaker)
+        with patch.object(self.queue, 'claim_next', side_effect=sqlite3.OperationalError("database is locked")):
+            self.assertFalse(worker.process_next())
+        # The half-open probe is free again for the next poll
+        self.assertTrue(breaker.allow())
+
+    def test_jobs_survive_restart(self):
+        self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1")
+        self.queue.claim_next()
+        self.assertEqual(self.queue.get_status("k1")['status'], SENDING)
+
+        # Another live process does not take a job whose lease still runs
+        other = SmsQueue(db_path=self.db_path)
+        self.assertEqual(other.requeue_interrupted(), 0)
+        self.assertIsNone(other.claim_next())
+
+        # A new process opens the same database and recovers the job once the lease expired
+        self.queue._update(self.queue.get_status("k1")['id'], lease_until=time.time() - 1)
+        restarted = SmsQueue(db_path=self.db_path)
+        self.assertEqual(restarted.requeue_interrupted(), 1)
+        self.assertEqual(restarted.get_status("k1")['status'], QUEUED)
+
+    def test_expired_lease_is_claimed_again(self):
+        self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1")
+        job = self.queue.claim_next()
+        self.assertEqual(self.queue.get_status("k1")['lease_owner'], self.queue.owner)
+        self.queue._update(job['id'], lease_until=time.time() - 1)
+        other = SmsQueue(db_path=self.db_path)
+        reclaimed = other.claim_next()
+        self.assertEqual((reclaimed['idempotency_key'], reclaimed['attempts']), ("k1", 2))
+        self.assertEqual(other.get_status("k1")['lease_owner'], other.owner)
+
+    def test_lost_lease_does_not_settle_the_job(self):
+        self.queue.enqueue(DESTINATIONS, "hi", idempotency_key="k1")
+        job = self.queue.claim_next()
+        self.queue._update(job['id'], lease_until=time.time() - 1)
+        other = SmsQueue(db_path=self.db_path)
+        self.assertTrue(other.mark_sent(other.claim_next(), 2))
+
+        # The first worker finishing late neither requeues nor overwrites the sent job
+        self.assertFalse(self.queue.mark_failed(job, "timeout"))
+        self.assertFalse(self.queue.mark_sent(job, 1))
+        status = self.queue.get_status("k1")
+        self.assertEqual((status['status'], status['sent_count'], status['last_error']), (SENT, 2, None))
+
+    def test_database_without_lease_columns_is_migrated(self):
+        self.queue._conn.executescript("DROP TABLE sms_jobs; CREATE TABLE sms_jobs (id INTEGER PRIMARY KEY,"
+                                       " idempotency_key TEXT NOT NULL UNIQUE, destinations TEXT NOT NULL,"
+                                       " message_text TEXT NOT NULL, sender_name TEXT NOT NULL, status TEXT NOT NULL,"
+                                       " attempts INTEGER NOT NULL DEFAULT 0, sent_count INTEGER NOT NULL DEFAULT 0,"
+                                       " last_error TEXT, next_attempt_at REAL NOT NULL, created_at REAL NOT NULL,"
+                                       " updated_at REAL NOT NULL);")
+        migrated = SmsQueue(db_path=self.db_path)
+        self.assertTrue(migrated.enqueue(DESTINATIONS, "hi")[1])
+        self.assertEqual(migrated.claim_next()['lease_owner'], migrated.owner)
+
+def fake_response(status_code, body):
+    return MagicMock(status_code=status_code, text=str(body), json=MagicMock(return_value=body))
+
+
+@patch('src.sms.INFOBIP_BASE_URL', 'infobip.test')
+@patch('src.sms.INFOBIP_API_KEY', 'key')
+class TestSendBulkSms(unittest.TestCase):
+    def test_posts_with_timeout_and_counts_accepted(self):
+        body = {'messages': [{'status': {'groupName': 'PENDING'}}, {'status': {'groupName': 'REJECTED'}}]}
+        with patch('src.sms.requests.post', return_value=fake_response(200, body)) as post:
+            self.assertEqual(send_bulk_sms(DESTINATIONS, "hi", bulk_id="k1"), {'sent': 1})
+        self.assertIn('timeout', post.call_args.kwargs)
+        self.assertEqual(post.call_args.kwargs['json']['bulkId'], "k1")
+
+    def test_error_status_raises(self):
+        with patch('src.sms.requests.post', return_value=fake_response(401, {})):
+            with self.assertRaises(RuntimeError):
+                send_bulk_sms(DESTINATIONS, "hi")
+
+    def test_timeout_propagates(self):
+        with patch('src.sms.requests.post', side_effect=requests.Timeout):
+            with self.assertRaises(requests.Timeout):
+                send_bulk_sms(DESTINATIONS, "hi")
+
+    def test_not_configured_raises(self):
+        with patch('src.sms.INFOBIP_API_KEY', None), patch('src.sms.requests.post') as post:
+            with self.assertRaises(RuntimeError):
+                send_bulk_sms(DESTINATIONS, "hi")
+        post.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
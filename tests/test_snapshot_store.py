@@ -0,0 +1,59 @@
+import threading
+import time
+import unittest
+import pandas as pd
+from src.refresh import DataSnapshot
+from src.snapshot_store import SnapshotStore
+
+
+def make_snapshot(version, n=10):
+    citizens = pd.DataFrame({'id': range(n), 'danger_level': range(n)})
+    return DataSnapshot(version, citizens, pd.DataFrame(), time.time())
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.rank_calls = 0
+
+        def rank(snapshot):
+            self.rank_calls += 1
+            time.sleep(0.01)
+            return snapshot.citizens.sort_values('danger_level', ascending=False)
+
+        self.store = SnapshotStore(rank)
+
+    def test_sessions_share_one_ranked_frame_per_version(self):
+        snapshot = make_snapshot(1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.store.current(snapshot))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.rank_calls, 1)
+        self.assertTrue(all(shared is results[0] for shared in results))
+        self.assertEqual(results[0].ranked['id'].iloc[0], 9)
+
+    def test_new_version_swaps_and_old_reference_stays_valid(self):
+        old = self.store.current(make_snapshot(1))
+        new = self.store.current(make_snapshot(2, n=20))
+
+        self.assertEqual(new.version, 2)
+        self.assertEqual(len(old.ranked), 10)
+        # A session still on an older version gets the current one
+        self.assertIs(self.store.current(make_snapshot(1)), new)
+
+    def test_derived_values_are_per_version(self):
+        calls = []
+        shared = self.store.current(make_snapshot(1))
+        first = self.store.derived(shared, 'route', lambda: calls.append(1) or len(shared.ranked))
+        second = self.store.derived(shared, 'route', lambda: calls.append(1) or -1)
+        self.assertEqual((first, second, len(calls)), (10, 10, 1))
+
+        newer = self.store.current(make_snapshot(2, n=20))
+        self.assertEqual(self.store.derived(newer, 'route', lambda: len(newer.ranked)), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
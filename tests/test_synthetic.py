@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.data import DataManager
+from src.geo import distance_to_fires_m
+from src.synthetic import generate_dataset, synthetic_snapshot, citizens_to_json, fires_to_json
+
+
+class TestSyntheticDataset(unittest.TestCase):
+    def test_live_schema(self):
+        citizens, fires = generate_dataset(500, seed=3)
+        live = DataManager.load_data_from_local_json('dummy_data/dataset_250_finalDEL.json')
+        self.assertEqual(list(citizens.columns), [c for c in live.columns if c != 'coordinates'])
+        self.assertEqual(citizens['id'].tolist(), list(range(1, 501)))
+        self.assertTrue(citizens['vulnerability_score'].between(2, 10).all())
+        self.assertTrue(citizens['danger_level'].between(0, 95).all())
+        self.assertTrue({'fire_id', 'lat', 'lon', 'dp_error_m', 'min_zoom'} <= set(fires.columns))
+        self.assertEqual(fires['fire_id'].nunique(), 2)
+
+    def test_seeded(self):
+        a, fires_a = generate_dataset(1000, seed=7)
+        b, fires_b = generate_dataset(1000, seed=7)
+        c, _ = generate_dataset(1000, seed=8)
+        pd.testing.assert_frame_equal(a, b)
+        pd.testing.assert_frame_equal(fires_a, fires_b)
+        self.assertFalse(a['lat'].equals(c['lat']))
+
+    def test_life_support_notes(self):
+        citizens, _ = generate_dataset(2000, seed=1)
+        needs = citizens['notes'].astype(str).str.contains('Χρειάζεται')
+        np.testing.assert_array_equal(needs.to_numpy(), citizens['life_support'].to_numpy() == 1)
+
+    def test_distance_matches_fire_polygons(self):
+        citizens, fires = generate_dataset(2000, seed=2, fire_vertices=2000)
+        exact = distance_to_fires_m(citizens['lat'], citizens['lon'], fires)
+        # Radial distance is never below the distance to the perimeter
+        radial = citizens['distance_from_danger'].to_numpy()
+        self.assertTrue((radial >= exact - 5).all())
+        self.assertGreater(np.corrcoef(radial, exact)[0, 1], 0.99)
+
+    def test_blob_json_round_trip(self):
+        citizens, fires = generate_dataset(300, seed=4)
+        with tempfile.TemporaryDirectory() as directory:
+            citizens_to_json(citizens, os.path.join(directory, 'citizens.json'))
+            fires_to_json(fires, os.path.join(directory, 'fires.json'))
+            with open(os.path.join(directory, 'citizens.json'), encoding='utf-8') as f:
+                raw = json.load(f)
+            with open(os.path.join(directory, 'fires.json'), encoding='utf-8') as f:
+                raw_fires = json.load(f)
+        self.assertEqual(set(raw[0]['coordinates']), {'lat', 'lon'})
+        loaded = DataManager.citizens_from_json(raw)
+        self.assertEqual(loaded['notes'].tolist(), citizens['notes'].astype(str).tolist())
+        np.testing.assert_allclose(loaded['lat'], citizens['lat'], atol=1e-6)
+        self.assertEqual(len(DataManager.fires_from_json(raw_fires)), len(fires))
+
+    def test_snapshot(self):
+        snapshot = synthetic_snapshot(100, seed=5, version=4)
+        self.assertEqual(snapshot.version, 4)
+        self.assertEqual(len(snapshot.citizens), 100)
+        self.assertIs(snapshot.fire_history[-1][1], snapshot.fires)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.ui import list_page, lod_view_change
+
+
+def ranked(n=120):
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1) * 10,
+        'fullname': [f"Citizen {i}" for i in range(n)],
+        'risk_category': np.resize(['CRITICAL', 'HIGH', 'LOW'], n),
+        'life_support': np.resize([1, 0], n),
+        'present': np.resize([1, 1, 0], n),
+        'notes': None,
+    })
+
+
+class TestListPage(unittest.TestCase):
+    def setUp(self):
+        self.data = ranked()
+        self.positions = np.flatnonzero(self.data['present'].to_numpy() != 0)  # 80 present rows
+
+    def test_page_bounds(self):
+        first, positions, start = list_page(self.data, self.positions, 1, page_size=50)
+        self.assertEqual((len(first), start), (50, 0))
+        last, positions, start = list_page(self.data, self.positions, 2, page_size=50)
+        self.assertEqual((len(last), start), (30, 50))
+        # Out-of-range pages are clamped to the first / last one
+        self.assertEqual(list_page(self.data, self.positions, 7, page_size=50)[2], 50)
+        self.assertEqual(list_page(self.data, self.positions, 0, page_size=50)[2], 0)
+        self.assertEqual(list(first.columns), ['id', 'fullname', 'risk_category', 'life_support'])
+
+    def test_empty_list(self):
+        display_df, positions, start = list_page(self.data, np.empty(0, dtype=np.int64), 3, page_size=50)
+        self.assertEqual((len(display_df), len(positions), start), (0, 0, 0))
+
+    def test_selection_maps_back_to_the_citizen(self):
+        display_df, positions, _ = list_page(self.data, self.positions, 2, page_size=50)
+        for row in (0, 17, len(display_df) - 1):
+            citizen = self.data.iloc[positions[row]]
+            self.assertEqual(citizen['id'], display_df.loc[row, 'id'])
+            self.assertEqual(citizen['present'], 1)
+
+
+class TestLodViewChange(unittest.TestCase):
+    def test_rebuild_only_on_another_lod_level(self):
+        view = {'zoom': 15, 'center': {'lat': 38.1, 'lng': 23.9}}
+        self.assertEqual(lod_view_change(view, 12.5), (15, [38.1, 23.9]))
+        # Same whole zoom level (13 covers 12.5), or no view reported yet
+        self.assertIsNone(lod_view_change({'zoom': 13, 'center': {}}, 12.5))
+        self.assertIsNone(lod_view_change(None, 12.5))
+        self.assertEqual(lod_view_change({'zoom': 10}, 12.5), (10, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
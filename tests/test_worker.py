@@ -0,0 +1,108 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+from src.data_plane import LocalDataPlane
+from src.worker import WorkerServer, RemoteDataPlane, WorkerError, local_file_loaders
+
+AUTHKEY = b"test-worker"
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        # Local files only: the dummy dataset, no fires; event log and history in memory
+        with patch('src.data_plane.EVENT_LOG_DIR', ''), patch('src.data_plane.HISTORY_DIR', ''):
+            self.plane = LocalDataPlane.create(*local_file_loaders('dummy_data/dataset_250_finalDEL.json'),
+                                               start=False)
+        self.server = WorkerServer(self.plane, ('127.0.0.1', 0), authkey=AUTHKEY)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = RemoteDataPlane(self.server.address, authkey=AUTHKEY)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_remote_matches_local(self):
+        local = self.plane.current()
+        remote = self.client.current()
+        self.assertEqual(remote.version, local.version)
+        pd.testing.assert_frame_equal(remote.ranked, local.ranked)
+
+        filters = {'categories': ['CRITICAL', 'HIGH'], 'text': 'δια'}
+        np.testing.assert_array_equal(self.client.query(remote.version, **filters),
+                                      self.plane.query(local.version, **filters))
+        pd.testing.assert_frame_equal(self.client.route(remote.version, max_stops=10),
+                                      self.plane.route(local.version, max_stops=10))
+
+    def test_snapshot_is_fetched_once_per_version(self):
+        first = self.client.current()
+        self.assertIs(self.client.current(), first)
+        self.assertIsNone(self.client.snapshot(first.version))
+
+    def test_errors_are_raised_on_the_client(self):
+        with self.assertRaises(WorkerError):
+            self.client.query(None, unknown_filter=True)
+        with self.assertRaises(WorkerError):
+            self.client._call('service')
+        # The connection stays usable after an error
+        self.assertEqual(self.client.current().version, 1)
+
+    def test_authkey_is_required(self):
+        with self.assertRaises(ValueError):
+            WorkerServer(self.plane, ('127.0.0.1', 0), authkey=None)
+        with self.assertRaises(ValueError):
+            RemoteDataPlane(self.server.address, authkey=b"")
+
+    def test_alert_sms_are_queued_in_the_data_plane_process(self):
+        queue = MagicMock()
+        with patch('src.data_plane.EVENT_LOG_DIR', ''), patch('src.data_plane.HISTORY_DIR', ''), \
+                patch('src.data_plane.ALERT_SMS_RECIPIENTS', ['+301']), \
+                patch('src.data_plane.get_sms_queue', return_value=queue) as get_queue:
+            plane = LocalDataPlane.create(*local_file_loaders('dummy_data/dataset_250_finalDEL.json'), start=False)
+        # The process-wide queue (and its SmsWorker) is started with the data plane, not by a dashboard
+        get_queue.assert_called_once_with()
+        plane.tracker.notify([{'id': 1, 'fullname': 'A', 'to': 'CRITICAL'}])
+        self.assertEqual(queue.enqueue.call_args.args[0], [{'to': '+301'}])
+
+    def test_alerts_and_timeline_over_rpc(self):
+        self.client.current()
+        self.plane.wait_recorded()
+        self.assertEqual(self.client.alerts(), self.plane.alerts())
+        pd.testing.assert_frame_equal(self.client.timeline(), self.plane.timeline())
+        # The first version is logged as the baseline of every citizen
+        self.assertEqual(len(self.client.timeline()), len(self.plane.current().ranked))
+
+    def test_event_log_and_history_are_recorded_off_the_request_path(self):
+        release = threading.Event()
+        self.plane.tracker = MagicMock()
+        self.plane.tracker.observe.side_effect = lambda *args: release.wait(5)
+        self.plane._recent.clear()
+        # current() returns while the recorder is still busy with the version
+        shared = self.plane.current()
+        self.assertEqual(self.plane._published.unfinished_tasks, 1)
+        release.set()
+        self.plane.wait_recorded()
+        self.assertIs(self.plane.tracker.observe.call_args.args[0], shared)
+
+    def test_replay_over_rpc(self):
+        shared = self.client.current()
+        self.plane.wait_recorded()
+        moments = self.client.replay_moments()
+        self.assertEqual([version for version, _ in moments], [shared.version])
+        replayed = self.client.replay(moments[0][1])
+        pd.testing.assert_frame_equal(replayed.ranked, shared.ranked)
+        self.assertIsNone(self.client.replay(moments[0][1] - 1))
+
+    def test_one_connection_per_thread(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(len(self.client.route(None, max_stops=5))))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [5] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()